@@ -0,0 +1,296 @@
+"""Benchmarks for the repository, service and endpoint hot paths.
+
+Run against synthetic catalogues of several sizes and write the timings to a JSON baseline:
+
+    $ python -m benchmarks.bench --sizes 1000 100000 1000000 --output benchmarks/baseline.json
+
+Compare a new run against a stored baseline, failing if any benchmark slowed down by more than the threshold:
+
+    $ python -m benchmarks.bench --sizes 1000 --compare benchmarks/baseline.json --threshold 0.25
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import covid.adapters.repository as repo
+import covid.home.services as home_services
+from covid import create_app
+from covid.adapters.data_generator import generate, user_credentials
+from covid.adapters.facet_index import MovieFilter
+from covid.adapters.memory_repository import MemoryRepository, populate
+from covid.home.home import like
+
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+DEFAULT_THRESHOLD = 0.25
+
+# Synthetic users are hashed one at a time by populate(), so keep their number small.
+BENCH_USERS = 20
+BENCH_USERNAME, BENCH_PASSWORD = user_credentials(1)
+
+# Benchmarks in the order they are run, as (name, function) pairs. Each function takes a BenchEnvironment and
+# returns a callable performing one operation.
+BENCHMARKS = []
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS.append((name, setup))
+        return setup
+    return register
+
+
+class BenchEnvironment:
+    def __init__(self, data_path: str, size: int):
+        self.data_path = data_path
+        self.size = size
+        self.app = create_app({
+            'TESTING': True,
+            'TEST_DATA_PATH': data_path,
+            'WTF_CSRF_ENABLED': False
+        })
+        self.repo = repo.repo_instance
+        self.client = self.app.test_client()
+        self.genre = 'Drama'
+        self.search = 'galaxy'
+        self.page_ids = list(range(1, min(size, 35) + 1))
+
+    def login(self):
+        return self.client.post(
+            '/authentication/login', data={'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+
+
+@benchmark('populate')
+def bench_populate(env: BenchEnvironment):
+    return lambda: populate(env.data_path, MemoryRepository())
+
+
+@benchmark('populate_parallel')
+def bench_populate_parallel(env: BenchEnvironment):
+    # Parsing spread over a process pool, one worker per core; the repository is still filled serially.
+    return lambda: populate(env.data_path, MemoryRepository(), workers=os.cpu_count() or 1)
+
+
+@benchmark('get_movie_ids_for_genre')
+def bench_genre_ids(env: BenchEnvironment):
+    # Uncached, so each call reads the genre afresh rather than the query cache.
+    def run():
+        env.repo._query_cache.invalidate()
+        return env.repo.get_movie_ids_for_genre(None, env.genre)
+    return run
+
+
+@benchmark('get_movie_ids_for_genre_search')
+def bench_genre_search_ids(env: BenchEnvironment):
+    # Uncached, so each call runs the search.
+    def run():
+        env.repo._query_cache.invalidate()
+        return env.repo.get_movie_ids_for_genre(env.search, env.genre)
+    return run
+
+
+@benchmark('get_movie_ids_for_filter')
+def bench_filter_ids(env: BenchEnvironment):
+    # Uncached, so each call combines the bitsets afresh.
+    movie_filter = MovieFilter(genres=[env.genre, 'Comedy'], year_from=2008, year_to=2012, min_rating=6.5)
+    return lambda: env.repo._find_movie_ids_for_filter(None, movie_filter)
+
+
+@benchmark('get_facet_counts')
+def bench_facet_counts(env: BenchEnvironment):
+    movie_filter = MovieFilter(genres=[env.genre], min_rating=6.5)
+    return lambda: env.repo.get_facet_counts(None, movie_filter)
+
+
+@benchmark('get_movie_ids_sorted')
+def bench_sorted_ids(env: BenchEnvironment):
+    # A page of a genre in rating order, uncached.
+    def run():
+        env.repo._query_cache.invalidate()
+        return env.repo.get_movie_ids_for_genre(None, env.genre, 'rating')[:10]
+    return run
+
+
+@benchmark('get_movie_ids_review_count')
+def bench_review_count_ids(env: BenchEnvironment):
+    # A page of every movie by review count, read straight off the sorted list.
+    return lambda: env.repo.get_movie_ids_for_genre(None, 'all', 'review_count')[500:510]
+
+
+@benchmark('get_movie_ids_page_deep')
+def bench_deep_page(env: BenchEnvironment):
+    # A page of a genre, in date order, from a cursor near its end: a seek, not a walk.
+    movie_filter = MovieFilter(genres=[env.genre])
+    movie_ids = env.repo.get_movie_ids_page(movie_filter, 'date', None, 35, reverse=True)
+    key = env.repo.get_sort_key(movie_ids[0], 'date')
+    return lambda: env.repo.get_movie_ids_page(movie_filter, 'date', key, 35)
+
+
+@benchmark('get_title_suggestions')
+def bench_title_suggestions(env: BenchEnvironment):
+    return lambda: env.repo.get_title_suggestions(env.search[:3])
+
+
+@benchmark('get_movies_by_id')
+def bench_movies_by_id(env: BenchEnvironment):
+    return lambda: env.repo.get_movies_by_id(env.page_ids)
+
+
+@benchmark('like')
+def bench_like(env: BenchEnvironment):
+    choice = home_services.get_movie_by_id([1], env.repo)
+    candidates = home_services.get_movie_by_id_similar(range(1000), env.repo)
+    return lambda: like(choice, candidates, 3)
+
+
+@benchmark('endpoint_movies')
+def bench_endpoint_movies(env: BenchEnvironment):
+    return lambda: _get_ok(env.client, '/m?id=1&g=' + env.genre)
+
+
+@benchmark('endpoint_movies_search')
+def bench_endpoint_movies_search(env: BenchEnvironment):
+    return lambda: _get_ok(env.client, '/m?id=1&g=all&s=' + env.search)
+
+
+@benchmark('endpoint_title_suggestions')
+def bench_endpoint_title_suggestions(env: BenchEnvironment):
+    return lambda: _get_ok(env.client, '/m/suggest?q=' + env.search[:3])
+
+
+@benchmark('endpoint_api_movies')
+def bench_endpoint_api_movies(env: BenchEnvironment):
+    # A batch of movies from the JSON API, assembled from cached per-field fragments.
+    ids = ','.join(str(movie_id) for movie_id in env.page_ids)
+    return lambda: _get_ok(env.client, '/api/v1/movies?fields=title,rating,genres&ids=' + ids)
+
+
+@benchmark('endpoint_review_form')
+def bench_endpoint_review_form(env: BenchEnvironment):
+    env.login()
+    return lambda: _get_ok(env.client, '/review?movie=1')
+
+
+@benchmark('endpoint_review_post')
+def bench_endpoint_review_post(env: BenchEnvironment):
+    env.login()
+    data = {'review': 'A fine benchmark film', 'rating': 8, 'movie_id': 1}
+    return lambda: _post_redirects(env.client, '/review', data)
+
+
+@benchmark('endpoint_login')
+def bench_endpoint_login(env: BenchEnvironment):
+    return env.login
+
+
+def _get_ok(client, url):
+    response = client.get(url)
+    if response.status_code != 200:
+        raise RuntimeError('GET %s returned %d' % (url, response.status_code))
+    return response
+
+
+def _post_redirects(client, url, data):
+    # A form that was accepted redirects; one that wasn't is shown again with a 200.
+    response = client.post(url, data=data)
+    if response.status_code != 302:
+        raise RuntimeError('POST %s returned %d' % (url, response.status_code))
+    return response
+
+
+def measure(operation, min_time: float = 0.2, repeats: int = 3):
+    # Returns the best per-operation time, in seconds, over several batches. Batch sizes grow until a batch takes
+    # at least min_time; an operation slower than min_time is timed once.
+    start = time.perf_counter()
+    operation()
+    elapsed = time.perf_counter() - start
+    if elapsed >= min_time:
+        return {'seconds': elapsed, 'iterations': 1}
+
+    iterations = max(1, int(min_time / max(elapsed, 1e-7)))
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            operation()
+        per_op = (time.perf_counter() - start) / iterations
+        best = per_op if best is None else min(best, per_op)
+    return {'seconds': best, 'iterations': iterations}
+
+
+def run(sizes, only=None, min_time: float = 0.2, log=sys.stderr):
+    results = dict()
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            generate(data_path, movies=size, users=BENCH_USERS, reviews=size)
+            # The application prints as it works; keep that out of the timings' output.
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                env = BenchEnvironment(data_path, size)
+                size_results = dict()
+                for name, setup in BENCHMARKS:
+                    if only and name not in only:
+                        continue
+                    size_results[name] = measure(setup(env), min_time)
+                    print('%9d %-32s %12.3f ms' % (size, name, size_results[name]['seconds'] * 1000), file=log)
+        results[str(size)] = size_results
+    return results
+
+
+def compare(baseline, results, threshold: float = DEFAULT_THRESHOLD):
+    # Returns (size, name, baseline seconds, new seconds) for every benchmark slower than the baseline by more than
+    # threshold, as a fraction of the baseline time.
+    regressions = list()
+    for size, size_results in results.items():
+        for name, result in size_results.items():
+            previous = baseline.get('results', {}).get(size, {}).get(name)
+            if previous is None:
+                continue
+            if result['seconds'] > previous['seconds'] * (1 + threshold):
+                regressions.append((size, name, previous['seconds'], result['seconds']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES, help='catalogue sizes to run at')
+    parser.add_argument('--only', nargs='+', help='names of the benchmarks to run')
+    parser.add_argument('--min-time', type=float, default=0.2, help='minimum seconds per timed batch')
+    parser.add_argument('--output', help='write results to this JSON baseline file')
+    parser.add_argument('--compare', help='JSON baseline to compare the results against')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help='allowed slowdown before a benchmark is flagged, as a fraction (0.25 = 25%%)')
+    args = parser.parse_args(argv)
+
+    results = run(args.sizes, args.only, args.min_time)
+    document = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': results
+    }
+
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            json.dump(document, outfile, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as infile:
+            baseline = json.load(infile)
+        regressions = compare(baseline, results, args.threshold)
+        for size, name, previous, current in regressions:
+            print('REGRESSION %9s %-32s %10.3f ms -> %10.3f ms (%+.0f%%)' % (
+                size, name, previous * 1000, current * 1000, (current / previous - 1) * 100))
+        if regressions:
+            return 1
+        print('No regressions beyond %.0f%%' % (args.threshold * 100))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
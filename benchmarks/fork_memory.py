@@ -0,0 +1,128 @@
+"""Memory shared between pre-forked workers, with and without freezing the app's objects from the cyclic GC.
+
+Builds the app once from a synthetic catalogue, forks workers as gunicorn.conf.py does, puts each worker under a
+period of load and reports how much of its resident memory is still shared with the master (Linux only):
+
+    $ python -m benchmarks.fork_memory --size 100000 --workers 4 --seconds 30
+"""
+import argparse
+import contextlib
+import gc
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from covid import create_app
+from covid.adapters.data_generator import generate
+
+
+VARIANTS = ('plain', 'frozen')
+
+# A mix of listing, search, API and movie page requests.
+URLS = [
+    '/m?g=Drama', '/m?g=all&sort=rating', '/m?g=all&s=galaxy', '/m/suggest?q=gal',
+    '/api/v1/movies?g=Comedy&sort=review_count', '/api/v1/movies?ids=1,2,3,4,5,6,7,8,9,10', '/api/v1/movies/1/reviews'
+]
+
+
+def memory_usage():
+    # Resident memory of this process, in kB, split into pages still shared with other processes and pages of its own.
+    fields = dict()
+    with open('/proc/self/smaps_rollup') as infile:
+        for line in infile:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1])
+    return {
+        'rss': fields['Rss'],
+        'shared': fields['Shared_Clean'] + fields['Shared_Dirty'],
+        'unique': fields['Private_Clean'] + fields['Private_Dirty'],
+        'pss': fields['Pss']
+    }
+
+
+def serve(app, seconds: float):
+    # Stands in for a worker serving requests for a while, collecting garbage as it goes.
+    client = app.test_client()
+    deadline = time.monotonic() + seconds
+    requests = 0
+    while time.monotonic() < deadline:
+        for url in URLS:
+            client.get(url)
+        requests += len(URLS)
+        gc.collect()
+    return requests
+
+
+def run_variant(variant: str, data_path: str, workers: int, seconds: float):
+    frozen = variant == 'frozen'
+    if frozen:
+        gc.disable()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path, 'WTF_CSRF_ENABLED': False})
+    master = memory_usage()
+
+    children = list()
+    for _ in range(workers):
+        if frozen:
+            gc.freeze()
+            gc.enable()
+        read_end, write_end = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_end)
+            requests = serve(app, seconds)
+            with os.fdopen(write_end, 'w') as outfile:
+                json.dump(dict(memory_usage(), requests=requests), outfile)
+            os._exit(0)
+        os.close(write_end)
+        children.append((pid, read_end))
+
+    results = list()
+    for pid, read_end in children:
+        with os.fdopen(read_end) as infile:
+            results.append(json.load(infile))
+        os.waitpid(pid, 0)
+    return {'master': master, 'workers': results}
+
+
+def report(variant: str, result, log=sys.stdout):
+    print('%s: master RSS %.1f MB' % (variant, result['master']['rss'] / 1024), file=log)
+    for number, worker in enumerate(result['workers'], 1):
+        print('  worker %d: RSS %7.1f MB, shared %7.1f MB, unique %7.1f MB (%d requests)' % (
+            number, worker['rss'] / 1024, worker['shared'] / 1024, worker['unique'] / 1024, worker['requests']),
+            file=log)
+    unique = sum(worker['unique'] for worker in result['workers']) / len(result['workers'])
+    print('  mean unique per worker: %.1f MB' % (unique / 1024), file=log)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=100000, help='number of movies in the catalogue')
+    parser.add_argument('--workers', type=int, default=4, help='number of workers to fork')
+    parser.add_argument('--seconds', type=float, default=30, help='seconds of load on each worker')
+    parser.add_argument('--variant', choices=VARIANTS, help='run only this variant, in this process')
+    parser.add_argument('--data-path', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.variant:
+        print(json.dumps(run_variant(args.variant, args.data_path, args.workers, args.seconds)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as data_path:
+        generate(data_path, movies=args.size, users=20, reviews=args.size)
+        # Each variant runs in a fresh interpreter, so neither inherits the other's heap.
+        for variant in VARIANTS:
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.fork_memory', '--variant', variant, '--data-path', data_path,
+                 '--workers', str(args.workers), '--seconds', str(args.seconds)],
+                check=True, stdout=subprocess.PIPE, universal_newlines=True).stdout
+            report(variant, json.loads(output.splitlines()[-1]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
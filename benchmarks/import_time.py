@@ -0,0 +1,82 @@
+"""Import time of a cold start: importing the app and calling create_app() in a fresh interpreter.
+
+    $ python -m benchmarks.import_time --top 20
+
+Reports the time spent importing modules, and the slowest modules, and exits with status 1 if the total is over the
+budget: IMPORT_TIME_BUDGET seconds (default 1.0), or --budget.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from covid.adapters.data_generator import generate
+
+
+DEFAULT_BUDGET = 1.0
+
+# Modules that are only needed by some requests, and should be imported on first use rather than by create_app().
+OPTIONAL_MODULES = ('fuzzywuzzy', 'wtforms', 'flask_wtf', 'password_validator', 'better_profanity', 'asyncio',
+                    'concurrent.futures.process')
+
+# Run in the fresh interpreter; prints the names of the modules loaded.
+_SNIPPET = '''
+import json, sys
+from covid import create_app
+create_app({'TESTING': True, 'TEST_DATA_PATH': sys.argv[1], 'WTF_CSRF_ENABLED': False})
+print(json.dumps(sorted(sys.modules)))
+'''
+
+
+def budget() -> float:
+    return float(os.environ.get('IMPORT_TIME_BUDGET', DEFAULT_BUDGET))
+
+
+def measure():
+    # Returns the seconds spent importing, each module imported -> (seconds importing the module itself, seconds
+    # including the modules it imported), and the names of all the modules loaded, once the app is created.
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with tempfile.TemporaryDirectory() as data_path:
+        # A catalogue small enough that loading it doesn't hold up the run.
+        generate(data_path, movies=10, users=1, reviews=10)
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', _SNIPPET, data_path], cwd=root, check=True,
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+    total = 0.0
+    modules = dict()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'imported package' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        own, cumulative = int(own) / 1e6, int(cumulative) / 1e6
+        # Nested imports are indented under the module importing them; only count the outermost.
+        if not name[1:].startswith(' '):
+            total += cumulative
+        modules[name.strip()] = (own, cumulative)
+    loaded = json.loads(result.stdout.splitlines()[-1])
+    return total, modules, loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=20, help='number of the slowest modules to list')
+    parser.add_argument('--budget', type=float, default=budget(), help='seconds allowed for importing')
+    args = parser.parse_args(argv)
+
+    total, modules, loaded = measure()
+    slowest = sorted(modules.items(), key=lambda item: item[1][0], reverse=True)[:args.top]
+    print('%-48s %10s %10s' % ('module', 'self ms', 'total ms'))
+    for name, (own, cumulative) in slowest:
+        print('%-48s %10.1f %10.1f' % (name, own * 1000, cumulative * 1000))
+    eager = [name for name in OPTIONAL_MODULES if name in loaded]
+    if eager:
+        print('Optional modules imported at start-up: ' + ', '.join(eager))
+    print('Imports took %.3f s of a %.3f s budget' % (total, args.budget))
+    return 1 if total > args.budget else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
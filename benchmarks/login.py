@@ -0,0 +1,72 @@
+"""Login throughput against the password hashing parameters.
+
+    $ python -m benchmarks.login --iterations 50000 150000 260000 600000 --clients 16 --seconds 3
+
+For each PBKDF2 iteration count, concurrent clients call authenticate_user() for a fixed time through a hashing pool of
+the given size. Reports successful logins per second, logins refused because the pool was saturated, and latency.
+"""
+import argparse
+import os
+import time
+from threading import Thread
+
+from covid.adapters.memory_repository import MemoryRepository
+from covid.authentication import hashing, services
+from covid.authentication.hashing import PasswordHasher
+from covid.domain.model import User
+
+
+USERNAME = 'benchuser'
+PASSWORD = 'Bench12345'
+
+
+def run(iterations: int, workers: int, queue_limit: int, clients: int, seconds: float):
+    hashing.hasher = PasswordHasher(workers=workers, queue_limit=queue_limit, method='pbkdf2:sha256:%d' % iterations)
+    repo = MemoryRepository()
+    repo.add_user(User(USERNAME, hashing.generate_password_hash(PASSWORD)))
+
+    results = [[0, 0, 0.0] for _ in range(clients)]
+    deadline = time.perf_counter() + seconds
+
+    def client(result):
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                services.authenticate_user(USERNAME, PASSWORD, repo)
+                result[0] += 1
+                result[2] += time.perf_counter() - start
+            except services.HashingOverloadedException:
+                result[1] += 1
+                # A refused client backs off briefly before retrying, as a browser user would.
+                time.sleep(0.01)
+
+    threads = [Thread(target=client, args=(result,)) for result in results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    hashing.hasher.shutdown()
+
+    logins = sum(result[0] for result in results)
+    refused = sum(result[1] for result in results)
+    latency = sum(result[2] for result in results) / logins if logins else 0.0
+    return logins / seconds, refused, latency
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, nargs='+', default=[50000, 150000, 260000, 600000])
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='size of the hashing pool')
+    parser.add_argument('--queue-limit', type=int, default=64)
+    parser.add_argument('--clients', type=int, default=16, help='number of concurrent clients')
+    parser.add_argument('--seconds', type=float, default=3.0, help='duration of each run')
+    args = parser.parse_args(argv)
+
+    print('%10s %8s %12s %10s %14s' % ('iterations', 'workers', 'logins/s', 'refused', 'latency (ms)'))
+    for iterations in args.iterations:
+        rate, refused, latency = run(iterations, args.workers, args.queue_limit, args.clients, args.seconds)
+        print('%10d %8d %12.1f %10d %14.1f' % (iterations, args.workers, rate, refused, latency * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+"""Throughput of the review profanity check, in MB/s of review text.
+
+    $ python -m benchmarks.profanity --megabytes 5
+
+Compares the compiled ProfanityFilter with better_profanity on the same clean text, the worst case for both since
+the whole text has to be scanned.
+"""
+import argparse
+import random
+import time
+
+from covid.adapters.data_generator import COMMON_WORDS, REVIEW_PHRASES
+from covid.utilities.profanity import ProfanityFilter, default_wordlist_path
+
+
+def review_text(size: int, seed: int = 235):
+    rnd = random.Random(seed)
+    words = COMMON_WORDS + ' '.join(REVIEW_PHRASES).split()
+    parts, length = list(), 0
+    while length < size:
+        word = rnd.choice(words)
+        parts.append(word)
+        length += len(word) + 1
+    return ' '.join(parts)[:size]
+
+
+def throughput(check, text: str):
+    start = time.perf_counter()
+    check(text)
+    return len(text) / (time.perf_counter() - start) / 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--megabytes', type=float, default=5, help='size of the text scanned by ProfanityFilter')
+    parser.add_argument('--baseline-kilobytes', type=float, default=20,
+                        help='size of the text scanned by better_profanity, which is much slower')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    profanity_filter = ProfanityFilter.from_file(default_wordlist_path())
+    print('ProfanityFilter compile:      %8.1f ms' % ((time.perf_counter() - start) * 1000))
+    print('ProfanityFilter throughput:   %8.2f MB/s' % throughput(
+        profanity_filter.contains_profanity, review_text(int(args.megabytes * 1e6))))
+
+    start = time.perf_counter()
+    from better_profanity import profanity
+    profanity.contains_profanity('warm up')
+    print('better_profanity first check: %8.1f ms' % ((time.perf_counter() - start) * 1000))
+    print('better_profanity throughput:  %8.4f MB/s' % throughput(
+        profanity.contains_profanity, review_text(int(args.baseline_kilobytes * 1e3))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Latency of typo-tolerant title search, per misspelt query.
+
+    $ python -m benchmarks.spelling --titles 100000
+
+Compares the SpellingIndex deletion lookup with the fuzz.partial_ratio scan of every title that searches used to fall
+back to. Queries are title words with one or two random edits.
+"""
+import argparse
+import random
+import time
+from datetime import date
+
+from covid.adapters.data_generator import generate_movie_rows
+from covid.adapters.search_index import tokenise
+from covid.adapters.spelling_index import SpellingIndex
+from covid.domain.model import Movie
+
+
+def misspell(word: str, rnd: random.Random):
+    for _ in range(rnd.randint(1, 2)):
+        i = rnd.randrange(len(word))
+        edit = rnd.choice(('delete', 'insert', 'replace', 'transpose'))
+        if edit == 'delete' and len(word) > 3:
+            word = word[:i] + word[i + 1:]
+        elif edit == 'insert':
+            word = word[:i] + rnd.choice('aeiourstn') + word[i:]
+        elif edit == 'transpose' and i + 1 < len(word):
+            word = word[:i] + word[i + 1] + word[i] + word[i + 2:]
+        else:
+            word = word[:i] + rnd.choice('aeiourstn') + word[i + 1:]
+    return word
+
+
+def per_query(search, queries):
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    return (time.perf_counter() - start) / len(queries) * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--titles', type=int, default=100000, help='number of synthetic titles')
+    parser.add_argument('--queries', type=int, default=200, help='number of misspelt queries')
+    parser.add_argument('--baseline-queries', type=int, default=3,
+                        help='number of queries run through the fuzzy scan, which is much slower')
+    args = parser.parse_args(argv)
+
+    rnd = random.Random(235)
+    titles = [row[1] for row in generate_movie_rows(args.titles, rnd)]
+    words = [word for word in {word for title in titles for word in tokenise(title)} if len(word) > 4]
+    queries = [misspell(rnd.choice(words), rnd) for _ in range(args.queries)]
+
+    start = time.perf_counter()
+    index = SpellingIndex()
+    for movie_id, title in enumerate(titles, 1):
+        index.add_movie(Movie(date(2020, 1, 1), title, '', '', '', '7.0', '', movie_id, 100, '', []))
+    print('SpellingIndex build:   %10.1f ms (%d words)' % ((time.perf_counter() - start) * 1000, len(index)))
+    print('SpellingIndex lookup:  %10.3f ms/query' % per_query(index.lookup, queries))
+    print('SpellingIndex correct: %10.3f ms/query' % per_query(index.correct, queries))
+
+    from fuzzywuzzy import fuzz
+    print('partial_ratio scan:    %10.3f ms/query' % per_query(
+        lambda query: [title for title in titles if fuzz.partial_ratio(query, title) > 70],
+        queries[:args.baseline_queries]))
+
+
+if __name__ == '__main__':
+    main()
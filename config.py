@@ -15,3 +15,54 @@ class Config:
 
     SECRET_KEY = environ.get('SECRET_KEY')
 
+    # Maximum number of rendered HTML fragments (movie cards, review lists, navigation) kept in memory.
+    FRAGMENT_CACHE_SIZE = int(environ.get('FRAGMENT_CACHE_SIZE', 10000))
+
+    # Record per-endpoint, repository and template latency histograms, served in Prometheus format on /metrics to
+    # requests bearing METRICS_TOKEN or, if it isn't set, to requests from this host only.
+    METRICS_ENABLED = environ.get('METRICS_ENABLED', 'False') == 'True'
+    METRICS_TOKEN = environ.get('METRICS_TOKEN', '')
+
+    # Sampling profiler. When disabled no profiling hooks are installed. When enabled, every PROFILE_EVERY_N-th request
+    # (0 for none), requests to the comma-separated PROFILE_ENDPOINTS, and requests from the comma-separated
+    # PROFILER_ADMINS usernames carrying the PROFILE_QUERY_PARAMETER are sampled every PROFILER_INTERVAL seconds.
+    PROFILER_ENABLED = environ.get('PROFILER_ENABLED', 'False') == 'True'
+    PROFILE_EVERY_N = int(environ.get('PROFILE_EVERY_N', 0))
+    PROFILE_ENDPOINTS = environ.get('PROFILE_ENDPOINTS', '')
+    PROFILE_QUERY_PARAMETER = environ.get('PROFILE_QUERY_PARAMETER', '_profile')
+    PROFILER_ADMINS = environ.get('PROFILER_ADMINS', '')
+    PROFILER_INTERVAL = float(environ.get('PROFILER_INTERVAL', 0.005))
+
+    # Word list used to reject reviews containing profanity, one word or phrase per line. Defaults to the list shipped
+    # with better_profanity.
+    PROFANITY_WORDLIST = environ.get('PROFANITY_WORDLIST')
+
+    # Password hashing. Hashes are computed by PASSWORD_HASH_WORKERS threads (defaults to the number of CPUs), with up
+    # to PASSWORD_HASH_QUEUE_LIMIT more requests waiting; beyond that, logins and registrations are refused with a 503.
+    # PASSWORD_HASH_METHOD is a werkzeug method string, e.g. 'pbkdf2:sha256:600000' to set the number of iterations.
+    PASSWORD_HASH_WORKERS = int(environ.get('PASSWORD_HASH_WORKERS', 0)) or None
+    PASSWORD_HASH_QUEUE_LIMIT = int(environ.get('PASSWORD_HASH_QUEUE_LIMIT', 64))
+    PASSWORD_HASH_METHOD = environ.get('PASSWORD_HASH_METHOD', 'pbkdf2:sha256:260000')
+    PASSWORD_SALT_LENGTH = int(environ.get('PASSWORD_SALT_LENGTH', 16))
+
+    # Seconds between checks of Data1000Movies.csv for changes, which are applied to the running catalogue; 0 disables
+    # reloading.
+    CATALOGUE_RELOAD_INTERVAL = float(environ.get('CATALOGUE_RELOAD_INTERVAL', 0))
+
+    # Number of processes parsing the movie and review files at startup; 0 or 1 parses them in the app's own process.
+    PARALLEL_LOAD_WORKERS = int(environ.get('PARALLEL_LOAD_WORKERS', 0))
+
+    # Build the search, spelling, title and people indexes on a background thread after start-up, answering searches
+    # with slower scans until they are ready. READINESS_INDEXES lists the indexes /healthz/ready waits for (default
+    # all of them), e.g. 'search,titles'.
+    BACKGROUND_INDEX_BUILD = environ.get('BACKGROUND_INDEX_BUILD', 'False') == 'True'
+    READINESS_INDEXES = environ.get('READINESS_INDEXES', '')
+
+    # Maximum number of movie ids, summed over all cached results, kept by the search and genre query cache.
+    QUERY_CACHE_SIZE = int(environ.get('QUERY_CACHE_SIZE', 1000000))
+
+    # Maximum number of movies returned by a ranked search.
+    SEARCH_RESULTS_LIMIT = int(environ.get('SEARCH_RESULTS_LIMIT', 1000))
+
+    # Comma-separated usernames allowed to download whole datasets from /export.
+    EXPORT_ADMINS = environ.get('EXPORT_ADMINS', '')
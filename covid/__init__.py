@@ -5,7 +5,10 @@ import os
 from flask import Flask
 
 import covid.adapters.repository as repo
+import covid.authentication.hashing as hashing
 from covid.adapters.memory_repository import MemoryRepository, populate
+import covid.utilities.fragment_cache as fragment_cache
+import covid.utilities.profanity as profanity
 
 
 def create_app(test_config=None):
@@ -23,9 +26,49 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    # Hash passwords on a bounded pool of threads, with the configured hashing cost.
+    hashing.init_app(app)
+
+    if app.config.get('REPOSITORY') is not None:
+        # Tests can pass in a repository already loaded, typically a fork of one shared across tests.
+        repo.repo_instance = app.config['REPOSITORY']
+    else:
+        # Create the MemoryRepository implementation for a memory-based repository.
+        repo.repo_instance = MemoryRepository(
+            query_cache_size=app.config['QUERY_CACHE_SIZE'],
+            search_limit=app.config['SEARCH_RESULTS_LIMIT'],
+            defer_indexes=app.config['BACKGROUND_INDEX_BUILD']
+        )
+        populate(data_path, repo.repo_instance, workers=app.config['PARALLEL_LOAD_WORKERS'])
+        if app.config['BACKGROUND_INDEX_BUILD']:
+            # Serve requests while the text indexes are built; /healthz/ready reports when they are done.
+            repo.repo_instance.build_indexes()
+            # Fail at start-up, not on every readiness check, if READINESS_INDEXES names an index that isn't built.
+            from .health import services as health_services
+            health_services.check_required_indexes(
+                repo.repo_instance, health_services.get_required_indexes(app.config['READINESS_INDEXES']))
+
+    if app.config['CATALOGUE_RELOAD_INTERVAL'] > 0:
+        # Watch the catalogue file, and publish its changes as a new snapshot of the repository without a restart.
+        from .adapters import catalogue_reloader
+        repo.repo_instance = catalogue_reloader.init_app(app, data_path, repo.repo_instance)
+
+    if app.config['METRICS_ENABLED']:
+        # Time requests, repository calls and template rendering, and serve the timings on /metrics.
+        from .metrics import metrics
+        repo.repo_instance = metrics.instrument_repository(repo.repo_instance)
+        metrics.init_app(app)
+
+    if app.config['PROFILER_ENABLED']:
+        # Sample the stacks of selected requests, served as collapsed stacks on /metrics/profile.
+        from .metrics import profiler
+        profiler.init_app(app)
+
+    # Cache for rendered HTML fragments, shared by views and templates.
+    fragment_cache.init_app(app)
+
+    # Compile the profanity word list used to validate reviews.
+    profanity.init_app(app)
 
     # Build the application - these steps require an application context.
     with app.app_context():
@@ -39,7 +82,19 @@ def create_app(test_config=None):
         from .authentication import authentication
         app.register_blueprint(authentication.authentication_blueprint)
 
+        from .people import people
+        app.register_blueprint(people.people_blueprint)
+
         from .utilities import utilities
         app.register_blueprint(utilities.utilities_blueprint)
 
+        from .api import api
+        app.register_blueprint(api.api_blueprint)
+
+        from .export import export
+        app.register_blueprint(export.export_blueprint)
+
+        from .health import health
+        app.register_blueprint(health.health_blueprint)
+
     return app
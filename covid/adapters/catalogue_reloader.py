@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import os
+from threading import Event, Thread
+
+from flask import has_request_context, request
+
+from covid.adapters.data_generator import MOVIES_FILE
+from covid.adapters.memory_repository import MemoryRepository, read_csv_file, movie_from_row, genre_names_from_row
+from covid.domain.model import Genre, Review
+from covid.utilities.rwlock import ReadWriteLock
+
+
+logger = logging.getLogger(__name__)
+
+
+def row_hash(data_row) -> bytes:
+    return hashlib.blake2b('\x1f'.join(data_row).encode('utf-8'), digest_size=16).digest()
+
+
+def read_row_hashes(path: str):
+    # movie id -> (hash, row) for each row of a catalogue file.
+    return {int(data_row[0]): (row_hash(data_row), data_row) for data_row in read_csv_file(path)}
+
+
+class CatalogueReloader:
+    # Applies changes to the catalogue file to a repository that was populated from it, without reloading the rest.
+    #
+    # The file is diffed against the hashes of the rows last loaded, by movie id: only added, changed and removed rows
+    # touch the repository and its indexes. The changes are applied to a fork of the current repository (see
+    # OverlayRepository), which shares everything the changes don't touch, and the fork is published by assigning it
+    # to repository. Readers never wait: each request is served from the repository that was current when it started,
+    # so it sees either the old catalogue or the new one, never a mixture. If applying the changes fails, the fork is
+    # dropped and the current repository is left as it was.
+    #
+    # Requests that may change the repository hold lock for reading from start to finish, and a reload holds it for
+    # writing while it forks, applies and publishes, so no change is made to a repository that is about to be replaced.
+    # Requests that only read never take the lock.
+
+    def __init__(self, data_path: str, repository: MemoryRepository, lock: ReadWriteLock = None):
+        self._path = os.path.join(data_path, MOVIES_FILE)
+        self.repository = repository
+        self.lock = lock or ReadWriteLock()
+        self._stamp = self._file_stamp()
+        self._hashes = {movie_id: digest for movie_id, (digest, _) in read_row_hashes(self._path).items()}
+        self._stop = Event()
+        self._thread = None
+        self._interval = None
+
+    def reload(self):
+        # Applies the file's changes since the last reload, and returns the number of movies added, updated and removed.
+        stamp = self._file_stamp()
+        rows = read_row_hashes(self._path)
+
+        removed = [movie_id for movie_id in self._hashes if movie_id not in rows]
+        changed = [(movie_id, data_row) for movie_id, (digest, data_row) in rows.items()
+                   if self._hashes.get(movie_id) != digest]
+        # Parse the changed rows before taking the lock, so writers are held up for as short a time as possible.
+        movies = [(movie_from_row(data_row), genre_names_from_row(data_row)) for movie_id, data_row in changed]
+
+        counts = {'added': 0, 'updated': 0, 'removed': len(removed)}
+        if removed or movies:
+            with self.lock.write():
+                staged = self.repository.fork()
+                counts['updated'] = self._apply(staged, removed, movies)
+                counts['added'] = len(movies) - counts['updated']
+                self.repository = staged
+        self._hashes = {movie_id: digest for movie_id, (digest, _) in rows.items()}
+        self._stamp = stamp
+
+        if any(counts.values()):
+            logger.info('Reloaded %s: %d added, %d updated, %d removed', self._path, counts['added'],
+                        counts['updated'], counts['removed'])
+        return counts
+
+    def _apply(self, repository: MemoryRepository, removed, movies) -> int:
+        # Applies the changes to repository, and returns the number of movies updated.
+        updated = 0
+        genres = {genre.genre_name: genre for genre in repository.get_genres()}
+        for movie_id in removed:
+            repository.remove_movie(repository.get_movies_by_id([movie_id])[0])
+
+        for movie, genre_names in movies:
+            previous = repository.get_movies_by_id([movie.id])
+            reviews = list()
+            if previous:
+                updated += 1
+                reviews = list(previous[0].reviews)
+                repository.remove_movie(previous[0])
+
+            repository.add_movie(movie)
+            for genre_name in genre_names:
+                genre = genres.get(genre_name)
+                if genre is None:
+                    genre = genres[genre_name] = Genre(genre_name)
+                    repository.add_genre(genre)
+                repository.add_genre_association(movie, genre)
+            # An updated movie keeps its reviews, made anew for the new movie and replacing the old ones in the users'.
+            for previous_review in reviews:
+                user = repository.get_user(previous_review.user.username)
+                review = Review(user, movie, previous_review.review, previous_review.rating,
+                                previous_review.timestamp)
+                user.replace_review(previous_review, review)
+                movie.add_review(review)
+                repository.add_review(review)
+        return updated
+
+    def reload_if_changed(self):
+        if self._file_stamp() != self._stamp:
+            return self.reload()
+        return None
+
+    def start(self, interval: float):
+        # Checks the file for changes every interval seconds, on a daemon thread.
+        self._interval = interval
+
+        def watch():
+            while not self._stop.wait(interval):
+                try:
+                    self.reload_if_changed()
+                except Exception:
+                    logger.exception('Reloading %s failed', self._path)
+
+        self._thread = Thread(target=watch, name='catalogue-reloader', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def restart_after_fork(self):
+        # The watching thread doesn't survive a fork, and it may have held the lock at the time: give the child a fresh
+        # lock and its own thread.
+        self.lock = ReadWriteLock()
+        self._stop = Event()
+        if self._interval is not None:
+            self.start(self._interval)
+
+    def _file_stamp(self):
+        try:
+            stat = os.stat(self._path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+
+class SnapshotRepository:
+    # Stands in for the repository while reloading is enabled: forwards to the repository the current request started
+    # with, or outside a request to the current one.
+
+    def __init__(self, reloader: CatalogueReloader):
+        self._reloader = reloader
+
+    def __getattr__(self, name):
+        attribute = getattr(self._snapshot(), name)
+        if not callable(attribute):
+            return attribute
+
+        # Methods are looked up on each call, so they can be held on to, as the metrics' timing wrappers are.
+        def forward(*args, **kwargs):
+            return getattr(self._snapshot(), name)(*args, **kwargs)
+        return forward
+
+    def _snapshot(self):
+        if has_request_context():
+            snapshot = request.environ.get(_SNAPSHOT)
+            if snapshot is not None:
+                return snapshot
+        return self._reloader.repository
+
+
+reloader = None
+
+_SNAPSHOT = 'covid.catalogue_snapshot'
+_WRITING = 'covid.catalogue_writing'
+
+# Requests that only read the repository, and are served without taking the lock.
+_SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+def init_app(app, data_path: str, repository: MemoryRepository) -> SnapshotRepository:
+    # Only called when reloading is enabled, so that an app that never reloads doesn't track snapshots. Returns the
+    # repository the app should use in place of repository.
+    global reloader
+    reloader = CatalogueReloader(data_path, repository)
+    app.before_request(_begin_request)
+    app.teardown_request(_end_request)
+    reloader.start(app.config['CATALOGUE_RELOAD_INTERVAL'])
+    return SnapshotRepository(reloader)
+
+
+def _after_fork_in_child():
+    if reloader is not None:
+        reloader.restart_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _begin_request():
+    if request.method not in _SAFE_METHODS:
+        reloader.lock.acquire_read()
+        request.environ[_WRITING] = True
+    request.environ[_SNAPSHOT] = reloader.repository
+
+
+def _end_request(exception=None):
+    request.environ.pop(_SNAPSHOT, None)
+    if request.environ.pop(_WRITING, False):
+        reloader.lock.release_read()
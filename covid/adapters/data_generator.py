@@ -0,0 +1,206 @@
+"""Seeded generator of synthetic catalogues, users and reviews for scale testing.
+
+Writes Data1000Movies.csv, users.csv and comments.csv in the schemas read by memory_repository.populate():
+
+    $ python -m covid.adapters.data_generator /tmp/catalogue --movies 100000 --users 200 --reviews 10000000
+
+Rows are written as they are generated, so memory use depends on the number of movies and users, not on the number of
+reviews. The same seed always produces the same files.
+"""
+import argparse
+import csv
+import os
+import random
+from array import array
+from bisect import bisect
+from datetime import date, datetime, timedelta
+from itertools import accumulate
+
+
+MOVIES_FILE = 'Data1000Movies.csv'
+USERS_FILE = 'users.csv'
+REVIEWS_FILE = 'comments.csv'
+
+MOVIE_HEADER = ['Rank', 'Title', 'Genre', 'Description', 'Director', 'Actors', 'Year', 'Runtime (Minutes)', 'Rating',
+                'Votes', 'Revenue (Millions)', 'Metascore', 'release_date', 'backdrop_path', 'poster_path']
+USER_HEADER = ['id', 'username', 'password']
+REVIEW_HEADER = ['id', 'author-id', 'movie-id', 'review-text', 'timestamp', 'rating']
+
+# Share of movies carrying each genre in the bundled Data1000Movies.csv, used as sampling weights.
+GENRE_WEIGHTS = {
+    'Drama': 513, 'Action': 303, 'Comedy': 279, 'Adventure': 259, 'Thriller': 195, 'Crime': 150, 'Romance': 141,
+    'Sci-Fi': 120, 'Horror': 119, 'Mystery': 106, 'Fantasy': 101, 'Biography': 81, 'Family': 51, 'Animation': 49,
+    'History': 29, 'Sport': 18, 'Music': 16, 'War': 13, 'Western': 7, 'Musical': 5
+}
+# Weights for the number of genres per movie, 1 to 3.
+GENRE_COUNT_WEIGHTS = [20, 35, 45]
+
+COMMON_WORDS = [
+    'the', 'of', 'a', 'man', 'night', 'love', 'last', 'day', 'house', 'dark', 'city', 'girl', 'story', 'life', 'war',
+    'world', 'king', 'time', 'star', 'dead', 'black', 'blood', 'road', 'home', 'lost', 'secret', 'game', 'dream',
+    'fire', 'river', 'shadow', 'queen', 'ghost', 'iron', 'wild', 'summer', 'winter', 'empire', 'golden', 'broken',
+    'silent', 'storm', 'galaxy', 'return', 'rise', 'fall', 'hunter', 'legend', 'island', 'mountain', 'ocean', 'heart',
+    'moon', 'sun', 'kingdom', 'machine', 'angel', 'devil', 'father', 'mother', 'brother', 'sister', 'children'
+]
+SYLLABLES = ['ka', 'ro', 'mi', 'zen', 'tor', 'vel', 'an', 'dra', 'qui', 'lo', 'sha', 'bel', 'nor', 'thu', 'ix', 'gar']
+FIRST_NAMES = [
+    'James', 'Emma', 'Chris', 'Zoe', 'Ridley', 'Noomi', 'Michael', 'Charlize', 'Bradley', 'Vin', 'Anna', 'Tom',
+    'Scarlett', 'Ryan', 'Natalie', 'Denzel', 'Meryl', 'Leonardo', 'Cate', 'Idris', 'Viola', 'Hugh', 'Jessica', 'Matt'
+]
+LAST_NAMES = [
+    'Gunn', 'Scott', 'Pratt', 'Diesel', 'Cooper', 'Saldana', 'Rapace', 'Fassbender', 'Theron', 'Nolan', 'Hardy',
+    'Johansson', 'Gosling', 'Portman', 'Washington', 'Streep', 'Blanchett', 'Elba', 'Davis', 'Jackman', 'Chastain',
+    'Damon', 'Villeneuve', 'Bigelow', 'Fincher', 'Gerwig', 'Peele', 'Wright', 'Lee', 'Park', 'Kim', 'Singh'
+]
+REVIEW_PHRASES = [
+    'good film', 'yea not bad', 'not the best', 'loved every minute', 'too long', 'great cast', 'weak ending',
+    'would watch again', 'the soundtrack was amazing', 'a bit slow in the middle', 'instant classic', 'fell asleep'
+]
+
+
+def zipf_cumulative_weights(n: int, exponent: float):
+    # Cumulative weights of ranks 1..n under a Zipf distribution, for sampling with bisect.
+    return array('d', accumulate(1.0 / (rank ** exponent) for rank in range(1, n + 1)))
+
+
+def zipf_sampler(rnd: random.Random, n: int, exponent: float):
+    # Returns a function drawing a 0-based index in [0, n) where index k has probability proportional to
+    # 1 / (k + 1) ** exponent.
+    cumulative = zipf_cumulative_weights(n, exponent)
+    total = cumulative[-1]
+    last = n - 1
+    return lambda: min(bisect(cumulative, rnd.random() * total), last)
+
+
+def generate_movie_rows(movies: int, rnd: random.Random):
+    genres = list(GENRE_WEIGHTS)
+    genre_weights = list(GENRE_WEIGHTS.values())
+
+    # Title words follow a Zipf distribution over a vocabulary whose tail is made of invented words, so most titles
+    # share a few common words and many contain a word that occurs in only a handful of titles.
+    rare_words = [
+        ''.join(rnd.choice(SYLLABLES) for _ in range(rnd.randint(2, 4)))
+        for _ in range(max(100, movies // 4))
+    ]
+    vocabulary = COMMON_WORDS + rare_words
+    next_word = zipf_sampler(rnd, len(vocabulary), 1.0)
+
+    # A few directors and actors appear in many movies.
+    people = ['%s %s' % (first, last) for first in FIRST_NAMES for last in LAST_NAMES]
+    rnd.shuffle(people)
+    next_person = zipf_sampler(rnd, len(people), 0.9)
+
+    first_date = date(2006, 1, 1)
+    for movie_id in range(1, movies + 1):
+        # Title lengths have a long tail: mostly one to three words, occasionally many more.
+        length = min(1 + int(rnd.expovariate(0.7)), 12)
+        title = ' '.join(vocabulary[next_word()] for _ in range(length)).title()
+        if rnd.random() < 0.05:
+            title += ' %d' % rnd.randint(2, 4)
+        elif rnd.random() < 0.08:
+            title += ': ' + ' '.join(vocabulary[next_word()] for _ in range(rnd.randint(1, 4))).title()
+
+        movie_genres = list()
+        for _ in range(rnd.choices((1, 2, 3), GENRE_COUNT_WEIGHTS)[0]):
+            genre = rnd.choices(genres, genre_weights)[0]
+            if genre not in movie_genres:
+                movie_genres.append(genre)
+        movie_genres.sort()
+
+        description = ' '.join(vocabulary[next_word()] for _ in range(rnd.randint(15, 35))).capitalize() + '.'
+        actors = list()
+        while len(actors) < 4:
+            actor = people[next_person()]
+            if actor not in actors:
+                actors.append(actor)
+
+        release_date = first_date + timedelta(days=rnd.randint(0, 11 * 365))
+        rating = min(10.0, max(1.0, rnd.gauss(6.7, 0.95)))
+        revenue = rnd.lognormvariate(3.2, 1.6) if rnd.random() > 0.13 else None
+        metascore = min(100, max(11, int(rnd.gauss(59, 17)))) if rnd.random() > 0.06 else None
+
+        yield [
+            movie_id,
+            title,
+            ','.join(movie_genres),
+            description,
+            people[next_person()],
+            ', '.join(actors),
+            release_date.year,
+            min(191, max(66, int(rnd.gauss(113, 19)))),
+            '%g' % round(rating, 1),
+            int(rnd.lognormvariate(11.3, 1.3)),
+            '' if revenue is None else '%.2f' % revenue,
+            '' if metascore is None else metascore,
+            release_date.isoformat(),
+            '/backdrop%d.jpg' % movie_id,
+            '/poster%d.jpg' % movie_id
+        ]
+
+
+def user_credentials(user_id: int):
+    # Synthetic users are named user<id> and have password Password<id>, which satisfies the registration rules.
+    return 'user%d' % user_id, 'Password%d' % user_id
+
+
+def generate_user_rows(users: int):
+    for user_id in range(1, users + 1):
+        username, password = user_credentials(user_id)
+        yield [user_id, username, password]
+
+
+def generate_review_rows(movies: int, users: int, reviews: int, rnd: random.Random, exponent: float = 1.07):
+    # Review counts per movie follow a Zipf distribution over a random popularity order of the movies, and a few users
+    # write most of the reviews.
+    popularity = array('l', range(1, movies + 1))
+    rnd.shuffle(popularity)
+    next_movie = zipf_sampler(rnd, movies, exponent)
+    next_user = zipf_sampler(rnd, users, 0.8)
+
+    timestamp = datetime(2020, 1, 1)
+    for review_id in range(1, reviews + 1):
+        timestamp += timedelta(seconds=rnd.randint(1, 600))
+        yield [
+            review_id,
+            next_user() + 1,
+            popularity[next_movie()],
+            rnd.choice(REVIEW_PHRASES),
+            timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            ' %d' % min(10, max(1, int(rnd.gauss(7, 2))))
+        ]
+
+
+def write_csv(filename: str, header, rows):
+    with open(filename, 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def generate(data_path: str, movies: int = 1000, users: int = 50, reviews: int = 10000, seed: int = 235):
+    if movies < 1 or users < 1:
+        raise ValueError('At least one movie and one user are required')
+    os.makedirs(data_path, exist_ok=True)
+
+    # Each file has its own random stream, so changing one count doesn't change the contents of the other files.
+    write_csv(os.path.join(data_path, MOVIES_FILE), MOVIE_HEADER,
+              generate_movie_rows(movies, random.Random('%d-movies' % seed)))
+    write_csv(os.path.join(data_path, USERS_FILE), USER_HEADER, generate_user_rows(users))
+    write_csv(os.path.join(data_path, REVIEWS_FILE), REVIEW_HEADER,
+              generate_review_rows(movies, users, reviews, random.Random('%d-reviews' % seed)))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate a synthetic catalogue in the format read by populate().')
+    parser.add_argument('data_path', help='directory to write the CSV files to')
+    parser.add_argument('--movies', type=int, default=1000)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--reviews', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=235)
+    args = parser.parse_args(argv)
+
+    generate(args.data_path, args.movies, args.users, args.reviews, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,281 @@
+import copy
+
+from covid.adapters.indexes import MovieIndex, CopyOnWriteDict
+
+
+# Runtime bands, as (name, shortest runtime, longest runtime) in minutes; None is unbounded.
+RUNTIME_BANDS = (('short', None, 89), ('medium', 90, 120), ('long', 121, None))
+
+# Minimum ratings offered as facets.
+RATING_THRESHOLDS = (5, 6, 7, 8, 9)
+
+# Ordinals left free by removed movies are compacted away once there are more of them than this, and than movies.
+_MAX_FREE_ORDINALS = 1024
+
+
+if hasattr(int, 'bit_count'):
+    popcount = int.bit_count
+else:
+    def popcount(bits: int) -> int:
+        return bin(bits).count('1')
+
+
+def rating_of(movie):
+    try:
+        return float(movie.rating)
+    except (TypeError, ValueError):
+        return None
+
+
+def runtime_band(runtime):
+    if runtime is None:
+        return None
+    for name, shortest, longest in RUNTIME_BANDS:
+        if (shortest is None or runtime >= shortest) and (longest is None or runtime <= longest):
+            return name
+    return None
+
+
+class MovieFilter:
+    # Facets to filter movies by. genres are combined with AND if match_all_genres, otherwise with OR; years and ratings
+    # are inclusive bounds; runtime is the name of one of RUNTIME_BANDS. None, or no genres, means no restriction.
+
+    def __init__(self, genres=(), match_all_genres: bool = False, year_from: int = None, year_to: int = None,
+                 min_rating: float = None, runtime: str = None):
+        self.genres = tuple(genres)
+        self.match_all_genres = match_all_genres
+        self.year_from = year_from
+        self.year_to = year_to
+        self.min_rating = min_rating
+        self.runtime = runtime
+
+    def __repr__(self):
+        return '<MovieFilter genres={} match_all_genres={} years={}-{} min_rating={} runtime={}>'.format(
+            self.genres, self.match_all_genres, self.year_from, self.year_to, self.min_rating, self.runtime)
+
+    def __eq__(self, other):
+        return isinstance(other, MovieFilter) and self._key() == other._key()
+
+    def __hash__(self):
+        return hash(self._key())
+
+    def _key(self):
+        return self.genres, self.match_all_genres, self.year_from, self.year_to, self.min_rating, self.runtime
+
+
+class FacetIndex(MovieIndex):
+    # Facets kept as bitsets over dense movie ordinals: bit n of a bitset is set if the movie with ordinal n has the
+    # facet value. Python ints serve as bitsets, so filters combine with & and | a machine word at a time, and counts
+    # are popcounts; no Movie is looked at to answer a query.
+    #
+    # Genres and runtime bands have a bitset per value. Years have a bitset per year, and ratings a bitset per tenth of
+    # a point, so a range is the | of the buckets in it.
+    #
+    # A removed movie's ordinal is kept for it, so a movie that is removed and added again, as a reload updates it,
+    # keeps its place. Ordinals of movies that don't come back are compacted away once they outnumber the movies, so
+    # the bitsets don't grow with each change to the catalogue.
+
+    def __init__(self):
+        # movie id -> ordinal, and ordinal -> movie id (None once the movie is removed)
+        self._ordinals = dict()
+        self._movie_ids = list()
+        # movie id -> ordinal, of removed movies
+        self._free = dict()
+        self._all = 0
+        self._genres = dict()
+        self._years = dict()
+        self._ratings = dict()
+        self._runtimes = dict()
+        self._facets = {'genres': self._genres, 'years': self._years, 'ratings': self._ratings,
+                        'runtimes': self._runtimes}
+        # movie id -> (facet, value) pairs the movie has, for removing the movie
+        self._memberships = CopyOnWriteDict()
+
+    def __len__(self):
+        return len(self._ordinals)
+
+    def add_movie(self, movie):
+        if movie.id in self._ordinals:
+            self.remove_movie(movie)
+
+        ordinal = self._free.pop(movie.id, None)
+        if ordinal is None:
+            if len(self._free) > max(len(self._ordinals), _MAX_FREE_ORDINALS):
+                self._compact()
+            ordinal = len(self._movie_ids)
+            self._movie_ids.append(movie.id)
+        else:
+            self._movie_ids[ordinal] = movie.id
+        self._ordinals[movie.id] = ordinal
+        self._all |= 1 << ordinal
+        self._memberships.writable(movie.id, set)
+
+        self._set(movie.id, 'years', movie.date.year if movie.date else None)
+        rating = rating_of(movie)
+        self._set(movie.id, 'ratings', None if rating is None else int(round(rating * 10)))
+        self._set(movie.id, 'runtimes', runtime_band(movie.runtime))
+        for genre in movie.genres:
+            self._set(movie.id, 'genres', genre.genre_name)
+
+    def add_genre_association(self, movie, genre):
+        if movie.id in self._ordinals:
+            self._set(movie.id, 'genres', genre.genre_name)
+
+    def remove_movie(self, movie):
+        ordinal = self._ordinals.pop(movie.id, None)
+        if ordinal is None:
+            return
+        bit = 1 << ordinal
+        self._movie_ids[ordinal] = None
+        self._free[movie.id] = ordinal
+        self._all &= ~bit
+        for facet, value in self._memberships.pop(movie.id):
+            bitsets = self._facets[facet]
+            bitsets[value] &= ~bit
+            if not bitsets[value]:
+                del bitsets[value]
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked._ordinals = dict(self._ordinals)
+        forked._movie_ids = list(self._movie_ids)
+        forked._free = dict(self._free)
+        forked._genres = dict(self._genres)
+        forked._years = dict(self._years)
+        forked._ratings = dict(self._ratings)
+        forked._runtimes = dict(self._runtimes)
+        forked._facets = {'genres': forked._genres, 'years': forked._years, 'ratings': forked._ratings,
+                          'runtimes': forked._runtimes}
+        forked._memberships = self._memberships.fork()
+        return forked
+
+    def match(self, movie_filter: MovieFilter) -> int:
+        # Returns the bitset of the movies passing every facet of movie_filter.
+        bits = self._all
+        for dimension_bits in self.predicates(movie_filter).values():
+            bits &= dimension_bits
+        return bits
+
+    def member_test(self, bits: int):
+        # Returns a function telling whether a movie id is in bits, in constant time: testing a bit of a Python int
+        # directly costs time proportional to the int's size.
+        flags = bin(bits)[:1:-1]
+        ordinals = self._ordinals
+
+        def test(movie_id) -> bool:
+            ordinal = ordinals.get(movie_id)
+            return ordinal is not None and ordinal < len(flags) and flags[ordinal] == '1'
+        return test
+
+    def movie_ids(self, bits: int):
+        # Returns the ids of the movies in bits, in ordinal order.
+        movie_ids = self._movie_ids
+        flags = bin(bits)[:1:-1]
+        ordinal = flags.find('1')
+        result = list()
+        while ordinal >= 0:
+            result.append(movie_ids[ordinal])
+            ordinal = flags.find('1', ordinal + 1)
+        return result
+
+    def ordinal_bits(self, movie_ids) -> int:
+        # Returns the bitset of the given movies.
+        bits = 0
+        for movie_id in movie_ids:
+            ordinal = self._ordinals.get(movie_id)
+            if ordinal is not None:
+                bits |= 1 << ordinal
+        return bits
+
+    def counts(self, movie_filter: MovieFilter, within: int = None):
+        # Returns, for each facet value, how many movies the filter would match with that value selected. For a facet
+        # other than AND-ed genres, the value replaces the facet's current selection, so the facet's own restriction
+        # is left out. within, a bitset, restricts the counts to those movies, e.g. the hits of a search.
+        dimensions = self.predicates(movie_filter)
+        base = self._all if within is None else self._all & within
+
+        def excluding(dimension):
+            bits = base
+            for name, dimension_bits in dimensions.items():
+                if name != dimension:
+                    bits &= dimension_bits
+            return bits
+
+        genre_base = base
+        for dimension_bits in dimensions.values():
+            genre_base &= dimension_bits
+        if not movie_filter.match_all_genres:
+            genre_base = excluding('genres')
+        year_base = excluding('years')
+        rating_base = excluding('rating')
+        runtime_base = excluding('runtime')
+
+        return {
+            'genres': {genre: popcount(genre_base & bits) for genre, bits in sorted(self._genres.items())},
+            'years': {year: popcount(year_base & bits) for year, bits in sorted(self._years.items())},
+            'min_rating': {threshold: popcount(rating_base & self._rating_bits(threshold, None))
+                           for threshold in RATING_THRESHOLDS},
+            'runtime': {name: popcount(runtime_base & self._runtimes.get(name, 0)) for name, _, _ in RUNTIME_BANDS}
+        }
+
+    def predicates(self, movie_filter: MovieFilter):
+        # Bitsets of the movies passing each restricted facet of movie_filter, by facet. The popcount of a bitset is
+        # the facet's exact cardinality.
+        dimensions = dict()
+        if movie_filter.genres:
+            genre_bits = [self._genres.get(genre, 0) for genre in movie_filter.genres]
+            bits = genre_bits[0]
+            for other in genre_bits[1:]:
+                bits = bits & other if movie_filter.match_all_genres else bits | other
+            dimensions['genres'] = bits
+        if movie_filter.year_from is not None or movie_filter.year_to is not None:
+            dimensions['years'] = self._range_bits(self._years, movie_filter.year_from, movie_filter.year_to)
+        if movie_filter.min_rating is not None:
+            dimensions['rating'] = self._rating_bits(movie_filter.min_rating, None)
+        if movie_filter.runtime is not None:
+            dimensions['runtime'] = self._runtimes.get(movie_filter.runtime, 0)
+        return dimensions
+
+    def _rating_bits(self, lowest, highest):
+        return self._range_bits(
+            self._ratings,
+            None if lowest is None else int(round(lowest * 10)),
+            None if highest is None else int(round(highest * 10)))
+
+    def _range_bits(self, buckets, lowest, highest):
+        bits = 0
+        for value, bucket_bits in buckets.items():
+            if (lowest is None or value >= lowest) and (highest is None or value <= highest):
+                bits |= bucket_bits
+        return bits
+
+    def _compact(self):
+        # Renumbers the movies in ordinal order, leaving no free ordinals. New containers replace the old, so member
+        # tests already handed out keep working on the old numbering.
+        movie_ids = [movie_id for movie_id in self._movie_ids if movie_id is not None]
+        ordinals = {movie_id: ordinal for ordinal, movie_id in enumerate(movie_ids)}
+        members = dict()
+        for movie_id, memberships in self._memberships.items():
+            for membership in memberships:
+                members.setdefault(membership, list()).append(ordinals[movie_id])
+        self._movie_ids, self._ordinals, self._free = movie_ids, ordinals, dict()
+        self._all = (1 << len(movie_ids)) - 1
+        for bitsets in self._facets.values():
+            bitsets.clear()
+        for (facet, value), members_ordinals in members.items():
+            self._facets[facet][value] = _bitset(members_ordinals)
+
+    def _set(self, movie_id, facet: str, value):
+        if value is None:
+            return
+        bitsets = self._facets[facet]
+        bitsets[value] = bitsets.get(value, 0) | (1 << self._ordinals[movie_id])
+        self._memberships.writable(movie_id).add((facet, value))
+
+
+def _bitset(ordinals) -> int:
+    # The bitset of the ordinals, built a byte at a time rather than by | of ever larger ints.
+    flags = bytearray((max(ordinals, default=-1) >> 3) + 1)
+    for ordinal in ordinals:
+        flags[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(flags, 'little')
@@ -0,0 +1,140 @@
+import logging
+import os
+import time
+import weakref
+from threading import Lock, Thread
+
+from covid.adapters.indexes import MovieIndex
+
+
+logger = logging.getLogger(__name__)
+
+# Builders whose locks and threads need restoring in a forked child.
+_builders = weakref.WeakSet()
+
+
+class IndexBuilder(MovieIndex):
+    # Builds a repository's deferred indexes from its movies, one index at a time, and tells the repository which are
+    # ready. Until an index is ready the repository answers its queries some other way, typically with a scan.
+    #
+    # The builder is itself one of the repository's indexes, so it sees every change to the catalogue while an index is
+    # being built. The index is fed the movies that were in the catalogue when its build started, a batch at a time,
+    # holding lock; the repository holds lock too when it changes the catalogue. A change to a movie the build has yet
+    # to reach is left for the build to pick up, and any other change is passed on to the index, so the index is up to
+    # date when it's handed over. Only add_movie and remove_movie are passed on: deferred indexes must depend on nothing
+    # else.
+
+    def __init__(self, movies: dict, indexes: list, on_ready=None, batch_size: int = 256):
+        # movies is the repository's id -> Movie dict, and indexes the list of indexes it notifies; on_ready(name) is
+        # called, holding lock, as each index is handed over.
+        self.lock = Lock()
+        self._movies = movies
+        self._indexes = indexes
+        self._on_ready = on_ready
+        self._batch_size = batch_size
+        # name -> index, in the order they're built
+        self._deferred = dict()
+        self._ready = set()
+        self._progress = dict()
+        self._building = None
+        self._unvisited = set()
+        self._thread = None
+        self.error = None
+        _builders.add(self)
+
+    def defer(self, name: str, index: MovieIndex):
+        self._deferred[name] = index
+        self._progress[name] = [0, None]
+
+    def is_ready(self, name: str) -> bool:
+        return name not in self._deferred or name in self._ready
+
+    @property
+    def ready(self) -> bool:
+        return len(self._ready) == len(self._deferred)
+
+    def status(self):
+        # name -> whether the index is ready, and the number of movies built into it out of the number to build.
+        with self.lock:
+            return {name: {'ready': name in self._ready, 'built': built,
+                           'total': len(self._movies) if total is None else total}
+                    for name, (built, total) in self._progress.items()}
+
+    def add_movie(self, movie):
+        if self._building is not None and movie.id not in self._unvisited:
+            self._building.add_movie(movie)
+
+    def remove_movie(self, movie):
+        if self._building is not None:
+            if movie.id in self._unvisited:
+                self._unvisited.discard(movie.id)
+            else:
+                self._building.remove_movie(movie)
+
+    def build(self):
+        # Builds the indexes not yet ready, in the calling thread.
+        for name, index in self._deferred.items():
+            if name in self._ready:
+                continue
+            start = time.perf_counter()
+            with self.lock:
+                self._building = index
+                self._unvisited = set(self._movies)
+                progress = self._progress[name] = [0, len(self._unvisited)]
+                pending = list(self._unvisited)
+            for batch in range(0, len(pending), self._batch_size):
+                with self.lock:
+                    for movie_id in pending[batch:batch + self._batch_size]:
+                        if movie_id in self._unvisited:
+                            self._unvisited.discard(movie_id)
+                            index.add_movie(self._movies[movie_id])
+                    progress[0] = min(batch + self._batch_size, len(pending))
+            with self.lock:
+                self._building = None
+                self._indexes.append(index)
+                self._ready.add(name)
+                if self._on_ready is not None:
+                    self._on_ready(name)
+            logger.info('Built the %s index of %d movies in %.2fs', name, progress[1], time.perf_counter() - start)
+
+    def start(self):
+        # Builds the indexes on a daemon thread.
+        def run():
+            try:
+                self.build()
+            except Exception as e:
+                self.error = e
+                logger.exception('Building indexes failed')
+
+        self._thread = Thread(target=run, name='index-builder', daemon=True)
+        self._thread.start()
+
+    def join(self, timeout: float = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _restart_after_fork(self):
+        # The fork happened while holding lock, so the build was between batches; carry on with it in the child.
+        self.lock = Lock()
+        if self._thread is not None and not self.ready and self.error is None:
+            self.start()
+
+
+def _before_fork():
+    for builder in list(_builders):
+        builder.lock.acquire()
+
+
+def _after_fork_in_parent():
+    for builder in list(_builders):
+        builder.lock.release()
+
+
+def _after_fork_in_child():
+    for builder in list(_builders):
+        builder._restart_after_fork()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=_before_fork, after_in_parent=_after_fork_in_parent,
+                        after_in_child=_after_fork_in_child)
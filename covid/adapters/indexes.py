@@ -0,0 +1,67 @@
+import copy
+
+
+class MovieIndex:
+    # Base class of the indexes a MemoryRepository derives from its movies. The repository notifies each of its indexes
+    # of every change to the catalogue; an index overrides the notifications it depends on.
+
+    def add_movie(self, movie):
+        pass
+
+    def remove_movie(self, movie):
+        pass
+
+    def add_genre_association(self, movie, genre):
+        pass
+
+    def add_review(self, review):
+        pass
+
+    # Notifications of many changes at once, as when loading the catalogue. An index that can build more cheaply from a
+    # batch than one change at a time overrides these.
+
+    def add_movies(self, movies):
+        for movie in movies:
+            self.add_movie(movie)
+
+    def add_reviews(self, reviews):
+        for review in reviews:
+            self.add_review(review)
+
+    def fork(self):
+        # Returns a copy of the index, to be changed without changing this one, and this one no longer changed. Indexes
+        # override this to share their contents with the copy rather than copy them all, so that a fork costs a copy
+        # of the index's top-level tables, and each change then copies only what it touches; see CopyOnWriteDict.
+        return copy.deepcopy(self)
+
+
+class CopyOnWriteDict(dict):
+    # A dict of mutable containers, such as the postings lists of an index, that can be forked cheaply: fork() copies
+    # the dict, and the two share its containers. Each then copies a container the first time it changes it, through
+    # writable(), so the other never sees the change.
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Keys of the containers this dict may change in place, or None if it shares none.
+        self._owned = None
+
+    def fork(self):
+        forked = CopyOnWriteDict(self)
+        forked._owned = set()
+        self._owned = set()
+        return forked
+
+    def writable(self, key, default=None):
+        # The container at key, which may then be changed in place. A missing key is added, with the container default()
+        # returns.
+        container = self.get(key)
+        owned = self._owned
+        if container is None:
+            container = self[key] = default()
+        elif owned is None or key in owned:
+            return container
+        else:
+            container = self[key] = copy.copy(container)
+        if owned is not None:
+            owned.add(key)
+        return container
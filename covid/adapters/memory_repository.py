@@ -1,25 +1,103 @@
 import csv
+import io
+import logging
+import mmap
 import os
+import time
+from collections import deque
 from datetime import date, datetime
 from typing import List
-from fuzzywuzzy import fuzz
 from bisect import bisect, bisect_left, insort_left
+from functools import lru_cache
 
-from werkzeug.security import generate_password_hash
-
+from covid.adapters.facet_index import FacetIndex, MovieFilter
+from covid.adapters.index_builder import IndexBuilder
+from covid.adapters.people_index import PersonIndex
+from covid.adapters.query_cache import QueryCache
+from covid.adapters.query_planner import QueryPlanner
 from covid.adapters.repository import AbstractRepository, RepositoryException
+from covid.adapters.search_index import TextSearchIndex
+from covid.adapters.sort_index import SortIndex, SORT_ORDERS
+from covid.adapters.spelling_index import SpellingIndex
+from covid.adapters.title_index import TitleIndex
+from covid.authentication.hashing import generate_password_hashes
 from covid.domain.model import Movie, Genre, User, Review, make_genre_association, make_review
 
 
+logger = logging.getLogger(__name__)
+
+
 class MemoryRepository(AbstractRepository):
     # Movies ordered by date, not id. id is assumed unique.
 
-    def __init__(self):
+    def __init__(self, query_cache_size: int = 1000000, search_limit: int = 1000, defer_indexes: bool = False):
         self._movies = list()
         self._movies_index = dict()
         self._genres = list()
         self._users = list()
         self._reviews = list()
+        # Results of get_movie_ids_for_genre, invalidated whenever a movie or genre association is added.
+        self._query_cache = QueryCache(query_cache_size)
+        # Ranked text search over titles, descriptions, directors and actors.
+        self._search_index = TextSearchIndex()
+        # Directors and actors, by role, mapped to their movies.
+        self._people = {
+            'director': PersonIndex(lambda movie: [movie.director]),
+            'actor': PersonIndex(lambda movie: movie.actors)
+        }
+        # Title autocomplete, best rated first.
+        self._titles = TitleIndex()
+        # Spelling correction of searches against the words of titles.
+        self._spelling = SpellingIndex()
+        # Genre, year, rating and runtime facets.
+        self._facets = FacetIndex()
+        # Movie ids in each of the sort orders.
+        self._sorts = SortIndex()
+        self._query_cache_size = query_cache_size
+        self._search_limit = search_limit
+        self._connect(defer_indexes)
+
+    def _connect(self, defer_indexes: bool = False):
+        # Wires up the indexes, and what queries them.
+        # Indexes derived from the movies, kept up to date as the catalogue changes.
+        self._indexes = [self._facets, self._sorts]
+        # The text indexes, unless deferred to be built by build_indexes(), in the meantime answering with scans.
+        self._builder = IndexBuilder(self._movies_index, self._indexes, self._index_ready)
+        text_indexes = {
+            'search': self._search_index, 'titles': self._titles, 'spelling': self._spelling,
+            'directors': self._people['director'], 'actors': self._people['actor']}
+        for name, index in text_indexes.items():
+            if defer_indexes:
+                self._builder.defer(name, index)
+            else:
+                self._indexes.append(index)
+        self._indexes.append(self._builder)
+        # Membership tests of facet filters, for seeking through a sort order.
+        self._member_test = lru_cache(maxsize=256)(
+            lambda movie_filter: self._facets.member_test(self._facets.match(movie_filter)))
+        # Orders searches and facet filters across the indexes. Searches return at most search_limit movies.
+        self._planner = QueryPlanner(
+            self._movies_index, self._facets, self._search_index, self._search_limit, self._builder.is_ready)
+
+    def fork(self):
+        # Returns a repository that starts out the same as this one and can then be changed without changing this one.
+        # See OverlayRepository.
+        from covid.adapters.overlay_repository import OverlayRepository
+        return OverlayRepository(self)
+
+    def build_indexes(self, background: bool = True):
+        # Builds the deferred indexes, on a background thread unless background is False.
+        if background:
+            self._builder.start()
+        else:
+            self._builder.build()
+
+    def get_index_status(self):
+        return self._builder.status()
+
+    def _index_ready(self, name: str):
+        # Results found by scanning are dropped in favour of the index's.
+        self._query_cache.invalidate()
 
     def add_user(self, user: User):
         self._users.append(user)
@@ -27,9 +105,47 @@ class MemoryRepository(AbstractRepository):
     def get_user(self, username) -> User:
         return next((user for user in self._users if user.username == username), None)
 
+    def get_users(self) -> List[User]:
+        return self._users
+
     def add_movie(self, movie: Movie):
-        insort_left(self._movies, movie)
-        self._movies_index[movie.id] = movie
+        with self._builder.lock:
+            insort_left(self._movies, movie)
+            self._movies_index[movie.id] = movie
+            self._query_cache.invalidate()
+            self._member_test.cache_clear()
+            for index in self._indexes:
+                index.add_movie(movie)
+
+    def add_movies(self, movies):
+        movies = list(movies)
+        with self._builder.lock:
+            # A stable sort with the new movies reversed leaves them where insort_left, one at a time, would have.
+            self._movies[:] = sorted(movies[::-1] + self._movies)
+            self._movies_index.update((movie.id, movie) for movie in movies)
+            self._query_cache.invalidate()
+            self._member_test.cache_clear()
+            for index in self._indexes:
+                index.add_movies(movies)
+
+    def remove_movie(self, movie: Movie):
+        with self._builder.lock:
+            stored = self._movies_index.pop(movie.id, None)
+            if stored is None:
+                return
+            # Movies are ordered by date only, so find this one among those sharing its date.
+            position = bisect_left(self._movies, stored)
+            while self._movies[position] is not stored:
+                position += 1
+            del self._movies[position]
+            for genre in stored.genres:
+                genre.remove_movie(stored)
+            if stored.number_of_reviews:
+                self._reviews = [review for review in self._reviews if review.movie.id != stored.id]
+            self._query_cache.invalidate()
+            self._member_test.cache_clear()
+            for index in self._indexes:
+                index.remove_movie(stored)
 
     def get_movie(self, id: int) -> Movie:
         movie = None
@@ -91,31 +207,124 @@ class MemoryRepository(AbstractRepository):
         movies = [self._movies_index[id] for id in existing_ids]
         return movies
 
-    def get_movie_ids_for_genre(self, s: str, genre_name: str):
-        # Linear search, to find the first occurrence of a Genre with the name genre_name.
-        # genre = next((genre for genre in self._genres if genre.genre_name == genre_name), None)
-        d = []
-        # Retrieve the ids of movies associated with the Genre.
-        print(genre_name)
+    def get_movie_ids_for_genre(self, s: str, genre_name: str, sort: str = None):
+        if sort is not None:
+            return self.get_movie_ids_for_filter(s, self._genre_filter(genre_name), sort)
+        # Results are cached as read-only arrays of ids, so paging through a search only costs a slice.
+        movie_ids = self._query_cache.get((s, genre_name))
+        if movie_ids is None:
+            # Read before computing, so a result overtaken by a change to the catalogue isn't kept.
+            generation = self._query_cache.generation
+            movie_ids = self._query_cache.put(
+                (s, genre_name), self._find_movie_ids_for_genre(s, genre_name), generation)
+        return movie_ids
+
+    def get_movie_ids_for_filter(self, s: str, movie_filter: MovieFilter, sort: str = None):
+        if sort is not None:
+            return self._get_sorted_movie_ids(s, movie_filter, sort)
+        movie_ids = self._query_cache.get((s, movie_filter))
+        if movie_ids is None:
+            generation = self._query_cache.generation
+            movie_ids = self._query_cache.put(
+                (s, movie_filter), self._find_movie_ids_for_filter(s, movie_filter), generation)
+        return movie_ids
+
+    def _get_sorted_movie_ids(self, s: str, movie_filter: MovieFilter, sort: str):
+        if sort not in SORT_ORDERS:
+            raise RepositoryException('Unknown sort order: {}'.format(sort))
+        if s is None and movie_filter == MovieFilter():
+            # Every movie: the order itself.
+            return self._sorts.order(sort)
+        # Results in a dynamic order are keyed by the order's version, so a review makes them stale.
+        key = (s, movie_filter, sort, self._sorts.version(sort))
+        movie_ids = self._query_cache.get(key)
+        if movie_ids is None:
+            generation = self._query_cache.generation
+            movie_ids = self._query_cache.put(
+                key, self.sort_movie_ids(self.get_movie_ids_for_filter(s, movie_filter), sort), generation)
+        return movie_ids
+
+    def sort_movie_ids(self, movie_ids, sort: str):
+        if sort not in SORT_ORDERS:
+            raise RepositoryException('Unknown sort order: {}'.format(sort))
+        return self._sorts.sort([movie_id for movie_id in movie_ids if movie_id in self._movies_index], sort)
+
+    def get_movie_ids_page(self, movie_filter: MovieFilter, sort: str, key=None, limit: int = 10,
+                           reverse: bool = False):
+        if sort not in SORT_ORDERS:
+            raise RepositoryException('Unknown sort order: {}'.format(sort))
+        accept = None if movie_filter == MovieFilter() else self._member_test(movie_filter)
+        movie_ids = self._sorts.seek(sort, key, limit, reverse, accept)
+        if reverse:
+            movie_ids.reverse()
+        return movie_ids
+
+    def get_sort_key(self, movie_id: int, sort: str):
+        if sort not in SORT_ORDERS:
+            raise RepositoryException('Unknown sort order: {}'.format(sort))
+        return self._sorts.key(sort, movie_id)
+
+    def _find_movie_ids_for_filter(self, s: str, movie_filter: MovieFilter):
+        movie_ids, stages = self._planner.run(s, movie_filter)
+        return movie_ids
+
+    def explain_query(self, s: str, movie_filter: MovieFilter):
+        movie_ids, stages = self._planner.run(s, movie_filter)
+        return stages
+
+    def get_facet_counts(self, s: str, movie_filter: MovieFilter):
+        within = None
         if s is not None:
-            for i in self._movies:
-                if genre_name == 'all':
-                    if fuzz.partial_ratio(s, i.title) > 70:
-                        d.append(i.id)
-                else:
-                    if fuzz.partial_ratio(s, i.title)>70 and genre_name in [i.genre_name for i in list(i.genres)]:
-                        d.append(i.id)
-            return d
+            within = self._facets.ordinal_bits(self.get_movie_ids_for_genre(s, 'all'))
+        return self._facets.counts(movie_filter, within)
+
+    def search_movies(self, query: str, genre_name: str = 'all', k: int = 10):
+        if not self._builder.is_ready('search'):
+            # Fuzzy title matches, unranked.
+            movie_ids = self._find_movie_ids_for_filter(query, self._genre_filter(genre_name))
+            return [(movie_id, 0.0) for movie_id in movie_ids[:k]]
+        accept = None
         if genre_name != 'all':
-            for i in self._movies:
-                if genre_name in [i.genre_name for i in list(i.genres)]:
-                    d.append(i.id)
-            return d
-        if len(self._movies_index) > 0:
-            return list(self._movies_index.keys())
-        else:
-            # No Genre with name genre_name, so return an empty list.
-            return list()
+            accept = self._facets.member_test(self._facets.match(self._genre_filter(genre_name)))
+        return self._search_index.search(query, k, accept)
+
+    def get_spelling_suggestion(self, s: str):
+        if not self._builder.is_ready('spelling'):
+            return None
+        return self._spelling.correct(s)
+
+    def get_title_suggestions(self, prefix: str, limit: int = 10):
+        if not self._builder.is_ready('titles'):
+            return self._titles.scan(self._movies, prefix, limit)
+        return self._titles.suggest(prefix, limit)
+
+    def get_person(self, role: str, name: str):
+        return self._person_index(role).name(name)
+
+    def get_movie_ids_for_person(self, role: str, name: str):
+        return self._person_index(role).movie_ids(name)
+
+    def get_people_with_prefix(self, role: str, prefix: str, limit: int = 10):
+        return self._person_index(role).names_with_prefix(prefix, limit)
+
+    def _person_index(self, role: str):
+        if role not in self._people:
+            raise RepositoryException('Unknown role: {}'.format(role))
+        if not self._builder.is_ready(role + 's'):
+            # Until the index is built, the same queries answered by a scan of the movies.
+            return self._people[role].scan(self._movies)
+        return self._people[role]
+
+    def _genre_filter(self, genre_name: str):
+        return MovieFilter() if genre_name == 'all' else MovieFilter(genres=[genre_name])
+
+    def _find_movie_ids_for_genre(self, s: str, genre_name: str):
+        # Planned like any other filter: the genre's bitset narrows the candidates before any search scoring.
+        movie_ids = self._find_movie_ids_for_filter(s, self._genre_filter(genre_name))
+        if s is None and genre_name != 'all':
+            # Genre pages list their movies in date order.
+            movie_ids.sort(key=lambda movie_id: self._movies_index[movie_id].date)
+        return movie_ids
 
     def get_date_of_previous_movie(self, movie: Movie):
         previous_date = None
@@ -150,12 +359,42 @@ class MemoryRepository(AbstractRepository):
     def add_genre(self, genre: Genre):
         self._genres.append(genre)
 
+    def add_genre_association(self, movie: Movie, genre: Genre):
+        make_genre_association(movie, genre)
+        with self._builder.lock:
+            self._query_cache.invalidate()
+            self._member_test.cache_clear()
+            for index in self._indexes:
+                index.add_genre_association(movie, genre)
+
     def get_genres(self) -> List[Genre]:
         return self._genres
 
     def add_review(self, review: Review):
         super().add_review(review)
-        self._reviews.append(review)
+        with self._builder.lock:
+            self._reviews.append(review)
+            for index in self._indexes:
+                index.add_review(review)
+
+    def add_reviews(self, reviews):
+        reviews = list(reviews)
+        # Checked as add_review checks each review, but against each user's and movie's reviews once: asking has_review
+        # of a user with many reviews in the batch would scan them for each one.
+        attached = dict()
+        for review in reviews:
+            for owner in (review.user, review.movie):
+                if owner is not None and id(owner) not in attached:
+                    attached[id(owner)] = {id(item) for item in owner.reviews}
+        for review in reviews:
+            if review.user is None or id(review) not in attached[id(review.user)]:
+                raise RepositoryException('Review not correctly attached to a User')
+            if review.movie is None or id(review) not in attached[id(review.movie)]:
+                raise RepositoryException('Review not correctly attached to an Movie')
+        with self._builder.lock:
+            self._reviews.extend(reviews)
+            for index in self._indexes:
+                index.add_reviews(reviews)
 
     def get_movie(self, rank):
         existing_ids = [rank]
@@ -186,13 +425,105 @@ def read_csv_file(filename: str):
             yield row
 
 
-def load_movies_and_genres(data_path: str, repo: MemoryRepository):
+def parse_csv_file(filename: str, parse, pool=None, workers: int = 1):
+    # Yields parse(row) for each row of the CSV file, in file order. With a pool of worker processes, the file is split
+    # into byte ranges of whole records, parsed in parallel. Only a couple of ranges per worker are in flight at a
+    # time, so memory use doesn't grow with the size of the file.
+    if pool is None:
+        for row in read_csv_file(filename):
+            yield parse(row)
+        return
+
+    parts = max(4 * workers, os.path.getsize(filename) // _CHUNK_SIZE + 1)
+    pending = deque()
+    for start, end in record_ranges(filename, parts):
+        pending.append(pool.submit(_parse_range, filename, start, end, parse))
+        if len(pending) > 2 * workers:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def record_ranges(filename: str, parts: int):
+    # Splits the records of a CSV file, after its header, into up to parts (start, end) byte ranges of about equal size.
+    # Each range starts at the beginning of a record: the first newline at or after a split point that isn't inside a
+    # quoted field, which is one preceded by an even number of quotes.
+    with open(filename, 'rb') as infile:
+        if os.fstat(infile.fileno()).st_size == 0:
+            return []
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            size = len(data)
+            boundaries = list()
+            position = quotes = 0
+            for target in [0] + [size * part // parts for part in range(1, parts)]:
+                if target < position:
+                    continue
+                quotes += _count_quotes(data, position, target)
+                position = target
+                while position < size:
+                    newline = data.find(b'\n', position)
+                    end = size if newline < 0 else newline + 1
+                    quotes += _count_quotes(data, position, end)
+                    position = end
+                    if quotes % 2 == 0:
+                        break
+                boundaries.append(position)
+    boundaries.append(size)
+    return [(start, end) for start, end in zip(boundaries, boundaries[1:]) if start < end]
+
+
+def _count_quotes(data, start: int, end: int) -> int:
+    return sum(data[block:min(block + _BLOCK_SIZE, end)].count(b'"') for block in range(start, end, _BLOCK_SIZE))
+
+
+def _parse_range(filename: str, start: int, end: int, parse):
+    # Runs in a pool process: parses the records in a byte range of the file.
+    with open(filename, 'rb') as infile:
+        infile.seek(start)
+        text = infile.read(end - start).decode('utf-8')
+    return [parse([item.strip() for item in row]) for row in csv.reader(io.StringIO(text, newline=''))]
+
+
+# Bytes scanned at a time when counting quotes, and the largest byte range parsed by one task.
+_BLOCK_SIZE = 1 << 20
+_CHUNK_SIZE = 8 << 20
+
+
+def parse_movie_row(data_row):
+    # Validates a row of Data1000Movies.csv, returning the movie's id, its genre names and the arguments of its Movie.
+    movie_key = int(data_row[0])
+    return movie_key, genre_names_from_row(data_row), dict(
+        date=date.fromisoformat(data_row[12]),
+        title=data_row[1],
+        first_para=data_row[3],
+        hyperlink="nan",
+        image_hyperlink=data_row[14],
+        id=movie_key,
+        rating=data_row[8],
+        back_hyperlink=data_row[13],
+        runtime=int(data_row[7]),
+        director=data_row[4],
+        actors=[actor.strip() for actor in data_row[5].split(",")]
+    )
+
+
+def movie_from_row(data_row):
+    # Creates a Movie, without its genres, from a row of Data1000Movies.csv.
+    movie_key, movie_genres, fields = parse_movie_row(data_row)
+    return Movie(**fields)
+
+
+def genre_names_from_row(data_row):
+    return data_row[2].split(",")
+
+
+def load_movies_and_genres(data_path: str, repo: MemoryRepository, pool=None, workers: int = 1):
     genres = dict()
+    movies = dict()
 
-    for data_row in read_csv_file(os.path.join(data_path, 'Data1000Movies.csv')):
+    filename = os.path.join(data_path, 'Data1000Movies.csv')
+    for movie_key, movie_genres, fields in parse_csv_file(filename, parse_movie_row, pool, workers):
 
-        movie_key = int(data_row[0])
-        movie_genres = data_row[2].split(",")
         # Add any new genres; associate the current movie with genres.
         for genre in movie_genres:
             if genre not in genres.keys():
@@ -200,63 +531,81 @@ def load_movies_and_genres(data_path: str, repo: MemoryRepository):
             genres[genre].append(movie_key)
 
         # Create Movie object.
-        movie = Movie(
-            date=date.fromisoformat(data_row[12]),
-            title=data_row[1],
-            first_para=data_row[3],
-            hyperlink="nan",
-            image_hyperlink=data_row[14],
-            id=movie_key,
-            rating=data_row[8],
-            back_hyperlink=data_row[13],
-            runtime=int(data_row[7]),
-            director=data_row[4],
-            actors=data_row[5].split(",")
-        )
-
-        # Add the Movie to the repository.
-        repo.add_movie(movie)
+        movies[movie_key] = Movie(**fields)
 
     # Create Genre objects, associate them with Movies and add them to the repository.
     for genre_name in genres.keys():
         genre = Genre(genre_name)
         for movie_id in genres[genre_name]:
-            movie = repo.get_movie(movie_id)
-            make_genre_association(movie, genre)
+            make_genre_association(movies[movie_id], genre)
         repo.add_genre(genre)
 
+    # Add the movies, with their genres, in one batch, so the indexes are built once rather than updated per movie.
+    repo.add_movies(movies.values())
+
 
 def load_users(data_path: str, repo: MemoryRepository):
     users = dict()
 
-    for data_row in read_csv_file(os.path.join(data_path, 'users.csv')):
+    # Hash the passwords in parallel, on the password hashing pool.
+    data_rows = list(read_csv_file(os.path.join(data_path, 'users.csv')))
+    password_hashes = generate_password_hashes([data_row[2] for data_row in data_rows])
+
+    for data_row, password_hash in zip(data_rows, password_hashes):
         user = User(
             username=data_row[1],
-            password=generate_password_hash(data_row[2])
+            password=password_hash
         )
         repo.add_user(user)
         users[data_row[0]] = user
     return users
 
 
-def load_reviews(data_path: str, repo: MemoryRepository, users):
-    for data_row in read_csv_file(os.path.join(data_path, 'comments.csv')):
-        review = make_review(
-            review_text=data_row[3],
-            user=users[data_row[1]],
-            movie=repo.get_movie(int(data_row[2])),
-            rating=int(data_row[5])
-        )
-        repo.add_review(review)
-
-
-def populate(data_path: str, repo: MemoryRepository):
-    # Load movies and genres into the repository.
-    load_movies_and_genres(data_path, repo)
+def parse_review_row(data_row):
+    # Validates a row of comments.csv, returning the review's author id, movie id, text and rating.
+    return data_row[1], int(data_row[2]), data_row[3], int(data_row[5])
 
-    # Load users into the repository.
-    users = load_users(data_path, repo)
 
-    # Load reviews into the repository.
-    print(os.path.join(data_path, 'comments.csv'))
-    load_reviews(data_path, repo, users)
+def load_reviews(data_path: str, repo: MemoryRepository, users, pool=None, workers: int = 1):
+    filename = os.path.join(data_path, 'comments.csv')
+    reviews = list()
+    for author_id, movie_id, review_text, rating in parse_csv_file(filename, parse_review_row, pool, workers):
+        review = make_review(
+            review_text=review_text,
+            user=users[author_id],
+            movie=repo.get_movie(movie_id),
+            rating=rating
+        )
+        reviews.append(review)
+    # In one batch, so the review orders are sorted once rather than updated per review.
+    repo.add_reviews(reviews)
+
+
+def populate(data_path: str, repo: MemoryRepository, workers: int = 0):
+    # With more than one worker, the movie and review files are parsed and validated in parallel by a pool of worker
+    # processes. Only parsing is spread across the pool: the movies, and then the reviews, are added to the repository
+    # in file order, each in one batch, and the indexes are built from each batch in this process, so the result is
+    # the same. How long each phase takes is logged; with many cores, building the indexes is most of what's left.
+    pool = None
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        pool = ProcessPoolExecutor(workers)
+    try:
+        # Load movies and genres into the repository.
+        start = time.perf_counter()
+        load_movies_and_genres(data_path, repo, pool, workers)
+        logger.info('Loaded %d movies in %.2fs', repo.get_number_of_movies(), time.perf_counter() - start)
+
+        # Load users into the repository.
+        start = time.perf_counter()
+        users = load_users(data_path, repo)
+        logger.info('Loaded %d users in %.2fs', len(users), time.perf_counter() - start)
+
+        # Load reviews into the repository.
+        print(os.path.join(data_path, 'comments.csv'))
+        start = time.perf_counter()
+        load_reviews(data_path, repo, users, pool, workers)
+        logger.info('Loaded %d reviews in %.2fs', len(repo.get_reviews()), time.perf_counter() - start)
+    finally:
+        if pool is not None:
+            pool.shutdown()
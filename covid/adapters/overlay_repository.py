@@ -0,0 +1,178 @@
+import copy
+from bisect import bisect_left
+from threading import Lock
+
+from covid.adapters.indexes import MovieIndex
+from covid.adapters.memory_repository import MemoryRepository
+from covid.adapters.query_cache import QueryCache
+from covid.adapters.repository import RepositoryException
+from covid.domain.model import Movie, Genre, User
+
+
+class CopyOnWriteIndex(MovieIndex):
+    # An index shared with another repository until the first change to it: the first notification the index acts on
+    # replaces it with a fork of it (see MovieIndex.fork), which takes that and every later change. Everything else is
+    # read from whichever index is current.
+
+    def __init__(self, index: MovieIndex):
+        # An index shared through another CopyOnWriteIndex is shared directly, so forks of forks don't nest wrappers.
+        self._index = index._index if isinstance(index, CopyOnWriteIndex) else index
+        self._copied = False
+
+    def add_movie(self, movie):
+        if self._changes('add_movie'):
+            self._writable().add_movie(movie)
+
+    def remove_movie(self, movie):
+        if self._changes('remove_movie'):
+            self._writable().remove_movie(movie)
+
+    def add_genre_association(self, movie, genre):
+        if self._changes('add_genre_association'):
+            self._writable().add_genre_association(movie, genre)
+
+    def add_review(self, review):
+        if self._changes('add_review'):
+            self._writable().add_review(review)
+
+    def add_movies(self, movies):
+        if self._changes('add_movies', 'add_movie'):
+            self._writable().add_movies(movies)
+
+    def add_reviews(self, reviews):
+        if self._changes('add_reviews', 'add_review'):
+            self._writable().add_reviews(reviews)
+
+    def _changes(self, *names) -> bool:
+        # Notifications the index doesn't override change nothing, so needn't copy it.
+        return any(getattr(type(self._index), name) is not getattr(MovieIndex, name) for name in names)
+
+    def _writable(self):
+        if not self._copied:
+            self._index = self._index.fork()
+            self._copied = True
+        return self._index
+
+    def __getattr__(self, name):
+        return getattr(self._index, name)
+
+
+class OverlayRepository(MemoryRepository):
+    # A repository that starts out the same as a base MemoryRepository, and is changed without changing the base, so
+    # that many short-lived repositories (one per test, say) can share the cost of loading and indexing one catalogue.
+    #
+    # The base's containers are copied, which are only lists and dicts of references, and its indexes are shared until
+    # first written to; see CopyOnWriteIndex. Movies, genres and users are mutable, so the base's are copied as they're
+    # handed out by the overlay, and as the overlay changes them; a movie's genres are copied with it. Objects reached
+    # some other way, such as the movies of a review or of a genre, may still be the base's, and must not be changed.
+    # Nor must the base while it has overlays. The overlay keeps no reference to the base itself, so a chain of forks,
+    # each replacing the last, doesn't keep them all alive.
+
+    def __init__(self, base: MemoryRepository):
+        if not base._builder.ready:
+            raise RepositoryException('Indexes of the base repository are still being built')
+        self._movies = list(base._movies)
+        self._movies_index = dict(base._movies_index)
+        self._genres = list(base._genres)
+        self._users = list(base._users)
+        self._reviews = list(base._reviews)
+        self._query_cache_size = base._query_cache_size
+        self._search_limit = base._search_limit
+        self._query_cache = QueryCache(self._query_cache_size)
+        self._search_index = CopyOnWriteIndex(base._search_index)
+        self._people = {role: CopyOnWriteIndex(index) for role, index in base._people.items()}
+        self._titles = CopyOnWriteIndex(base._titles)
+        self._spelling = CopyOnWriteIndex(base._spelling)
+        self._facets = CopyOnWriteIndex(base._facets)
+        self._sorts = CopyOnWriteIndex(base._sorts)
+        # id() of each of the base's movies, genres and users -> the object, held so that its id() isn't reused.
+        self._base_objects = {id(item): item for items in (self._movies, self._genres, self._users) for item in items}
+        # id() of a base object -> the overlay's copy of it.
+        self._copies = dict()
+        # Reads copy objects too, so copying is serialised.
+        self._copy_lock = Lock()
+        self._connect()
+
+    def _own(self, item):
+        # The overlay's copy of item if item belongs to the base, otherwise item itself.
+        if not self._is_base(item):
+            return item
+        owned = self._copies.get(id(item))
+        if owned is not None:
+            return owned
+        with self._copy_lock:
+            return self._copy(item)
+
+    def _is_base(self, item) -> bool:
+        return item is not None and self._base_objects.get(id(item)) is item
+
+    def _copy(self, item):
+        # The overlay's copy of item, a base object, made if it hasn't been; called holding _copy_lock. Only the
+        # overlay's own objects and containers are relinked to the copy: the base's are never changed.
+        owned = self._copies.get(id(item))
+        if owned is not None:
+            return owned
+        owned = copy.copy(item)
+        self._copies[id(item)] = owned
+        if isinstance(item, Movie):
+            owned._reviews = list(item._reviews)
+            owned._genres = list(item._genres)
+            # The movie's genres are copied too, so that the genres listing the copy are the overlay's.
+            for genre in item._genres:
+                owned_genre = self._copy(genre) if self._is_base(genre) else genre
+                _replace(owned._genres, genre, owned_genre)
+                _replace(owned_genre._genreged_movies, item, owned)
+            if self._movies_index.get(item.id) is item:
+                self._movies_index[item.id] = owned
+                position = bisect_left(self._movies, item)
+                while self._movies[position] is not item:
+                    position += 1
+                self._movies[position] = owned
+        elif isinstance(item, Genre):
+            owned._genreged_movies = [self._copies.get(id(movie), movie) for movie in item._genreged_movies]
+            # Movies still the base's keep the base's genre.
+            for movie in owned._genreged_movies:
+                if not self._is_base(movie):
+                    _replace(movie._genres, item, owned)
+            _replace(self._genres, item, owned)
+        elif isinstance(item, User):
+            owned._reviews = list(item._reviews)
+            _replace(self._users, item, owned)
+        return owned
+
+    def get_user(self, username) -> User:
+        return self._own(super().get_user(username))
+
+    def get_users(self):
+        return [self._own(user) for user in self._users]
+
+    def remove_movie(self, movie: Movie):
+        # Removing a movie changes its genres, which are copied with it.
+        self._own(self._movies_index.get(movie.id))
+        super().remove_movie(movie)
+
+    def get_movies_by_date(self, target_date):
+        return [self._own(movie) for movie in super().get_movies_by_date(target_date)]
+
+    def get_first_movie(self):
+        return self._own(super().get_first_movie())
+
+    def get_last_movie(self):
+        return self._own(super().get_last_movie())
+
+    def get_movies_by_id(self, id_list):
+        return [self._own(movie) for movie in super().get_movies_by_id(id_list)]
+
+    def add_genre_association(self, movie: Movie, genre: Genre):
+        super().add_genre_association(self._own(movie), self._own(genre))
+
+    def get_genres(self):
+        return [self._own(genre) for genre in self._genres]
+
+
+def _replace(items: list, old, new):
+    # Replaces old with new in items, by identity.
+    for index, item in enumerate(items):
+        if item is old:
+            items[index] = new
+            return
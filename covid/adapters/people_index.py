@@ -0,0 +1,118 @@
+import copy
+from bisect import bisect_left, insort_left
+
+from covid.adapters.indexes import MovieIndex, CopyOnWriteDict
+
+
+def normalise_name(name: str) -> str:
+    # Names are matched ignoring case and runs of white space, so ' Chris  Pratt' and 'chris pratt' are the same person.
+    return ' '.join(name.split()).casefold() if name else ''
+
+
+class PersonIndex(MovieIndex):
+    # Maps people, e.g. the directors or the actors of movies, to the sorted ids of their movies. people(movie) returns
+    # the names of the people credited on a movie.
+    #
+    # Normalised names are also kept in a sorted list, so the names starting with a prefix are a contiguous run found by
+    # bisection: type-ahead costs O(log n + k) rather than a scan of every name.
+
+    def __init__(self, people):
+        self._people = people
+        # normalised name -> sorted movie ids
+        self._movie_ids = CopyOnWriteDict()
+        # normalised name -> name as first credited, for display
+        self._names = dict()
+        self._sorted_names = list()
+        # movie id -> normalised names credited on the movie, for removing the movie
+        self._credits = dict()
+
+    def __len__(self):
+        return len(self._movie_ids)
+
+    def add_movie(self, movie):
+        if movie.id in self._credits:
+            self.remove_movie(movie)
+
+        credits = list()
+        for name in self._people(movie):
+            key = normalise_name(name)
+            if not key or key in credits:
+                continue
+            credits.append(key)
+            if key not in self._movie_ids:
+                self._names[key] = ' '.join(name.split())
+                insort_left(self._sorted_names, key)
+            insort_left(self._movie_ids.writable(key, list), movie.id)
+        self._credits[movie.id] = tuple(credits)
+
+    def remove_movie(self, movie):
+        for key in self._credits.pop(movie.id, ()):
+            movie_ids = self._movie_ids.writable(key)
+            del movie_ids[bisect_left(movie_ids, movie.id)]
+            if not movie_ids:
+                del self._movie_ids[key]
+                del self._names[key]
+                del self._sorted_names[bisect_left(self._sorted_names, key)]
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked._movie_ids = self._movie_ids.fork()
+        forked._names = dict(self._names)
+        forked._sorted_names = list(self._sorted_names)
+        forked._credits = dict(self._credits)
+        return forked
+
+    def scan(self, movies):
+        # The same queries, answered by scanning movies, for use while the index is being built.
+        return PersonScan(self._people, movies)
+
+    def name(self, name: str):
+        # The display name of a person, or None if the person isn't credited on any movie.
+        return self._names.get(normalise_name(name))
+
+    def movie_ids(self, name: str):
+        return self._movie_ids.get(normalise_name(name), [])
+
+    def names_with_prefix(self, prefix: str, limit: int = 10):
+        prefix = normalise_name(prefix)
+        names = list()
+        i = bisect_left(self._sorted_names, prefix)
+        while i < len(self._sorted_names) and len(names) < limit and self._sorted_names[i].startswith(prefix):
+            names.append(self._names[self._sorted_names[i]])
+            i += 1
+        return names
+
+
+class PersonScan:
+    # The queries of a PersonIndex, answered by a scan of every movie's credits.
+
+    def __init__(self, people, movies):
+        self._people = people
+        self._movies = movies
+
+    def name(self, name: str):
+        key = normalise_name(name)
+        return next((name for name, credited in self._credits() if credited == key), None) if key else None
+
+    def movie_ids(self, name: str):
+        key = normalise_name(name)
+        if not key:
+            return []
+        return sorted(movie.id for movie in self._movies
+                      if any(normalise_name(person) == key for person in self._people(movie)))
+
+    def names_with_prefix(self, prefix: str, limit: int = 10):
+        prefix = normalise_name(prefix)
+        names = dict()
+        for name, key in self._credits():
+            if key.startswith(prefix):
+                names.setdefault(key, name)
+        return [names[key] for key in sorted(names)[:limit]]
+
+    def _credits(self):
+        # (display name, normalised name) of every credit.
+        for movie in self._movies:
+            for person in self._people(movie):
+                key = normalise_name(person)
+                if key:
+                    yield ' '.join(person.split()), key
@@ -0,0 +1,63 @@
+from array import array
+from collections import OrderedDict
+from threading import Lock
+
+
+class QueryCache:
+    # LRU cache of query results, stored as arrays of movie ids. The cache is bounded by the total number of ids held
+    # across all results, so one huge result can't be outweighed by a count of small ones. Results are returned as
+    # read-only memoryviews: slicing a page out of one copies nothing.
+    #
+    # Each invalidation starts a new generation. A result computed while the cache was being invalidated would be stale
+    # as soon as it was stored, so callers read generation before computing a result and pass it to put, which drops
+    # the result if the cache has been invalidated since.
+
+    def __init__(self, max_ids: int = 1000000):
+        self._max_ids = max_ids
+        self._results = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key):
+        with self._lock:
+            ids = self._results.get(key)
+            if ids is None:
+                self.misses += 1
+                return None
+            self._results.move_to_end(key)
+            self.hits += 1
+            return memoryview(ids).toreadonly()
+
+    def put(self, key, ids, generation: int = None):
+        ids = array('q', ids)
+        with self._lock:
+            if len(ids) <= self._max_ids and (generation is None or generation == self._generation):
+                previous = self._results.pop(key, None)
+                if previous is not None:
+                    self._size -= len(previous)
+                self._results[key] = ids
+                self._size += len(ids)
+                while self._size > self._max_ids:
+                    _, evicted = self._results.popitem(last=False)
+                    self._size -= len(evicted)
+        return memoryview(ids).toreadonly()
+
+    def invalidate(self):
+        with self._lock:
+            self._results.clear()
+            self._size = 0
+            self._generation += 1
+
+    def __len__(self):
+        return len(self._results)
@@ -0,0 +1,106 @@
+import time
+
+from covid.adapters.facet_index import FacetIndex, MovieFilter, popcount
+from covid.adapters.search_index import TextSearchIndex
+
+
+# Minimum fuzz.partial_ratio of a title to a search string for the title to match.
+FUZZY_THRESHOLD = 70
+
+
+class QueryPlanner:
+    # Evaluates a search string and facet filter in the cheapest order the indexes' statistics allow.
+    #
+    # Facet predicates are bitsets whose popcounts are exact cardinalities. They are applied first, most selective
+    # first, stopping as soon as no candidates are left. The text search then ranks the surviving candidates: by
+    # scoring each candidate when there are fewer of them than postings for the search's terms, otherwise by walking
+    # the postings and skipping non-candidates. Only a search with no hits, e.g. a misspelling or part of a word, has its
+    # candidates fuzzy matched against titles, the most expensive test, one title at a time. Until the text search
+    # index is built, searches skip straight to fuzzy matching. Spelling corrections are left to the caller to suggest,
+    # for searches that match nothing at all.
+    #
+    # run() returns the plan as it was executed: a stage per step, with its estimated cardinality and the number of
+    # candidates going in and coming out.
+
+    def __init__(self, movies: dict, facets: FacetIndex, search_index: TextSearchIndex, search_limit: int = 1000,
+                 is_ready=None):
+        self._movies = movies
+        self._facets = facets
+        self._search_index = search_index
+        self._search_limit = search_limit
+        # is_ready(name) tells whether the 'search' index has been built; until then a search is only fuzzy matched.
+        self._is_ready = is_ready or (lambda name: True)
+
+    def run(self, s: str, movie_filter: MovieFilter, limit: int = None):
+        limit = limit or self._search_limit
+        stages = list()
+
+        bits = self._facets.match(MovieFilter())
+        count = popcount(bits)
+        predicates = sorted(
+            ((name, predicate, popcount(predicate)) for name, predicate in self._facets.predicates(movie_filter).items()),
+            key=lambda item: item[2])
+        for name, predicate, cardinality in predicates:
+            with _Stage(stages, name, 'bitset', cardinality, count) as stage:
+                if count:
+                    bits &= predicate
+                    count = popcount(bits)
+                stage.rows_out = count
+
+        if s is None:
+            return self._facets.movie_ids(bits), stages
+        if count == 0:
+            return [], stages
+
+        if self._is_ready('search'):
+            ranked = self._rank(s, bits, count, bool(predicates), limit, stages, 'text')
+            if ranked:
+                return [movie_id for movie_id, score in ranked], stages
+
+        # fuzzywuzzy is slow to import, and only searches that nothing else matched get this far.
+        from fuzzywuzzy import fuzz
+        with _Stage(stages, 'fuzzy', 'partial_ratio scan', count, count) as stage:
+            movie_ids = [
+                movie_id for movie_id in self._facets.movie_ids(bits)
+                if fuzz.partial_ratio(s, self._movies[movie_id].title) > FUZZY_THRESHOLD]
+            stage.rows_out = len(movie_ids)
+        return movie_ids, stages
+
+    def _rank(self, s: str, bits: int, count: int, filtered: bool, limit: int, stages, name: str):
+        postings = self._search_index.estimate(s)
+        if filtered and count < postings:
+            with _Stage(stages, name, 'score candidates', postings, count) as stage:
+                ranked = self._search_index.search(s, limit, candidates=self._facets.movie_ids(bits))
+                stage.rows_out = len(ranked)
+        else:
+            with _Stage(stages, name, 'walk postings', postings, count) as stage:
+                accept = self._facets.member_test(bits) if filtered else None
+                ranked = self._search_index.search(s, limit, accept)
+                stage.rows_out = len(ranked)
+        return ranked
+
+
+class _Stage:
+    __slots__ = ('stages', 'stage', 'method', 'estimate', 'rows_in', 'rows_out', 'start')
+
+    def __init__(self, stages, stage: str, method: str, estimate, rows_in: int):
+        self.stages = stages
+        self.stage = stage
+        self.method = method
+        self.estimate = estimate
+        self.rows_in = rows_in
+        self.rows_out = None
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stages.append({
+            'stage': self.stage,
+            'method': self.method,
+            'estimate': self.estimate,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'milliseconds': round((time.perf_counter() - self.start) * 1000, 3)
+        })
@@ -3,6 +3,7 @@ from typing import List
 from datetime import date
 
 from covid.domain.model import User, Movie, Genre, Review
+from covid.adapters.facet_index import MovieFilter
 
 
 repo_instance = None
@@ -29,11 +30,29 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_users(self) -> List[User]:
+        """ Returns the Users stored in the repository. """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_movie(self, movie: Movie):
         """ Adds an Movie to the repository. """
         raise NotImplementedError
 
+    def add_movies(self, movies):
+        """ Adds Movies to the repository, as add_movie does each of them in turn. """
+        for movie in movies:
+            self.add_movie(movie)
+
+    @abc.abstractmethod
+    def remove_movie(self, movie: Movie):
+        """ Removes the Movie with movie's id from the repository, along with its Genre associations and Reviews.
+
+        If there is no Movie with that id, this method does nothing.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_movie(self, id: int) -> Movie:
         """ Returns Movie with id from the repository.
@@ -80,10 +99,132 @@ class AbstractRepository(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def get_movie_ids_for_genre(self, genre_name: str):
-        """ Returns a list of ids representing Movies that are genreged by genre_name.
+    def get_movie_ids_for_genre(self, s: str, genre_name: str, sort: str = None):
+        """ Returns a sequence of ids representing Movies that are genreged by genre_name and, if s is not None,
+        whose titles match s. genre_name 'all' matches every Movie. If sort, one of SORT_ORDERS, is given, the ids are
+        in that order.
+
+        If there are no Movies that are genreged by genre_name, this method returns an empty sequence. The sequence
+        may be shared with other callers and must not be modified. If sort is unknown, this method raises a
+        RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_for_filter(self, s: str, movie_filter: MovieFilter, sort: str = None):
+        """ Returns the ids of Movies passing every facet of movie_filter: genres, release years, minimum rating and
+        runtime band. If s is given, only Movies matching the search string s are returned, in order of relevance
+        unless sort, one of SORT_ORDERS, is given.
+
+        If sort is unknown, this method raises a RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def sort_movie_ids(self, movie_ids, sort: str):
+        """ Returns the ids of Movies in movie_ids, as a list in the order sort: 'date', 'rating', 'runtime', 'title',
+        'review_count' or 'review_average'. Ids not representing Movies in the repository are left out.
+
+        If sort is unknown, this method raises a RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_page(self, movie_filter: MovieFilter, sort: str, key=None, limit: int = 10,
+                           reverse: bool = False):
+        """ Returns up to limit ids of Movies passing movie_filter that come after key in the order sort, as a list in
+        that order. If reverse, returns the ids that come before key instead, still in the order sort. A key of None
+        means the start of the order, or the end if reverse. Keys are those returned by get_sort_key.
+
+        If sort is unknown, this method raises a RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_sort_key(self, movie_id: int, sort: str):
+        """ Returns the position of the Movie with id movie_id in the order sort, as a tuple.
+
+        If sort is unknown, this method raises a RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def explain_query(self, s: str, movie_filter: MovieFilter):
+        """ Runs the query for get_movie_ids_for_filter(s, movie_filter) and returns its plan: a list of stages, in the
+        order run, each a dict with the stage's name and method, its estimated cardinality, and the number of
+        candidate Movies going in and coming out.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_facet_counts(self, s: str, movie_filter: MovieFilter):
+        """ Returns, for each facet ('genres', 'years', 'min_rating' and 'runtime'), a dict mapping each of its values
+        to the number of Movies that movie_filter, with that value selected, would match. If s is given, only Movies
+        matching the search string s are counted.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def search_movies(self, query: str, genre_name: str = 'all', k: int = 10):
+        """ Returns up to k (Movie id, score) pairs for the Movies most relevant to query, best first, considering
+        titles, descriptions, directors and actors. genre_name restricts the search to Movies tagged with it; 'all'
+        considers every Movie.
+
+        If no Movie matches any term of query, this method returns an empty list.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_spelling_suggestion(self, s: str):
+        """ Returns the search string s with each word that doesn't appear in any Movie title replaced by the nearest
+        word that does, within a small edit distance.
+
+        If no word of s needs or allows correcting, this method returns None.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_title_suggestions(self, prefix: str, limit: int = 10):
+        """ Returns the ids of up to limit of the best rated Movies whose title, or a word of the title onwards,
+        starts with prefix, ignoring case and punctuation. Best rated first.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_person(self, role: str, name: str):
+        """ Returns the name, as credited, of the person with the given role ('director' or 'actor') and name. Names
+        are matched ignoring case and white space.
+
+        If there is no such person, this method returns None. If role is unknown, this method raises a
+        RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_for_person(self, role: str, name: str):
+        """ Returns the sorted ids of the Movies crediting the person with the given role and name.
+
+        If there are no such Movies, this method returns an empty list. If role is unknown, this method raises a
+        RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_people_with_prefix(self, role: str, prefix: str, limit: int = 10):
+        """ Returns the names of up to limit people with the given role whose names start with prefix, in
+        alphabetical order.
 
-        If there are Movies that are genreged by genre_name, this method returns an empty list.
+        If role is unknown, this method raises a RepositoryException.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_index_status(self):
+        """ Returns, for each index being built in the background, a dict saying whether it's ready and how many Movies
+        have been built into it ('built') out of how many ('total'). Queries that would use an index that isn't ready
+        are answered without it, more slowly or, for spelling suggestions, not at all.
+
+        If no indexes are built in the background, this method returns an empty dict.
         """
         raise NotImplementedError
 
@@ -110,6 +251,14 @@ class AbstractRepository(abc.ABC):
         """ Adds a Genre to the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def add_genre_association(self, movie: Movie, genre: Genre):
+        """ Associates a Movie in the repository with a Genre.
+
+        Raises ModelException if the Movie is already associated with the Genre.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_genres(self) -> List[Genre]:
         """ Returns the Genres stored in the repository. """
@@ -122,11 +271,16 @@ class AbstractRepository(abc.ABC):
         If the Review doesn't have bidirectional links with an Movie and a User, this method raises a
         RepositoryException and doesn't update the repository.
         """
-        if review.user is None or review not in review.user.reviews:
+        if review.user is None or not review.user.has_review(review):
             raise RepositoryException('Review not correctly attached to a User')
-        if review.movie is None or review not in review.movie.reviews:
+        if review.movie is None or not review.movie.has_review(review):
             raise RepositoryException('Review not correctly attached to an Movie')
 
+    def add_reviews(self, reviews):
+        """ Adds Reviews to the repository, as add_review does each of them in turn. """
+        for review in reviews:
+            self.add_review(review)
+
     @abc.abstractmethod
     def get_reviews(self):
         """ Returns the Reviews stored in the repository. """
@@ -0,0 +1,129 @@
+import heapq
+import math
+import re
+import copy
+from collections import Counter
+
+from covid.adapters.indexes import MovieIndex, CopyOnWriteDict
+
+
+# Fields searched, with the weight of a match in each.
+FIELD_WEIGHTS = (('title', 3.0), ('director', 2.0), ('actors', 1.5), ('first_para', 1.0))
+
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenise(text: str):
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def _field_text(movie, field: str):
+    value = getattr(movie, field)
+    if isinstance(value, (list, tuple)):
+        return ' '.join(value)
+    return value
+
+
+class TextSearchIndex(MovieIndex):
+    # Inverted index over several fields of each movie, ranking matches with BM25F: a term's frequency in each field is
+    # normalised by the field's length relative to its average, weighted by the field's weight and summed, before
+    # BM25 saturation is applied. The k best matches are kept in a bounded heap.
+
+    def __init__(self, field_weights=FIELD_WEIGHTS, k1: float = 1.2, b: float = 0.75):
+        self._fields = tuple(field for field, weight in field_weights)
+        self._weights = tuple(weight for field, weight in field_weights)
+        self._k1 = k1
+        self._b = b
+        # term -> {movie id -> term frequency in each field}
+        self._postings = CopyOnWriteDict()
+        # movie id -> length of each field, in tokens
+        self._lengths = dict()
+        # movie id -> distinct terms, for removing the movie
+        self._terms = dict()
+        self._total_lengths = [0] * len(self._fields)
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add_movie(self, movie):
+        if movie.id in self._lengths:
+            self.remove_movie(movie)
+
+        counts = [Counter(tokenise(_field_text(movie, field))) for field in self._fields]
+        lengths = tuple(sum(count.values()) for count in counts)
+        terms = set().union(*counts)
+        # Counter.get rather than indexing: a term missing from a field would otherwise cost a call of __missing__.
+        frequencies = [count.get for count in counts]
+        writable = self._postings.writable
+        for term in terms:
+            writable(term, dict)[movie.id] = tuple([frequency(term, 0) for frequency in frequencies])
+
+        self._lengths[movie.id] = lengths
+        self._terms[movie.id] = tuple(terms)
+        for i, length in enumerate(lengths):
+            self._total_lengths[i] += length
+
+    def remove_movie(self, movie):
+        lengths = self._lengths.pop(movie.id, None)
+        if lengths is None:
+            return
+        for term in self._terms.pop(movie.id):
+            postings = self._postings.writable(term)
+            del postings[movie.id]
+            if not postings:
+                del self._postings[term]
+        for i, length in enumerate(lengths):
+            self._total_lengths[i] -= length
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked._postings = self._postings.fork()
+        forked._lengths = dict(self._lengths)
+        forked._terms = dict(self._terms)
+        forked._total_lengths = list(self._total_lengths)
+        return forked
+
+    def document_frequency(self, term: str) -> int:
+        return len(self._postings.get(term, ()))
+
+    def estimate(self, query: str) -> int:
+        # The number of postings a search for query walks: an upper bound on its hits.
+        return sum(self.document_frequency(term) for term in set(tokenise(query)))
+
+    def search(self, query: str, k: int = 10, accept=None, candidates=None):
+        # Returns up to k (movie id, score) pairs, best first. If accept is given, only movie ids for which accept
+        # returns True are considered. If candidates, a collection of movie ids, is given, only those movies are
+        # scored: cheaper than walking the postings when there are fewer candidates than postings.
+        movie_count = len(self._lengths)
+        if movie_count == 0:
+            return []
+        average_lengths = [max(total / movie_count, 1e-9) for total in self._total_lengths]
+        weights, k1, b = self._weights, self._k1, self._b
+
+        scores = dict()
+        rejected = set()
+        for term in set(tokenise(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (movie_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            if candidates is not None:
+                matches = ((movie_id, postings[movie_id]) for movie_id in candidates if movie_id in postings)
+            else:
+                matches = postings.items()
+            for movie_id, frequencies in matches:
+                if accept is not None and movie_id not in scores:
+                    if movie_id in rejected:
+                        continue
+                    if not accept(movie_id):
+                        rejected.add(movie_id)
+                        continue
+                lengths = self._lengths[movie_id]
+                weighted = 0.0
+                for i, frequency in enumerate(frequencies):
+                    if frequency:
+                        weighted += weights[i] * frequency / (1 - b + b * lengths[i] / average_lengths[i])
+                scores[movie_id] = scores.get(movie_id, 0.0) + idf * weighted * (k1 + 1) / (k1 + weighted)
+
+        # Ties go to the lower id, so results are stable.
+        return heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
@@ -0,0 +1,228 @@
+import copy
+from array import array
+
+from covid.adapters.facet_index import rating_of
+from covid.adapters.indexes import MovieIndex, CopyOnWriteDict
+from covid.adapters.sorted_list import SortedList
+
+
+# Orders movies can be listed in. Static orders depend only on the movies; dynamic ones change as reviews arrive.
+STATIC_ORDERS = ('date', 'rating', 'runtime', 'title')
+DYNAMIC_ORDERS = ('review_count', 'review_average')
+SORT_ORDERS = STATIC_ORDERS + DYNAMIC_ORDERS
+
+
+def _static_key(order: str, movie):
+    # Best rated first; otherwise ascending. Ties go to the lower id.
+    if order == 'date':
+        return movie.date, movie.id
+    if order == 'rating':
+        rating = rating_of(movie)
+        return -(rating if rating is not None else 0.0), movie.id
+    if order == 'runtime':
+        return movie.runtime or 0, movie.id
+    return movie.title.casefold(), movie.id
+
+
+class SortIndex(MovieIndex):
+    # Movie ids in each of SORT_ORDERS, so that listing a page in any order is a slice.
+    #
+    # Static orders are permutations of the movie ids, sorted once when first asked for after the catalogue changes:
+    # loading the catalogue costs one sort per order rather than an insertion per movie. Dynamic orders are held in
+    # SortedLists of (key, id) entries, where a review moves its movie's entry with one removal and one insertion. A
+    # large batch of movies or reviews, such as loading the catalogue, rebuilds the dynamic orders with one sort each
+    # instead.
+
+    def __init__(self):
+        self._keys = {order: dict() for order in STATIC_ORDERS}
+        self._permutations = dict()
+        # movie id -> [review count, sum of review ratings]
+        self._reviews = CopyOnWriteDict()
+        self._dynamic = {order: SortedList() for order in DYNAMIC_ORDERS}
+        self._versions = dict.fromkeys(DYNAMIC_ORDERS, 0)
+
+    def __len__(self):
+        return len(self._reviews)
+
+    def add_movie(self, movie):
+        if movie.id in self._reviews:
+            self.remove_movie(movie)
+
+        for order, keys in self._keys.items():
+            keys[movie.id] = _static_key(order, movie)
+        self._permutations.clear()
+
+        self._reviews.writable(movie.id, _no_reviews)
+        for review in movie.reviews:
+            self._count(movie.id, review.rating)
+        self._add_entries(movie.id)
+
+    def add_movies(self, movies):
+        movies = list(movies)
+        if not self._is_bulk(len(movies)) or any(movie.id in self._reviews for movie in movies):
+            return super().add_movies(movies)
+        for movie in movies:
+            for order, keys in self._keys.items():
+                keys[movie.id] = _static_key(order, movie)
+            self._reviews.writable(movie.id, _no_reviews)
+            for review in movie.reviews:
+                self._count(movie.id, review.rating)
+        self._permutations.clear()
+        self._rebuild_dynamic()
+
+    def remove_movie(self, movie):
+        if movie.id not in self._reviews:
+            return
+        self._remove_entries(movie.id)
+        del self._reviews[movie.id]
+        for keys in self._keys.values():
+            del keys[movie.id]
+        self._permutations.clear()
+
+    def add_review(self, review):
+        movie_id = review.movie.id
+        if movie_id not in self._reviews:
+            return
+        self._remove_entries(movie_id)
+        self._count(movie_id, review.rating)
+        self._add_entries(movie_id)
+
+    def add_reviews(self, reviews):
+        reviews = [review for review in reviews if review.movie.id in self._reviews]
+        if not self._is_bulk(len(reviews)):
+            return super().add_reviews(reviews)
+        for review in reviews:
+            self._count(review.movie.id, review.rating)
+        self._rebuild_dynamic()
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked._keys = {order: dict(keys) for order, keys in self._keys.items()}
+        forked._permutations = dict(self._permutations)
+        forked._reviews = self._reviews.fork()
+        forked._dynamic = {order: entries.fork() for order, entries in self._dynamic.items()}
+        forked._versions = dict(self._versions)
+        return forked
+
+    def version(self, order: str) -> int:
+        # Changes whenever the order does, for keying cached results. Static orders change only with the catalogue.
+        return self._versions.get(order, 0)
+
+    def order(self, order: str):
+        # All movie ids in the order, as a sequence supporting len() and slicing.
+        if order in self._dynamic:
+            return _Ids(self._dynamic[order])
+        permutation = self._permutations.get(order)
+        if permutation is None:
+            keys = self._keys[order]
+            permutation = array('q', sorted(keys, key=keys.__getitem__))
+            self._permutations[order] = permutation
+        return permutation
+
+    def key(self, order: str, movie_id):
+        # The movie's position in the order, as a tuple ending with its id.
+        return self._key_function(order)(movie_id)
+
+    def seek(self, order: str, key=None, limit: int = 10, reverse: bool = False, accept=None):
+        # Returns up to limit ids that follow key in the order or, if reverse, precede it, nearest first, skipping those
+        # that accept rejects. A key of None seeks from the start, or from the end if reverse. The starting point is
+        # found by bisection, so a page deep in the order costs the same as the first one.
+        if order in self._dynamic:
+            entries = self._dynamic[order]
+            if key is None:
+                start = len(entries) if reverse else 0
+            else:
+                start = entries.bisect_left(tuple(key)) if reverse else entries.bisect_right(tuple(key))
+            movie_ids = (entry[-1] for entry in entries.islice(start, reverse))
+        else:
+            permutation = self.order(order)
+            if key is None:
+                start = len(permutation) if reverse else 0
+            else:
+                start = _bisect(permutation, tuple(key), self._keys[order].__getitem__, right=not reverse)
+            positions = range(start - 1, -1, -1) if reverse else range(start, len(permutation))
+            movie_ids = (permutation[i] for i in positions)
+
+        result = list()
+        if limit <= 0:
+            return result
+        for movie_id in movie_ids:
+            if accept is None or accept(movie_id):
+                result.append(movie_id)
+                if len(result) == limit:
+                    break
+        return result
+
+    def sort(self, movie_ids, order: str):
+        # Returns movie_ids, ids of indexed movies, in the order.
+        return sorted(movie_ids, key=self._key_function(order))
+
+    def _key_function(self, order: str):
+        if order in self._keys:
+            return self._keys[order].__getitem__
+        return lambda movie_id: self._entry(order, movie_id)
+
+    def _count(self, movie_id, rating):
+        stats = self._reviews.writable(movie_id)
+        stats[0] += 1
+        stats[1] += int(rating) if rating is not None else 0
+
+    def _entry(self, order: str, movie_id):
+        count, total = self._reviews[movie_id]
+        if order == 'review_count':
+            return -count, movie_id
+        return -(total / count if count else 0.0), -count, movie_id
+
+    def _add_entries(self, movie_id):
+        for order, entries in self._dynamic.items():
+            entries.add(self._entry(order, movie_id))
+            self._versions[order] += 1
+
+    def _is_bulk(self, changes: int) -> bool:
+        # Whether rebuilding the dynamic orders costs less than moving an entry per change.
+        return changes * 8 > len(self._reviews)
+
+    def _rebuild_dynamic(self):
+        for order in DYNAMIC_ORDERS:
+            self._dynamic[order] = SortedList(self._entry(order, movie_id) for movie_id in self._reviews)
+            self._versions[order] += 1
+
+    def _remove_entries(self, movie_id):
+        for order, entries in self._dynamic.items():
+            entries.remove(self._entry(order, movie_id))
+
+
+def _no_reviews():
+    return [0, 0]
+
+
+def _bisect(items, key, key_function, right: bool) -> int:
+    # bisect_left, or bisect_right if right, of key among the keys of items.
+    lo, hi = 0, len(items)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        mid_key = key_function(items[mid])
+        if mid_key < key or (right and mid_key == key):
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+class _Ids:
+    # The movie ids of a SortedList of (..., movie id) entries.
+    __slots__ = ('_entries',)
+
+    def __init__(self, entries: SortedList):
+        self._entries = entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __iter__(self):
+        return (entry[-1] for entry in self._entries)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [entry[-1] for entry in self._entries[index]]
+        return self._entries[index][-1]
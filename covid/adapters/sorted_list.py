@@ -0,0 +1,142 @@
+import copy
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain
+
+
+class SortedList:
+    # A list kept sorted under insertions and removals, stored as a list of sorted chunks of up to 2 * load items with
+    # the last item of each chunk alongside. Finding an item's chunk is a bisection over the chunk maxima, and inserting
+    # or removing it moves at most one chunk's worth of items, so updates stay cheap however long the list grows.
+    # Positional access walks the chunk lengths.
+
+    def __init__(self, iterable=(), load: int = 500):
+        self._load = load
+        items = sorted(iterable)
+        self._chunks = [items[i:i + load] for i in range(0, len(items), load)]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(items)
+        # id() of each chunk shared with a fork of the list, and to be copied before it's changed.
+        self._shared = set()
+
+    def fork(self):
+        # Returns a copy of the list sharing its chunks; each list copies a chunk the first time it changes it.
+        forked = copy.copy(self)
+        forked._chunks = list(self._chunks)
+        forked._maxes = list(self._maxes)
+        forked._shared = {id(chunk) for chunk in self._chunks}
+        self._shared = set(forked._shared)
+        return forked
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        return chain.from_iterable(self._chunks)
+
+    def __contains__(self, value):
+        i = bisect_left(self._maxes, value)
+        if i == len(self._maxes):
+            return False
+        chunk = self._chunks[i]
+        j = bisect_left(chunk, value)
+        return j < len(chunk) and chunk[j] == value
+
+    def add(self, value):
+        if not self._chunks:
+            self._chunks.append([value])
+            self._maxes.append(value)
+        else:
+            i = min(bisect_right(self._maxes, value), len(self._maxes) - 1)
+            chunk = self._writable(i)
+            insort(chunk, value)
+            self._maxes[i] = chunk[-1]
+            if len(chunk) > 2 * self._load:
+                self._chunks[i:i + 1] = [chunk[:self._load], chunk[self._load:]]
+                self._maxes[i:i + 1] = [chunk[self._load - 1], chunk[-1]]
+        self._len += 1
+
+    def remove(self, value):
+        i = bisect_left(self._maxes, value)
+        if i == len(self._maxes):
+            raise ValueError('{!r} not in list'.format(value))
+        chunk = self._chunks[i]
+        j = bisect_left(chunk, value)
+        if j == len(chunk) or chunk[j] != value:
+            raise ValueError('{!r} not in list'.format(value))
+        chunk = self._writable(i)
+        del chunk[j]
+        if chunk:
+            self._maxes[i] = chunk[-1]
+        else:
+            del self._chunks[i]
+            del self._maxes[i]
+        self._len -= 1
+
+    def bisect_left(self, value) -> int:
+        i = bisect_left(self._maxes, value)
+        if i == len(self._maxes):
+            return self._len
+        return self._offset(i) + bisect_left(self._chunks[i], value)
+
+    def bisect_right(self, value) -> int:
+        i = bisect_right(self._maxes, value)
+        if i == len(self._maxes):
+            return self._len
+        return self._offset(i) + bisect_right(self._chunks[i], value)
+
+    def islice(self, start: int = 0, reverse: bool = False):
+        # Iterates over the items from index start on or, if reverse, over those before it, nearest first.
+        offset = 0
+        for i, chunk in enumerate(self._chunks):
+            if offset + len(chunk) > start:
+                break
+            offset += len(chunk)
+        else:
+            i = len(self._chunks)
+        j = start - offset
+        if reverse:
+            if i < len(self._chunks):
+                yield from reversed(self._chunks[i][:j])
+            for chunk in reversed(self._chunks[:i]):
+                yield from reversed(chunk)
+        else:
+            if i < len(self._chunks):
+                yield from self._chunks[i][j:]
+            for chunk in self._chunks[i + 1:]:
+                yield from chunk
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._len)
+            if step != 1:
+                return list(self)[index]
+            return self._range(start, stop)
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError('SortedList index out of range')
+        return self._range(index, index + 1)[0]
+
+    def _writable(self, i: int):
+        # Chunk i, copied first if it's shared with a fork.
+        chunk = self._chunks[i]
+        if self._shared and id(chunk) in self._shared:
+            self._shared.discard(id(chunk))
+            chunk = self._chunks[i] = list(chunk)
+        return chunk
+
+    def _offset(self, i: int) -> int:
+        # The index of the first item of chunk i.
+        return sum(len(chunk) for chunk in self._chunks[:i])
+
+    def _range(self, start: int, stop: int):
+        items = list()
+        offset = 0
+        for chunk in self._chunks:
+            if offset >= stop:
+                break
+            end = offset + len(chunk)
+            if end > start:
+                items.extend(chunk[max(start - offset, 0):stop - offset])
+            offset = end
+        return items
@@ -0,0 +1,132 @@
+import copy
+from collections import Counter
+from itertools import combinations
+
+from covid.adapters.indexes import MovieIndex, CopyOnWriteDict
+from covid.adapters.search_index import tokenise
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    # Damerau-Levenshtein distance (optimal string alignment) between a and b, or max_distance + 1 if it exceeds
+    # max_distance. Only a band of width 2 * max_distance + 1 around the diagonal is computed.
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    too_far = max_distance + 1
+    previous_previous = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [too_far] * (len(b) + 1)
+        current[0] = i
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        for j in range(low, high + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            distance = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                distance = min(distance, previous_previous[j - 2] + 1)
+            current[j] = distance
+        if min(current[max(0, low - 1):high + 1]) > max_distance:
+            return too_far
+        previous_previous, previous = previous, current
+    return min(previous[len(b)], too_far)
+
+
+def _deletes(word: str, max_distance: int):
+    # word itself and every string made by deleting up to max_distance of its characters.
+    deletes = {word}
+    for count in range(1, min(max_distance, len(word)) + 1):
+        for positions in combinations(range(len(word)), count):
+            deletes.add(''.join(char for i, char in enumerate(word) if i not in positions))
+    return deletes
+
+
+class SpellingIndex(MovieIndex):
+    # Finds the title words within a small edit distance of a misspelt word, SymSpell style: every word is indexed
+    # under the strings made by deleting up to max_distance of its characters. Two words within that distance share a
+    # deletion, so a lookup generates the deletions of the query word and checks only the words indexed under them,
+    # instead of comparing the query with every word.
+    #
+    # Deletions are made from the first prefix_length characters of each word only, which bounds the index size; the
+    # candidates are then checked against the whole word.
+
+    def __init__(self, max_distance: int = 2, prefix_length: int = 7):
+        self._max_distance = max_distance
+        self._prefix_length = prefix_length
+        # word -> number of titles it appears in
+        self._counts = Counter()
+        # deletion of a word's prefix -> words
+        self._deletes = CopyOnWriteDict()
+        # movie id -> words of its title, for removing the movie
+        self._words = dict()
+
+    def __len__(self):
+        return len(self._counts)
+
+    def __contains__(self, word: str):
+        return word in self._counts
+
+    def add_movie(self, movie):
+        if movie.id in self._words:
+            self.remove_movie(movie)
+
+        words = tuple(set(tokenise(movie.title)))
+        self._words[movie.id] = words
+        for word in words:
+            if self._counts[word] == 0:
+                for delete in _deletes(word[:self._prefix_length], self._max_distance):
+                    self._deletes.writable(delete, set).add(word)
+            self._counts[word] += 1
+
+    def remove_movie(self, movie):
+        for word in self._words.pop(movie.id, ()):
+            self._counts[word] -= 1
+            if self._counts[word] == 0:
+                del self._counts[word]
+                for delete in _deletes(word[:self._prefix_length], self._max_distance):
+                    words = self._deletes.writable(delete)
+                    words.discard(word)
+                    if not words:
+                        del self._deletes[delete]
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked._counts = Counter(self._counts)
+        forked._deletes = self._deletes.fork()
+        forked._words = dict(self._words)
+        return forked
+
+    def lookup(self, word: str, max_distance: int = None):
+        # Returns the indexed words within max_distance of word as (word, distance) pairs, nearest first and, at the
+        # same distance, most common first.
+        if max_distance is None or max_distance > self._max_distance:
+            max_distance = self._max_distance
+        word = word.lower()
+        candidates = set()
+        for delete in _deletes(word[:self._prefix_length], max_distance):
+            candidates.update(self._deletes.get(delete, ()))
+
+        matches = list()
+        for candidate in candidates:
+            distance = edit_distance(word, candidate, max_distance)
+            if distance <= max_distance:
+                matches.append((candidate, distance))
+        matches.sort(key=lambda match: (match[1], -self._counts[match[0]], match[0]))
+        return matches
+
+    def correct(self, query: str):
+        # Returns query with each word that isn't in any title replaced by its nearest indexed word, or None if every
+        # word is already indexed or none can be corrected.
+        words = tokenise(query)
+        corrected = list()
+        changed = False
+        for word in words:
+            if word in self._counts or word.isdigit():
+                corrected.append(word)
+                continue
+            matches = self.lookup(word)
+            if matches:
+                corrected.append(matches[0][0])
+                changed = True
+            else:
+                corrected.append(word)
+        return ' '.join(corrected) if changed else None
@@ -0,0 +1,228 @@
+import copy
+import heapq
+import re
+from bisect import insort_left
+
+from covid.adapters.indexes import MovieIndex
+
+
+_WORD = re.compile(r'\w+')
+
+
+def normalise_title(title: str) -> str:
+    # Titles are matched ignoring case and punctuation: 'Guardians of the Galaxy Vol. 2' is 'guardians of the galaxy
+    # vol 2'.
+    return ' '.join(_WORD.findall(title.casefold())) if title else ''
+
+
+def _rank(movie):
+    try:
+        return -float(movie.rating)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class _Node:
+    __slots__ = ('edges', 'movie_ids', 'top', 'owner')
+
+    def __init__(self, owner):
+        # first character of label -> (label, child)
+        self.edges = dict()
+        # ids of movies with a key ending at this node
+        self.movie_ids = set()
+        # the best ranked (rank, movie id) entries in this subtree, best first
+        self.top = list()
+        # token of the index that may change the node in place; forks of an index share nodes until they change them
+        self.owner = owner
+
+    def copy(self, owner):
+        node = _Node(owner)
+        node.edges = dict(self.edges)
+        node.movie_ids = set(self.movie_ids)
+        node.top = list(self.top)
+        return node
+
+
+class TitleIndex(MovieIndex):
+    # Autocomplete over movie titles. Each title is keyed by its normalised form and by every suffix of it that starts
+    # at a word, so 'gal' suggests 'Guardians of the Galaxy'. Keys are held in a compressed trie, each edge labelled
+    # with a run of characters, and every node keeps the top_n best rated movies under it. A lookup walks the prefix
+    # and returns the node's list, so it costs O(len(prefix)) however many titles match.
+    #
+    # A fork of the index shares its trie. Each copies a node, and the path down to it, before changing it, so a
+    # change costs the length of the keys it touches rather than the size of the trie.
+
+    def __init__(self, top_n: int = 10):
+        self._top_n = top_n
+        self._owner = object()
+        self._root = _Node(self._owner)
+        # movie id -> (rank, movie id) and keys, for removing the movie
+        self._entries = dict()
+        self._keys = dict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def add_movie(self, movie):
+        if movie.id in self._entries:
+            self.remove_movie(movie)
+
+        entry = (_rank(movie), movie.id)
+        keys = self._title_keys(movie.title)
+        self._entries[movie.id] = entry
+        self._keys[movie.id] = keys
+        for key in keys:
+            for node in self._insert(key):
+                self._offer(node, entry)
+            # The node the key ends at lists the movie too.
+            node = self._writable_path(key)[-1]
+            node.movie_ids.add(movie.id)
+            self._offer(node, entry)
+
+    def remove_movie(self, movie):
+        entry = self._entries.pop(movie.id, None)
+        if entry is None:
+            return
+        keys = self._keys.pop(movie.id)
+        paths = [self._writable_path(key) for key in keys]
+        for path in paths:
+            path[-1].movie_ids.discard(movie.id)
+        # Rebuild the lists the movie was in, bottom up. A node on the paths of several keys is rebuilt once per path;
+        # the last rebuild sees all its children up to date.
+        for path in paths:
+            for node in reversed(path):
+                if entry in node.top:
+                    self._rebuild(node)
+        for path in paths:
+            self._prune(path)
+
+    def fork(self):
+        forked = copy.copy(self)
+        forked._entries = dict(self._entries)
+        forked._keys = dict(self._keys)
+        # Neither index may now change the shared nodes in place.
+        forked._owner = object()
+        self._owner = object()
+        return forked
+
+    def suggest(self, prefix: str, limit: int = 10):
+        # Returns the ids of up to limit of the best rated movies with a title, or a word of the title onwards, that
+        # starts with prefix.
+        prefix = normalise_title(prefix)
+        if not prefix:
+            return []
+        node = self._root
+        i = 0
+        while i < len(prefix):
+            edge = node.edges.get(prefix[i])
+            if edge is None:
+                return []
+            label, child = edge
+            remaining = prefix[i:i + len(label)]
+            if not label.startswith(remaining):
+                return []
+            node = child
+            i += len(label)
+        return [movie_id for rank, movie_id in node.top[:limit]]
+
+    def scan(self, movies, prefix: str, limit: int = 10):
+        # suggest(), answered by scanning movies rather than the trie, for use while the index is being built.
+        prefix = normalise_title(prefix)
+        if not prefix:
+            return []
+        entries = [(_rank(movie), movie.id) for movie in movies
+                   if any(key.startswith(prefix) for key in self._title_keys(movie.title))]
+        return [movie_id for rank, movie_id in heapq.nsmallest(limit, entries)]
+
+    def _title_keys(self, title: str):
+        words = normalise_title(title).split(' ')
+        return tuple(dict.fromkeys(' '.join(words[i:]) for i in range(len(words)) if words[i]))
+
+    def _insert(self, key: str):
+        # Adds the key's path to the trie, splitting an edge where the key leaves it, and returns the nodes above the
+        # key's node. The nodes on the path are the index's own.
+        node = self._writable_root()
+        path = [node]
+        i = 0
+        while i < len(key):
+            edge = node.edges.get(key[i])
+            if edge is None:
+                child = _Node(self._owner)
+                node.edges[key[i]] = (key[i:], child)
+                return path
+            label, child = edge
+            common = 0
+            while common < len(label) and i + common < len(key) and label[common] == key[i + common]:
+                common += 1
+            if common < len(label):
+                middle = _Node(self._owner)
+                middle.edges[label[common]] = (label[common:], child)
+                middle.top = list(child.top)
+                node.edges[key[i]] = (label[:common], middle)
+                child = middle
+            else:
+                child = self._writable_child(node, key[i])
+            node = child
+            i += common
+            if i < len(key):
+                path.append(node)
+        return path
+
+    def _path(self, key: str):
+        node = self._root
+        path = [node]
+        i = 0
+        while i < len(key):
+            label, node = node.edges[key[i]]
+            path.append(node)
+            i += len(label)
+        return path
+
+    def _writable_path(self, key: str):
+        # _path(key), with any node on it shared with another fork replaced by a copy.
+        node = self._writable_root()
+        path = [node]
+        i = 0
+        while i < len(key):
+            label = node.edges[key[i]][0]
+            node = self._writable_child(node, key[i])
+            path.append(node)
+            i += len(label)
+        return path
+
+    def _writable_root(self):
+        if self._root.owner is not self._owner:
+            self._root = self._root.copy(self._owner)
+        return self._root
+
+    def _writable_child(self, node, first: str):
+        # The child of node, one of the index's own, on the edge starting with first, copied if it's shared.
+        label, child = node.edges[first]
+        if child.owner is not self._owner:
+            child = child.copy(self._owner)
+            node.edges[first] = (label, child)
+        return child
+
+    def _offer(self, node, entry):
+        if entry in node.top:
+            return
+        if len(node.top) < self._top_n or entry < node.top[-1]:
+            insort_left(node.top, entry)
+            del node.top[self._top_n:]
+
+    def _rebuild(self, node):
+        entries = {self._entries[movie_id] for movie_id in node.movie_ids}
+        for label, child in node.edges.values():
+            entries.update(child.top)
+        node.top = sorted(entries)[:self._top_n]
+
+    def _prune(self, path):
+        # Drops nodes left with neither movies nor children.
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.movie_ids or node.edges:
+                break
+            parent = path[depth - 1]
+            for first, (label, child) in list(parent.edges.items()):
+                if child is node:
+                    del parent.edges[first]
@@ -0,0 +1,96 @@
+from flask import Blueprint, request, jsonify, abort, Response
+from werkzeug.exceptions import HTTPException
+
+import covid.adapters.repository as repo
+import covid.api.services as services
+from covid.adapters.sort_index import SORT_ORDERS
+from covid.utilities.cursors import InvalidCursorException
+
+
+# Configure Blueprint. The API is read-only, and versioned by its url prefix.
+api_blueprint = Blueprint(
+    'api_bp', __name__, url_prefix='/api/v1')
+
+# Most movies fetched by one batch request, or listed on one page.
+MAX_BATCH_SIZE = 100
+MAX_PAGE_SIZE = 100
+
+
+@api_blueprint.route('/movies', methods=['GET'])
+def movies():
+    # With ids, the movies with those ids, in that order. Otherwise a page of a listing: the movies matching the search
+    # s, or of the genre g (every movie by default) in the sort order (date by default), continued with cursor.
+    fields = _fields()
+
+    if 'ids' in request.args:
+        try:
+            movie_ids = [int(movie_id) for movie_id in request.args.get('ids').split(',') if movie_id.strip()]
+        except ValueError:
+            abort(400, 'ids must be a comma separated list of integers')
+        if len(movie_ids) > MAX_BATCH_SIZE:
+            abort(400, 'At most {} ids may be fetched at once'.format(MAX_BATCH_SIZE))
+        return _json(b'{"movies":' + services.get_movies_json(movie_ids, fields, repo.repo_instance) + b'}')
+
+    s = request.args.get('s')
+    genre_name = request.args.get('g', 'all')
+    sort = request.args.get('sort', 'date')
+    cursor = request.args.get('cursor')
+    limit = min(max(request.args.get('limit', 20, type=int), 1), MAX_PAGE_SIZE)
+    if sort not in SORT_ORDERS:
+        abort(400, 'sort must be one of {}'.format(', '.join(SORT_ORDERS)))
+
+    try:
+        if s is not None:
+            movie_ids, previous_cursor, next_cursor = services.search_movie_ids(
+                s, genre_name, cursor, limit, repo.repo_instance)
+        else:
+            movie_ids, previous_cursor, next_cursor = services.get_movie_ids_page(
+                genre_name, sort, cursor, limit, repo.repo_instance)
+    except InvalidCursorException:
+        abort(400, 'Invalid cursor')
+
+    movies_json = services.get_movies_json(movie_ids, fields, repo.repo_instance)
+    return _json(services.page_json(movies_json, previous_cursor, next_cursor))
+
+
+@api_blueprint.route('/movies/<int:movie_id>', methods=['GET'])
+def movie(movie_id):
+    try:
+        return _json(services.get_movie_json(movie_id, _fields(), repo.repo_instance))
+    except services.NonExistentMovieException:
+        abort(404, 'No movie with id {}'.format(movie_id))
+
+
+@api_blueprint.route('/movies/<int:movie_id>/reviews', methods=['GET'])
+def reviews_for_movie(movie_id):
+    try:
+        reviews = services.get_reviews_for_movie(movie_id, repo.repo_instance)
+    except services.NonExistentMovieException:
+        abort(404, 'No movie with id {}'.format(movie_id))
+
+    return jsonify({'movie_id': movie_id, 'reviews': reviews})
+
+
+@api_blueprint.route('/genres', methods=['GET'])
+def genres():
+    return jsonify({'genres': services.get_genre_names(repo.repo_instance)})
+
+
+@api_blueprint.errorhandler(HTTPException)
+def error(exception: HTTPException):
+    # Errors are reported as JSON too.
+    response = jsonify({'error': exception.description})
+    response.status_code = exception.code
+    return response
+
+
+def _fields():
+    # The sparse fieldset asked for with fields, e.g. fields=title,rating.
+    try:
+        return services.parse_fields(request.args.get('fields'))
+    except services.UnknownFieldException as exception:
+        abort(400, str(exception))
+
+
+def _json(body: bytes):
+    return Response(body, mimetype='application/json')
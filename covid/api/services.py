@@ -0,0 +1,142 @@
+import json
+from typing import Iterable
+
+from covid.adapters.facet_index import MovieFilter, rating_of
+from covid.adapters.repository import AbstractRepository
+from covid.domain.model import Movie, Review
+import covid.home.services as home_services
+import covid.utilities.cursors as cursors
+from covid.utilities.fragment_cache import fragment_cache
+
+
+# Fields of a movie in API responses, in the order they are written. Reviews are only included when asked for.
+MOVIE_FIELDS = ('id', 'title', 'date', 'first_para', 'image_hyperlink', 'back_hyperlink', 'runtime', 'rating',
+                'director', 'actors', 'genres', 'review_count', 'reviews')
+DEFAULT_FIELDS = tuple(field for field in MOVIE_FIELDS if field != 'reviews')
+
+# Search results are ranked, not keyed, so their cursors hold an offset into the (cached) results.
+SEARCH_ORDER = 'relevance'
+
+
+class NonExistentMovieException(Exception):
+    pass
+
+
+class UnknownFieldException(Exception):
+    pass
+
+
+def parse_fields(fields: str):
+    # Returns the fields named in the comma separated fields, in MOVIE_FIELDS order, or DEFAULT_FIELDS if fields is
+    # None. id is always included.
+    if fields is None:
+        return DEFAULT_FIELDS
+    names = {name.strip() for name in fields.split(',') if name.strip()}
+    unknown = names.difference(MOVIE_FIELDS)
+    if unknown:
+        raise UnknownFieldException('Unknown fields: {}'.format(', '.join(sorted(unknown))))
+    names.add('id')
+    return tuple(field for field in MOVIE_FIELDS if field in names)
+
+
+def get_movies_json(movie_ids: Iterable[int], fields, repo: AbstractRepository) -> bytes:
+    # Returns the movies with the given ids, as a JSON array in the order of movie_ids. Ids of no movie are left out.
+    movies = repo.get_movies_by_id(list(movie_ids))
+    return b'[' + b','.join(movie_json(movie, fields) for movie in movies) + b']'
+
+
+def get_movie_json(movie_id: int, fields, repo: AbstractRepository) -> bytes:
+    movies = repo.get_movies_by_id([movie_id])
+    if not movies:
+        raise NonExistentMovieException
+    return movie_json(movies[0], fields)
+
+
+def get_reviews_for_movie(movie_id: int, repo: AbstractRepository):
+    movies = repo.get_movies_by_id([movie_id])
+    if not movies:
+        raise NonExistentMovieException
+    return [review_to_dict(review) for review in movies[0].reviews]
+
+
+def get_genre_names(repo: AbstractRepository):
+    return [genre.genre_name for genre in repo.get_genres()]
+
+
+def get_movie_ids_page(genre_name: str, sort: str, cursor: str, limit: int, repo: AbstractRepository):
+    # A page of the genre's movies, or every movie if genre_name is 'all', and cursors for the previous and next pages.
+    movie_filter = MovieFilter() if genre_name == 'all' else MovieFilter(genres=[genre_name])
+    movie_ids, previous_cursor, next_cursor, _ = cursors.get_movie_ids_page(movie_filter, sort, cursor, limit, repo)
+    return movie_ids, previous_cursor, next_cursor
+
+
+def search_movie_ids(s: str, genre_name: str, cursor: str, limit: int, repo: AbstractRepository):
+    # A page of the movies matching the search, best first, and cursors for the previous and next pages.
+    offset = 0
+    if cursor is not None:
+        key, _ = cursors.decode_cursor(cursor, SEARCH_ORDER)
+        if not key or not isinstance(key[0], int) or key[0] < 0:
+            raise cursors.InvalidCursorException
+        offset = key[0]
+
+    movie_ids = home_services.get_movie_ids_for_genre(s, genre_name, repo)
+    previous_cursor = next_cursor = None
+    if offset > 0:
+        previous_cursor = cursors.encode_cursor(SEARCH_ORDER, [max(offset - limit, 0)])
+    if offset + limit < len(movie_ids):
+        next_cursor = cursors.encode_cursor(SEARCH_ORDER, [offset + limit])
+    return list(movie_ids[offset:offset + limit]), previous_cursor, next_cursor
+
+
+def page_json(movies: bytes, previous_cursor: str, next_cursor: str) -> bytes:
+    return b''.join((
+        b'{"movies":', movies,
+        b',"previous":', _dumps(previous_cursor),
+        b',"next":', _dumps(next_cursor),
+        b'}'))
+
+
+# ============================================
+# Serialisation of movies
+# ============================================
+
+def movie_json(movie: Movie, fields) -> bytes:
+    # Each field of a movie is encoded once per version of the movie and kept in the fragment cache, so a response is
+    # assembled by joining bytes, whichever fields are asked for.
+    fragments = fragment_cache.get_or_render('api_movie', movie.id, movie.version, lambda: movie_fragments(movie))
+    return b'{' + b','.join(fragments[field] for field in fields) + b'}'
+
+
+def movie_fragments(movie: Movie):
+    # Each field of the movie as a '"name":value' JSON fragment, by name.
+    values = {
+        'id': movie.id,
+        'title': movie.title,
+        'date': movie.date.isoformat() if movie.date else None,
+        'first_para': movie.first_para,
+        'image_hyperlink': movie.image_hyperlink,
+        'back_hyperlink': movie.back_hyperlink,
+        'runtime': movie.runtime,
+        'rating': rating_of(movie),
+        'director': movie.director,
+        'actors': movie.actors,
+        'genres': [genre.genre_name for genre in movie.genres],
+        'review_count': movie.number_of_reviews,
+        'reviews': [review_to_dict(review) for review in movie.reviews]
+    }
+    return {field: _dumps(field) + b':' + _dumps(value) for field, value in values.items()}
+
+
+def review_to_dict(review: Review):
+    review_dict = {
+        'username': review.user.username if review.user else None,
+        'movie_id': review.movie.id,
+        'review_text': review.review,
+        'rating': review.rating,
+        'timestamp': review.timestamp.isoformat()
+    }
+    return review_dict
+
+
+def _dumps(value) -> bytes:
+    return json.dumps(value, separators=(',', ':')).encode('utf-8')
@@ -1,11 +1,5 @@
 from flask import Blueprint, render_template, redirect, url_for, session, request
 
-from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, SubmitField
-from wtforms.validators import DataRequired, Length, ValidationError
-
-from password_validator import PasswordValidator
-
 from functools import wraps
 
 import covid.utilities.utilities as utilities
@@ -16,9 +10,12 @@ import covid.adapters.repository as repo
 authentication_blueprint = Blueprint(
     'authentication_bp', __name__, url_prefix='/authentication')
 
+SERVER_BUSY_MESSAGE = 'The server is busy - please try again in a moment'
+
 
 @authentication_blueprint.route('/register', methods=['GET', 'POST'])
 def register():
+    from covid.authentication.forms import RegistrationForm
     form = RegistrationForm()
     username_not_unique = None
 
@@ -32,6 +29,16 @@ def register():
             return redirect(url_for('authentication_bp.login'))
         except services.NameNotUniqueException:
             username_not_unique = 'Your username is already taken - please supply another'
+        except services.HashingOverloadedException:
+            # Too many passwords are being hashed already; ask the user to retry rather than queue the request.
+            return render_template(
+                'authentication/credentials.html',
+                title='Register',
+                form=form,
+                username_error_message=SERVER_BUSY_MESSAGE,
+                handler_url=url_for('authentication_bp.register'),
+                genre_urls=utilities.get_genres_and_urls()
+            ), 503
 
     # For a GET or a failed POST request, return the Registration Web page.
     return render_template(
@@ -46,6 +53,7 @@ def register():
 
 @authentication_blueprint.route('/login', methods=['GET', 'POST'])
 def login():
+    from covid.authentication.forms import LoginForm
     form = LoginForm()
     username_not_recognised = None
     password_does_not_match_username = None
@@ -72,13 +80,27 @@ def login():
             # Authentication failed, set a suitable error message.
             password_does_not_match_username = 'Password does not match supplied username - please check and try again'
 
+        except services.HashingOverloadedException:
+            # Too many passwords are being checked already; ask the user to retry rather than queue the request.
+            return render_template(
+                'authentication/credentials.html',
+                title='Login',
+                username_error_message=None,
+                password_error_message=SERVER_BUSY_MESSAGE,
+                form=form,
+                handler_url=url_for('authentication_bp.login'),
+                genre_urls=utilities.get_genres_and_urls()
+            ), 503
+
     # For a GET or a failed POST, return the Login Web page.
     return render_template(
         'authentication/credentials.html',
         title='Login',
         username_error_message=username_not_recognised,
         password_error_message=password_does_not_match_username,
-        form=form
+        form=form,
+        handler_url=url_for('authentication_bp.login'),
+        genre_urls=utilities.get_genres_and_urls()
     )
 
 
@@ -95,39 +117,3 @@ def login_required(view):
             return redirect(url_for('authentication_bp.login'))
         return view(**kwargs)
     return wrapped_view
-
-
-class PasswordValid:
-    def __init__(self, message=None):
-        if not message:
-            message = u'Your password must be at least 8 characters, and contain an upper case letter, \
-            a lower case letter and a digit'
-        self.message = message
-
-    def __call__(self, form, field):
-        schema = PasswordValidator()
-        schema \
-            .min(8) \
-            .has().uppercase() \
-            .has().lowercase() \
-            .has().digits()
-        if not schema.validate(field.data):
-            raise ValidationError(self.message)
-
-
-class RegistrationForm(FlaskForm):
-    username = StringField('Username', [
-        DataRequired(message='Your username is required'),
-        Length(min=3, message='Your username is too short')])
-    password = PasswordField('Password', [
-        DataRequired(message='Your password is required'),
-        PasswordValid()])
-    submit = SubmitField('Register')
-
-
-class LoginForm(FlaskForm):
-    username = StringField('Username', [
-        DataRequired()])
-    password = PasswordField('Password', [
-        DataRequired()])
-    submit = SubmitField('Login')
@@ -0,0 +1,45 @@
+# Forms are imported by the views that use them, on first use, so that wtforms is only loaded when a form is needed.
+from flask_wtf import FlaskForm
+from wtforms import StringField, PasswordField, SubmitField
+from wtforms.validators import DataRequired, Length, ValidationError
+
+from password_validator import PasswordValidator
+
+
+# Built once, rather than for every password checked.
+PASSWORD_SCHEMA = PasswordValidator()
+PASSWORD_SCHEMA \
+    .min(8) \
+    .has().uppercase() \
+    .has().lowercase() \
+    .has().digits()
+
+
+class PasswordValid:
+    def __init__(self, message=None):
+        if not message:
+            message = u'Your password must be at least 8 characters, and contain an upper case letter, \
+            a lower case letter and a digit'
+        self.message = message
+
+    def __call__(self, form, field):
+        if not PASSWORD_SCHEMA.validate(field.data):
+            raise ValidationError(self.message)
+
+
+class RegistrationForm(FlaskForm):
+    username = StringField('Username', [
+        DataRequired(message='Your username is required'),
+        Length(min=3, message='Your username is too short')])
+    password = PasswordField('Password', [
+        DataRequired(message='Your password is required'),
+        PasswordValid()])
+    submit = SubmitField('Register')
+
+
+class LoginForm(FlaskForm):
+    username = StringField('Username', [
+        DataRequired()])
+    password = PasswordField('Password', [
+        DataRequired()])
+    submit = SubmitField('Login')
@@ -0,0 +1,106 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from threading import BoundedSemaphore
+
+import werkzeug.security
+
+
+# PBKDF2 with an explicit iteration count, so the cost of a hash doesn't change with the installed werkzeug version.
+DEFAULT_METHOD = 'pbkdf2:sha256:260000'
+
+
+class HashingOverloadedException(Exception):
+    pass
+
+
+class PasswordHasher:
+    # Hashes and checks passwords on a bounded pool of threads, so that a burst of logins or registrations can't tie up
+    # every request thread. PBKDF2 runs in hashlib with the GIL released, so the hashing threads run in parallel with
+    # each other and with requests being served.
+    #
+    # At most workers hashes run at once and at most queue_limit more wait for a thread. Past that, requests are
+    # rejected at once with HashingOverloadedException rather than queueing without bound.
+
+    def __init__(self, workers: int = None, queue_limit: int = 64, method: str = DEFAULT_METHOD,
+                 salt_length: int = 16):
+        self._workers = workers or os.cpu_count() or 1
+        self._queue_limit = queue_limit
+        self._start()
+        self.method = method
+        self.salt_length = salt_length
+
+    def _start(self):
+        self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix='password-hash')
+        self._admission = BoundedSemaphore(self._workers + self._queue_limit)
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    def generate_password_hash(self, password: str) -> str:
+        return self._run(werkzeug.security.generate_password_hash, password, self.method, self.salt_length)
+
+    def check_password_hash(self, password_hash: str, password: str) -> bool:
+        return self._run(werkzeug.security.check_password_hash, password_hash, password)
+
+    def generate_password_hashes(self, passwords):
+        # Hashes many passwords in parallel, bypassing the admission limit. For loading users at start-up.
+        return list(self._executor.map(
+            lambda password: werkzeug.security.generate_password_hash(password, self.method, self.salt_length),
+            passwords))
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _run(self, function, *args):
+        if not self._admission.acquire(blocking=False):
+            raise HashingOverloadedException
+        try:
+            future = self._executor.submit(self._admitted, function, *args)
+        except BaseException:
+            self._admission.release()
+            raise
+        return future.result()
+
+    def _admitted(self, function, *args):
+        try:
+            return function(*args)
+        finally:
+            self._admission.release()
+
+
+hasher = PasswordHasher()
+
+
+def init_app(app):
+    global hasher
+    previous = hasher
+    hasher = PasswordHasher(
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        queue_limit=app.config['PASSWORD_HASH_QUEUE_LIMIT'],
+        method=app.config['PASSWORD_HASH_METHOD'],
+        salt_length=app.config['PASSWORD_SALT_LENGTH']
+    )
+    previous.shutdown()
+
+
+def _after_fork_in_child():
+    # The pool's threads, started while loading users, don't survive a fork; a forked worker would otherwise queue
+    # hashes for threads that no longer exist.
+    hasher._start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def generate_password_hash(password: str) -> str:
+    return hasher.generate_password_hash(password)
+
+
+def check_password_hash(password_hash: str, password: str) -> bool:
+    return hasher.check_password_hash(password_hash, password)
+
+
+def generate_password_hashes(passwords):
+    return hasher.generate_password_hashes(passwords)
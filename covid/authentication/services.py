@@ -1,6 +1,6 @@
-from werkzeug.security import generate_password_hash, check_password_hash
-
 from covid.adapters.repository import AbstractRepository
+from covid.authentication import hashing
+from covid.authentication.hashing import HashingOverloadedException
 from covid.domain.model import User
 
 
@@ -22,8 +22,9 @@ def add_user(username: str, password: str, repo: AbstractRepository):
     if user is not None:
         raise NameNotUniqueException
 
-    # Encrypt password so that the database doesn't store passwords 'in the clear'.
-    password_hash = generate_password_hash(password)
+    # Encrypt password so that the database doesn't store passwords 'in the clear'. Hashing runs on the bounded
+    # hashing pool, and raises HashingOverloadedException if the pool is saturated.
+    password_hash = hashing.generate_password_hash(password)
 
     # Create and store the new User, with password encrypted.
     user = User(username, password_hash)
@@ -43,7 +44,7 @@ def authenticate_user(username: str, password: str, repo: AbstractRepository):
 
     user = repo.get_user(username)
     if user is not None:
-        authenticated = check_password_hash(user.password, password)
+        authenticated = hashing.check_password_hash(user.password, password)
     if not authenticated:
         raise AuthenticationException
 
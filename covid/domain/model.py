@@ -1,7 +1,13 @@
 from datetime import date, datetime
+from itertools import count
 from typing import List, Iterable
 
 
+# Source of entity versions. Versions are unique across all entities so a replacement object never reuses the version
+# of the object it replaces.
+_versions = count(1)
+
+
 class User:
     def __init__(
             self, username: str, password: str
@@ -25,6 +31,17 @@ class User:
     def add_review(self, review: 'Review'):
         self._reviews.append(review)
 
+    def has_review(self, review: 'Review') -> bool:
+        # Newest first: a review is checked just after it's added.
+        return any(item is review for item in reversed(self._reviews))
+
+    def replace_review(self, review: 'Review', replacement: 'Review'):
+        # Reviews compare equal by content, so find this one by identity.
+        for index, item in enumerate(self._reviews):
+            if item is review:
+                self._reviews[index] = replacement
+                return
+
     def __repr__(self) -> str:
         return f'<User {self._username} {self._password}>'
 
@@ -36,11 +53,11 @@ class User:
 
 class Review:
     def __init__(
-            self, user: User, movie: 'Movie', review: str, rating: int):
+            self, user: User, movie: 'Movie', review: str, rating: int, timestamp: datetime = None):
         self._user: User = user
         self._movie: Movie = movie
         self._review: Review = review
-        self._timestamp: datetime = datetime.now()
+        self._timestamp: datetime = timestamp or datetime.now()
         self._rating = rating
 
     @property
@@ -84,11 +101,17 @@ class Movie:
         self._runtime: int = runtime
         self._director: str = director
         self._actors: list = actors
+        self._version: int = next(_versions)
 
     @property
     def id(self) -> int:
         return self._id
 
+    @property
+    def version(self) -> int:
+        # Changes whenever reviews or genres are added, for keying cached renderings of the Movie.
+        return self._version
+
     @property
     def director(self) -> str:
         return self._director
@@ -153,9 +176,14 @@ class Movie:
 
     def add_review(self, review: Review):
         self._reviews.append(review)
+        self._version = next(_versions)
+
+    def has_review(self, review: Review) -> bool:
+        return any(item is review for item in reversed(self._reviews))
 
     def add_genre(self, genre: 'Genre'):
         self._genres.append(genre)
+        self._version = next(_versions)
 
     def __repr__(self):
         return f'<Movie {self._date.isoformat()} {self._title}>'
@@ -200,6 +228,13 @@ class Genre:
     def add_movie(self, movie: Movie):
         self._genreged_movies.append(movie)
 
+    def remove_movie(self, movie: Movie):
+        # Movies compare equal by content, so find this one by identity.
+        for index, genreged_movie in enumerate(self._genreged_movies):
+            if genreged_movie is movie:
+                del self._genreged_movies[index]
+                return
+
     def __eq__(self, other):
         if not isinstance(other, Genre):
             return False
@@ -219,7 +254,8 @@ def make_review(user, movie, review_text, rating):
 
 
 def make_genre_association(movie: Movie, genre: Genre):
-    if genre.is_applied_to(movie):
+    # Asking the movie is a scan of its few genres; asking the genre would be a scan of all of its movies.
+    if movie.is_genreged_by(genre):
         raise ModelException(f'Genre {genre.genre_name} already applied to Movie "{movie.title}"')
 
     movie.add_genre(genre)
@@ -0,0 +1,59 @@
+import os
+
+import click
+from flask import Blueprint, Response, abort, current_app, request, session, stream_with_context
+
+import covid.adapters.repository as repo
+import covid.export.services as services
+
+
+# Configure Blueprint. Its CLI commands are registered at the top level, e.g. flask export.
+export_blueprint = Blueprint(
+    'export_bp', __name__, cli_group=None)
+
+MIMETYPES = {'csv': 'text/csv; charset=utf-8', 'ndjson': 'application/x-ndjson'}
+
+
+@export_blueprint.route('/export/<dataset>.<format>', methods=['GET'])
+def export(dataset, format):
+    # Streams a whole dataset, e.g. /export/reviews.ndjson, gzipped on the fly if the client accepts it. Restricted to
+    # the users listed in EXPORT_ADMINS.
+    if session.get('username') not in _split(current_app.config.get('EXPORT_ADMINS', '')):
+        abort(403)
+    if dataset not in services.DATASETS or format not in services.FORMATS:
+        abort(404)
+
+    compress = request.accept_encodings['gzip'] > 0
+    chunks = services.stream(dataset, format, repo.repo_instance, compress)
+    response = Response(stream_with_context(chunks), mimetype=MIMETYPES[format])
+    response.headers['Content-Disposition'] = 'attachment; filename="{}"'.format(services.filename(dataset, format))
+    response.headers['Vary'] = 'Accept-Encoding'
+    if compress:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+
+@export_blueprint.cli.command('export')
+@click.argument('directory', type=click.Path(file_okay=False))
+@click.option('--format', 'format', type=click.Choice(services.FORMATS), default='csv', show_default=True)
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip each file.')
+@click.option('--dataset', 'datasets', type=click.Choice(services.DATASETS), multiple=True,
+              help='Dataset to export; may be repeated. Defaults to all of them.')
+def export_command(directory, format, compress, datasets):
+    """Write the catalogue, users and reviews to DIRECTORY.
+
+    An uncompressed CSV export can be loaded back with populate(DIRECTORY, repository).
+    """
+    os.makedirs(directory, exist_ok=True)
+    for dataset in datasets or services.DATASETS:
+        path = os.path.join(directory, services.filename(dataset, format, compress))
+        with open(path, 'wb') as outfile:
+            for chunk in services.stream(dataset, format, repo.repo_instance, compress):
+                outfile.write(chunk)
+        click.echo(path)
+
+
+def _split(value):
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return list(value or ())
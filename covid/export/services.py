@@ -0,0 +1,145 @@
+import csv
+import io
+import json
+import zlib
+
+from covid.adapters.data_generator import MOVIES_FILE, USERS_FILE, REVIEWS_FILE, MOVIE_HEADER, USER_HEADER, \
+    REVIEW_HEADER
+from covid.adapters.facet_index import MovieFilter
+from covid.adapters.repository import AbstractRepository
+
+
+# What can be exported, and the formats it can be exported in.
+DATASETS = ('movies', 'genres', 'users', 'reviews')
+FORMATS = ('csv', 'ndjson')
+
+# CSV exports use the files and columns read by memory_repository.populate(), so an export of movies, users and reviews
+# can be loaded back. Genres travel with the movies there; genres.csv is for analytics only.
+GENRES_FILE = 'genres.csv'
+GENRE_HEADER = ['name', 'movie-count']
+CSV_FILES = {'movies': MOVIES_FILE, 'genres': GENRES_FILE, 'users': USERS_FILE, 'reviews': REVIEWS_FILE}
+CSV_HEADERS = {'movies': MOVIE_HEADER, 'genres': GENRE_HEADER, 'users': USER_HEADER, 'reviews': REVIEW_HEADER}
+
+# Number of movies fetched from the repository, and of rows written, at a time.
+BATCH_SIZE = 500
+
+
+class UnknownDatasetException(Exception):
+    pass
+
+
+def filename(dataset: str, format: str, compress: bool = False) -> str:
+    name = CSV_FILES[dataset] if format == 'csv' else dataset + '.ndjson'
+    return name + '.gz' if compress else name
+
+
+def stream(dataset: str, format: str, repo: AbstractRepository, compress: bool = False):
+    # Yields the dataset in the format as chunks of bytes, gzipped if compress. Rows are produced from the repository
+    # as they are written, so memory use doesn't grow with the size of the dataset.
+    if dataset not in DATASETS or format not in FORMATS:
+        raise UnknownDatasetException
+    records = _RECORDS[dataset](repo)
+    chunks = _csv_chunks(dataset, records) if format == 'csv' else _ndjson_chunks(records)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def movie_records(repo: AbstractRepository):
+    # Movies in date order, walked a batch at a time from keyset positions, so movies added during the export don't
+    # shift those still to come.
+    key = None
+    while True:
+        movie_ids = repo.get_movie_ids_page(MovieFilter(), 'date', key, BATCH_SIZE)
+        if not movie_ids:
+            return
+        for movie in repo.get_movies_by_id(movie_ids):
+            yield {
+                'id': movie.id,
+                'title': movie.title,
+                'date': movie.date.isoformat() if movie.date else None,
+                'first_para': movie.first_para,
+                'image_hyperlink': movie.image_hyperlink,
+                'back_hyperlink': movie.back_hyperlink,
+                'runtime': movie.runtime,
+                'rating': movie.rating,
+                'director': movie.director,
+                'actors': movie.actors,
+                'genres': [genre.genre_name for genre in movie.genres]
+            }
+        key = repo.get_sort_key(movie_ids[-1], 'date')
+
+
+def genre_records(repo: AbstractRepository):
+    for genre in repo.get_genres():
+        yield {'name': genre.genre_name, 'movie_count': genre.number_of_genreged_movies}
+
+
+def user_records(repo: AbstractRepository):
+    # Password hashes are never exported. Usernames are unique, so they double as the ids reviews refer to.
+    for user in repo.get_users():
+        yield {'id': user.username, 'username': user.username}
+
+
+def review_records(repo: AbstractRepository):
+    for number, review in enumerate(repo.get_reviews(), start=1):
+        yield {
+            'id': number,
+            'user_id': review.user.username if review.user else None,
+            'movie_id': review.movie.id,
+            'review_text': review.review,
+            'timestamp': review.timestamp.isoformat(),
+            'rating': review.rating
+        }
+
+
+def _csv_row(dataset: str, record):
+    if dataset == 'movies':
+        return [
+            record['id'], record['title'], ','.join(record['genres']), record['first_para'], record['director'],
+            ','.join(record['actors']), record['date'][:4] if record['date'] else '', record['runtime'],
+            record['rating'], '', '', '', record['date'], record['back_hyperlink'], record['image_hyperlink']]
+    if dataset == 'genres':
+        return [record['name'], record['movie_count']]
+    if dataset == 'users':
+        return [record['id'], record['username'], '']
+    return [record['id'], record['user_id'], record['movie_id'], record['review_text'], record['timestamp'],
+            record['rating']]
+
+
+def _csv_chunks(dataset: str, records):
+    # Rows are written into one buffer that is emptied after each batch.
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADERS[dataset])
+    rows = 1
+    for record in records:
+        writer.writerow(_csv_row(dataset, record))
+        rows += 1
+        if rows >= BATCH_SIZE:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            rows = 0
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _ndjson_chunks(records):
+    lines = list()
+    for record in records:
+        lines.append(json.dumps(record, separators=(',', ':')))
+        if len(lines) >= BATCH_SIZE:
+            yield ('\n'.join(lines) + '\n').encode('utf-8')
+            lines = list()
+    if lines:
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+_RECORDS = {'movies': movie_records, 'genres': genre_records, 'users': user_records, 'reviews': review_records}
@@ -0,0 +1,20 @@
+from flask import Blueprint, current_app, jsonify
+
+import covid.adapters.repository as repo
+import covid.health.services as services
+
+
+# Configure Blueprint.
+health_blueprint = Blueprint(
+    'health_bp', __name__)
+
+
+@health_blueprint.route('/healthz/ready', methods=['GET'])
+def ready():
+    # 200 once the app should be sent traffic, 503 until then; the body reports the progress of the index builds.
+    required = services.get_required_indexes(current_app.config.get('READINESS_INDEXES', ''))
+    readiness = services.get_readiness(repo.repo_instance, required)
+    response = jsonify(readiness)
+    response.status_code = 200 if readiness['ready'] else 503
+    response.headers['Cache-Control'] = 'no-store'
+    return response
@@ -0,0 +1,28 @@
+from covid.adapters.repository import AbstractRepository
+
+
+def get_required_indexes(setting: str):
+    # The index names listed in READINESS_INDEXES, a comma-separated string.
+    return [name.strip() for name in setting.split(',') if name.strip()]
+
+
+def check_required_indexes(repo: AbstractRepository, required):
+    # Raises ValueError naming any required index that repo doesn't build in the background. Readiness waits only on
+    # indexes being built, so a misspelt name would otherwise be waited on by nothing.
+    indexes = repo.get_index_status()
+    unknown = [name for name in required if name not in indexes]
+    if indexes and unknown:
+        raise ValueError('Unknown READINESS_INDEXES %s; the indexes built in the background are %s' % (
+            ', '.join(unknown), ', '.join(indexes)))
+
+
+def get_readiness(repo: AbstractRepository, required=()):
+    # Returns whether the app is ready for traffic, and the build progress of each background index. The app is ready
+    # once the indexes named in required are built, or all of them if required is empty.
+    check_required_indexes(repo, required)
+    indexes = repo.get_index_status()
+    required = [name for name in required if name in indexes] or list(indexes)
+    return {
+        'ready': all(indexes[name]['ready'] for name in required),
+        'indexes': indexes
+    }
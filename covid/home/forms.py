@@ -0,0 +1,16 @@
+# Forms are imported by the views that use them, on first use, so that wtforms is only loaded when a form is needed.
+from flask_wtf import FlaskForm
+from wtforms import TextAreaField, HiddenField, SubmitField, SelectField
+from wtforms.validators import DataRequired, Length
+
+from covid.news.forms import ProfanityFree
+
+
+class ReviewForm(FlaskForm):
+    review = TextAreaField('Review', [
+        DataRequired(),
+        Length(min=4, message='Your review is too short'),
+        ProfanityFree(message='Your review must not contain profanity')])
+    rating = SelectField('Rating', [DataRequired()], choices=[(i, i) for i in range(1,11)])
+    movie_id = HiddenField("Movie id")
+    submit = SubmitField('Submit')
@@ -1,14 +1,13 @@
-from flask import Blueprint, render_template, request, jsonify, url_for, redirect, session
+from flask import Blueprint, render_template, request, jsonify, url_for, redirect, session, abort
 import random
 import json
 
-from flask_wtf import FlaskForm
-from wtforms import TextAreaField, HiddenField, SubmitField, IntegerField, SelectField
-from wtforms.validators import DataRequired, Length
-
 import covid.adapters.repository as repo
 import covid.utilities.utilities as utilities
 import covid.home.services as services
+from covid.adapters.facet_index import MovieFilter, RUNTIME_BANDS
+from covid.adapters.sort_index import SORT_ORDERS
+from covid.utilities.cursors import InvalidCursorException
 
 from covid.authentication.authentication import login_required
 
@@ -16,11 +15,14 @@ from covid.authentication.authentication import login_required
 home_blueprint = Blueprint(
     'home_bp', __name__)
 
+RUNTIME_BAND_NAMES = [name for name, shortest, longest in RUNTIME_BANDS]
+
 
 @home_blueprint.route('/', methods=['GET'])
 def home():
     # return redirect("/m?page=0", code=302)
-    return render_template('front.html', genre_urls=utilities.get_genres_and_urls())
+    return render_template('front.html', genre_urls=utilities.get_genres_and_urls(),
+                           genre_version=utilities.get_genre_version())
 
 
 @home_blueprint.route('/m', methods=['GET'])
@@ -53,38 +55,69 @@ def movies_by_genre():
     #     # Convert page from string to int.
     #     page = int(page)
 
-    # Retrieve movie ids for movies that are genreged with genre_name.
-    movie_ids = services.get_movie_ids_for_genre(s, genre_name, repo.repo_instance)
-    # print(movie_ids)
-    # Retrieve the batch of movies to display on the Web page.
+    movie_filter = _movie_filter()
+
+    sort = request.args.get('sort') if request.args.get('sort') in SORT_ORDERS else None
 
-    # print(movie_ids[page+movies_per_page:movies_per_page + movies_per_page])
-    # movies = services.get_movies_by_id(movie_ids[page*movies_per_page:movies_per_page + movies_per_page], repo.repo_instance)
-    movies = services.get_movies_by_id(movie_ids[page*movies_per_page:page*movies_per_page+movies_per_page], repo.repo_instance)
-    # print(movies)
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
     prev_movie_url = None
 
-    if page > 0:
-        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
-        prev_movie_url = url_for('home_bp.movies_by_genre', s=request.args.get('s'), g=genre_name, page=page - 1, id=request.args.get('id'))
-        first_movie_url = url_for('home_bp.movies_by_genre', s=request.args.get('s'), g=genre_name, id=request.args.get('id'))
-
-    if (page+1)*movies_per_page < len(movie_ids):
-        # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
-        next_movie_url = url_for('home_bp.movies_by_genre', s=request.args.get('s'), g=genre_name, page=page + 1, id=request.args.get('id'))
-
-        last_page = int(len(movie_ids) / movies_per_page)
-        if len(movie_ids) % movies_per_page == 0:
-            last_page -= movies_per_page
-        last_movie_url = url_for('home_bp.movies_by_genre', s=request.args.get('s'), g=genre_name, page=last_page, id=request.args.get('id'))
-
-    # Construct urls for viewing movie reviews and adding reviews.
-    for movie in movies:
-        movie['view_review_url'] = url_for('home_bp.movies_by_genre', s=request.args.get('s'), g=genre_name, page=page, view_reviews_for=movie['id'])
-        movie['add_review_url'] = url_for('home_bp.review_on_movie', movie=movie['id'])
+    if s is None:
+        # Listings are paged with cursors into the sort order, by date unless another order is chosen: a deep page is a
+        # seek, and pages don't shift as movies are added.
+        try:
+            movie_ids, prev_cursor, next_cursor, last_cursor = services.get_movie_ids_page(
+                movie_filter, sort or 'date', request.args.get('cursor'), movies_per_page, repo.repo_instance)
+        except InvalidCursorException:
+            abort(400)
+        movies = services.get_movies_by_id(movie_ids, repo.repo_instance)
+
+        if prev_cursor is not None:
+            prev_movie_url = _movies_url(cursor=prev_cursor)
+            first_movie_url = _movies_url()
+        if next_cursor is not None:
+            next_movie_url = _movies_url(cursor=next_cursor)
+            last_movie_url = _movies_url(cursor=last_cursor)
+    else:
+        # Search results are ranked by relevance and cached whole, so they are paged by offset.
+        if len(movie_filter.genres) > 1 or movie_filter != MovieFilter(genres=movie_filter.genres):
+            # Filter on the facets' bitsets.
+            movie_ids = services.get_movie_ids_for_filter(s, movie_filter, repo.repo_instance, sort)
+        else:
+            # Retrieve movie ids for movies that are genreged with genre_name.
+            movie_ids = services.get_movie_ids_for_genre(s, genre_name, repo.repo_instance, sort)
+
+        # Retrieve the batch of movies to display on the Web page.
+        movies = services.get_movies_by_id(
+            movie_ids[page*movies_per_page:page*movies_per_page+movies_per_page], repo.repo_instance)
+
+        if page > 0:
+            # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+            prev_movie_url = _movies_url(page=page - 1)
+            first_movie_url = _movies_url()
+
+        if (page+1)*movies_per_page < len(movie_ids):
+            # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
+            next_movie_url = _movies_url(page=page + 1)
+
+            last_page = int(len(movie_ids) / movies_per_page)
+            if len(movie_ids) % movies_per_page == 0:
+                last_page -= 1
+            last_movie_url = _movies_url(page=last_page)
+
+    facets = _facet_links(movie_filter, services.get_facet_counts(s, movie_filter, repo.repo_instance))
+
+    did_you_mean = None
+    did_you_mean_url = None
+    if s is not None:
+        did_you_mean = services.get_spelling_suggestion(s, genre_name, movie_ids, repo.repo_instance)
+        if did_you_mean is not None:
+            did_you_mean_url = url_for('home_bp.movies_by_genre', s=did_you_mean, g=genre_name)
+
+    # Movie cards are rendered from the fragment cache, keyed by movie version, and link through the page's click
+    # handler rather than per-movie urls, so no urls are built for them here.
     t = random.randint(1, 1000)
     if 'id' not in request.args:
         t=[random.randint(1, 1000)]
@@ -97,6 +130,7 @@ def movies_by_genre():
     return render_template(
         'home/home.html',
         genre_urls=utilities.get_genres_and_urls(),
+        genre_version=utilities.get_genre_version(),
         selected=choice,
         year_urls=utilities.get_year_and_urls(),
         genre=genre_name,
@@ -105,12 +139,40 @@ def movies_by_genre():
         last_movie_url=last_movie_url,
         prev_movie_url=prev_movie_url,
         next_movie_url=next_movie_url,
+        did_you_mean=did_you_mean,
+        facets=facets,
+        sort_urls=[(order, order == sort, _movies_url(sort=None if order == sort else order)) for order in SORT_ORDERS],
+        match_all_genres=movie_filter.match_all_genres,
+        match_url=_movies_url(match=None if movie_filter.match_all_genres else 'all'),
+        did_you_mean_url=did_you_mean_url,
         similar=random.choices(similar, k = 6),
         show_reviews_for_movie=movie_to_show_reviews
     )
 
 
 
+@home_blueprint.route('/m/explain', methods=['GET'])
+def explain_movies():
+    # The query plan for the /m page with the same query parameters, as JSON.
+    s = request.args.get('s')
+    movie_filter = _movie_filter()
+
+    return jsonify({
+        's': s,
+        'filter': repr(movie_filter),
+        'plan': services.explain_query(s, movie_filter, repo.repo_instance)
+    })
+
+
+@home_blueprint.route('/m/suggest', methods=['GET'])
+def title_suggestions():
+    # Autocomplete for the search box: the best rated movies with a title, or a word of it, starting with q.
+    prefix = request.args.get('q', '')
+    limit = min(request.args.get('limit', 10, type=int), 10)
+
+    return jsonify(services.get_title_suggestions(prefix, limit, repo.repo_instance))
+
+
 @home_blueprint.route('/review', methods=['GET', 'POST'])
 @login_required
 def review_on_movie():
@@ -120,6 +182,7 @@ def review_on_movie():
     # Create form. The form maintains state, e.g. when this method is called with a HTTP GET request and populates
     # the form with an movie id, when subsequently called with a HTTP POST request, the movie id remains in the
     # form.
+    from covid.home.forms import ReviewForm
     form = ReviewForm()
 
     if form.validate_on_submit():
@@ -162,6 +225,54 @@ def review_on_movie():
     )
 
 
+def _movie_filter():
+    # Reads the facet query parameters: several genres may be given, combined with match=all or any.
+    return MovieFilter(
+        genres=[name for name in request.args.getlist('g') if name != 'all'],
+        match_all_genres=request.args.get('match') == 'all',
+        year_from=request.args.get('year_from', type=int),
+        year_to=request.args.get('year_to', type=int),
+        min_rating=request.args.get('min_rating', type=float),
+        runtime=request.args.get('runtime') if request.args.get('runtime') in RUNTIME_BAND_NAMES else None
+    )
+
+
+def _movies_url(**changes):
+    # The url of the current movies page with the given query parameters changed, or removed if None, back on its first
+    # page unless a page or cursor is given.
+    args = request.args.to_dict(flat=False)
+    args.pop('page', None)
+    args.pop('cursor', None)
+    for name, value in changes.items():
+        if value is None:
+            args.pop(name, None)
+        else:
+            args[name] = value
+    return url_for('home_bp.movies_by_genre', **args)
+
+
+def _facet_links(movie_filter: MovieFilter, counts):
+    # Each facet value as (label, count, selected, url), the url toggling the value's selection.
+    genres = list(movie_filter.genres)
+    facets = {'genres': [], 'years': [], 'min_rating': [], 'runtime': []}
+    for name, count in counts['genres'].items():
+        selected = name in genres
+        toggled = [genre for genre in genres if genre != name] if selected else genres + [name]
+        facets['genres'].append((name, count, selected, _movies_url(g=toggled or None)))
+    for year, count in counts['years'].items():
+        selected = movie_filter.year_from == year and movie_filter.year_to == year
+        facets['years'].append((year, count, selected, _movies_url(
+            year_from=None if selected else year, year_to=None if selected else year)))
+    for threshold, count in counts['min_rating'].items():
+        selected = movie_filter.min_rating == threshold
+        facets['min_rating'].append(('{}+'.format(threshold), count, selected, _movies_url(
+            min_rating=None if selected else threshold)))
+    for band, count in counts['runtime'].items():
+        selected = movie_filter.runtime == band
+        facets['runtime'].append((band, count, selected, _movies_url(runtime=None if selected else band)))
+    return facets
+
+
 def like(c, l, q):
     d = []
     for i in l:
@@ -175,12 +286,3 @@ def like(c, l, q):
                         d.append(i)
                         break
     return d if len(d) > 0 else []
-
-
-class ReviewForm(FlaskForm):
-    review = TextAreaField('Review', [
-        DataRequired(),
-        Length(min=4, message='Your review is too short')])
-    rating = SelectField('Rating', [DataRequired()], choices=[(i, i) for i in range(1,11)])
-    movie_id = HiddenField("Movie id")
-    submit = SubmitField('Submit')
@@ -1,9 +1,18 @@
 from typing import List, Iterable
 
+from covid.adapters.facet_index import MovieFilter
 from covid.adapters.repository import AbstractRepository
 from covid.domain.model import make_review, Movie, Review, Genre
+import covid.utilities.cursors as cursors
+from covid.utilities.singleflight import SingleFlight, AsyncSingleFlight
 from datetime import date, datetime
 
+
+# In-flight searches, by repository and normalised (search string, genre).
+_searches = SingleFlight()
+_async_searches = AsyncSingleFlight()
+
+
 class NonExistentMovieException(Exception):
     pass
 
@@ -70,12 +79,72 @@ def get_movies_by_date(date, repo: AbstractRepository):
     return movies_dto, prev_date, next_date
 
 
-def get_movie_ids_for_genre(s, genre_name, repo: AbstractRepository):
-    movie_ids = repo.get_movie_ids_for_genre(s, genre_name)
+def normalise_search(s):
+    # Collapses runs of white space, and treats a blank search as no search.
+    if s is None:
+        return None
+    s = ' '.join(s.split())
+    return s if s else None
+
+
+def get_movie_ids_for_genre(s, genre_name, repo: AbstractRepository, sort: str = None):
+    # Identical searches arriving together, e.g. a popular search or a crawler, share one scan of the repository.
+    s = normalise_search(s)
+    movie_ids = _searches.do(
+        (id(repo), s, genre_name, sort), lambda: repo.get_movie_ids_for_genre(s, genre_name, sort))
 
     return movie_ids
 
 
+async def get_movie_ids_for_genre_async(s, genre_name, repo: AbstractRepository, sort: str = None):
+    # For asyncio servers: the scan runs on the default executor, and identical concurrent searches share it.
+    import asyncio
+
+    s = normalise_search(s)
+    loop = asyncio.get_running_loop()
+    movie_ids = await _async_searches.do(
+        (id(repo), s, genre_name, sort),
+        lambda: loop.run_in_executor(None, repo.get_movie_ids_for_genre, s, genre_name, sort))
+
+    return movie_ids
+
+
+def get_movie_ids_page(movie_filter: MovieFilter, sort: str, cursor: str, movies_per_page: int,
+                       repo: AbstractRepository):
+    return cursors.get_movie_ids_page(movie_filter, sort, cursor, movies_per_page, repo)
+
+
+def get_movie_ids_for_filter(s, movie_filter: MovieFilter, repo: AbstractRepository, sort: str = None):
+    return repo.get_movie_ids_for_filter(normalise_search(s), movie_filter, sort)
+
+
+def explain_query(s, movie_filter: MovieFilter, repo: AbstractRepository):
+    return repo.explain_query(normalise_search(s), movie_filter)
+
+
+def get_facet_counts(s, movie_filter: MovieFilter, repo: AbstractRepository):
+    return repo.get_facet_counts(normalise_search(s), movie_filter)
+
+
+def get_spelling_suggestion(s, genre_name, movie_ids, repo: AbstractRepository):
+    # A "did you mean" for a search whose results, movie_ids, are empty. The correction is only suggested if it finds
+    # movies in the genre, so scores better than the search as typed.
+    s = normalise_search(s)
+    if s is None or len(movie_ids) > 0:
+        return None
+
+    correction = repo.get_spelling_suggestion(s)
+    if correction is None or not repo.search_movies(correction, genre_name, 1):
+        return None
+    return correction
+
+
+def get_title_suggestions(prefix: str, limit: int, repo: AbstractRepository):
+    movies = repo.get_movies_by_id(repo.get_title_suggestions(prefix, limit))
+
+    return [suggestion_to_dict(movie) for movie in movies]
+
+
 def get_movies_by_id(id_list, repo: AbstractRepository):
     movies = repo.get_movies_by_id(id_list)
 
@@ -110,6 +179,7 @@ def get_reviews_for_movie(movie_id, repo: AbstractRepository):
 def moviepage_to_dict(movie: Movie):
     movie_dict = {
         'id': movie.id,
+        'version': movie.version,
         'title': movie.title,
         'image_hyperlink': movie.image_hyperlink
     }
@@ -120,6 +190,7 @@ def movie_to_dict(movie: Movie):
     print(movie)
     movie_dict = {
         'id': movie.id,
+        'version': movie.version,
         'date': movie.date.year,
         'title': movie.title,
         'first_para': movie.first_para,
@@ -146,6 +217,16 @@ def movie_to_dict_sim(movie: Movie):
     return movie_dict
 
 
+def suggestion_to_dict(movie: Movie):
+    suggestion_dict = {
+        'id': movie.id,
+        'title': movie.title,
+        'date': movie.date.year,
+        'rating': movie.rating
+    }
+    return suggestion_dict
+
+
 def movies_to_dict(movies: Iterable[Movie]):
     return [moviepage_to_dict(movie) for movie in movies]
 
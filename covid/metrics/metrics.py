@@ -0,0 +1,95 @@
+import hmac
+from functools import wraps
+from time import perf_counter
+
+from flask import Blueprint, Response, abort, current_app, request
+from jinja2 import Template
+
+import covid.metrics.services as services
+
+
+# Configure Blueprint.
+metrics_blueprint = Blueprint(
+    'metrics_bp', __name__)
+
+_REQUEST_START = 'covid.metrics.request_start'
+
+# Addresses allowed to read /metrics when no METRICS_TOKEN is set.
+_LOCAL_ADDRESSES = ('127.0.0.1', '::1')
+
+
+@metrics_blueprint.route('/metrics', methods=['GET'])
+def metrics():
+    # Restricted to scrapers sending 'Authorization: Bearer <METRICS_TOKEN>' or, if no token is set, to this host.
+    if not _may_read_metrics():
+        abort(403)
+    return Response(services.render_prometheus(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+
+def _may_read_metrics() -> bool:
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        return hmac.compare_digest(request.headers.get('Authorization', '').encode(), ('Bearer ' + token).encode())
+    return request.remote_addr in _LOCAL_ADDRESSES
+
+
+def init_app(app):
+    # Times every request by endpoint, and every template rendered by the app. Called before any template is loaded,
+    # so that all templates are created with the timed template class.
+    app.before_request(_start_request_timer)
+    app.after_request(_record_request)
+    app.jinja_env.template_class = TimedTemplate
+    app.register_blueprint(metrics_blueprint)
+
+
+def _start_request_timer():
+    request.environ[_REQUEST_START] = perf_counter()
+
+
+def _record_request(response):
+    start = request.environ.get(_REQUEST_START)
+    if start is not None:
+        endpoint = request.endpoint or 'unmatched'
+        services.registry.observe('covid_http_request_duration_seconds', endpoint, perf_counter() - start)
+        services.registry.increment('covid_http_requests_total', (endpoint, response.status_code))
+    return response
+
+
+class TimedTemplate(Template):
+
+    def render(self, *args, **kwargs):
+        start = perf_counter()
+        try:
+            return super().render(*args, **kwargs)
+        finally:
+            services.registry.observe('covid_template_render_duration_seconds', self.name, perf_counter() - start)
+
+
+class InstrumentedRepository:
+    # Wraps a repository so that each call of one of its public methods is timed. Attributes are looked up on the
+    # wrapped repository; a method's timing wrapper is created on first use and then cached on the instance.
+
+    def __init__(self, repository):
+        self.wrapped = repository
+
+    def __getattr__(self, name):
+        attribute = getattr(self.wrapped, name)
+        if name.startswith('_') or not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def timed(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return attribute(*args, **kwargs)
+            finally:
+                services.registry.observe('covid_repository_call_duration_seconds', name, perf_counter() - start)
+
+        self.__dict__[name] = timed
+        return timed
+
+
+def instrument_repository(repository):
+    if isinstance(repository, InstrumentedRepository):
+        return repository
+    return InstrumentedRepository(repository)
@@ -0,0 +1,156 @@
+import os
+import sys
+from collections import Counter
+from itertools import count
+from threading import Condition, Thread, get_ident
+
+from flask import Blueprint, Response, abort, request, session
+
+
+# Configure Blueprint.
+profiler_blueprint = Blueprint(
+    'profiler_bp', __name__)
+
+_PROFILED = 'covid.profiler.profiled'
+
+
+class StackSampler:
+    # Samples the stacks of the threads handling profiled requests at a fixed interval, from a single background
+    # thread, and aggregates them as collapsed stacks: 'frame;frame;frame' -> number of samples. The background thread
+    # is started on the first profiled request and sleeps whenever no profiled request is in progress.
+
+    def __init__(self, interval: float = 0.005):
+        self._interval = interval
+        self._active = dict()
+        self._stacks = Counter()
+        self._condition = Condition()
+        self._thread = None
+        self.samples = 0
+
+    def begin(self, thread_id: int, label: str):
+        with self._condition:
+            self._active[thread_id] = label
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='stack-sampler', daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def end(self, thread_id: int):
+        with self._condition:
+            self._active.pop(thread_id, None)
+
+    def collapsed(self):
+        # Returns the aggregated stacks in the collapsed format read by flamegraph.pl and speedscope, one stack per
+        # line, most frequent first.
+        with self._condition:
+            stacks = self._stacks.most_common()
+        return ''.join('%s %d\n' % (stack, samples) for stack, samples in stacks)
+
+    def reset(self):
+        with self._condition:
+            self._stacks.clear()
+            self.samples = 0
+
+    def sample(self):
+        with self._condition:
+            active = dict(self._active)
+        if not active:
+            return
+        frames = sys._current_frames()
+        for thread_id, label in active.items():
+            frame = frames.get(thread_id)
+            if frame is None:
+                continue
+            stack = list()
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.append(label)
+            stack.reverse()
+            with self._condition:
+                self._stacks[';'.join(stack)] += 1
+                self.samples += 1
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._active:
+                    self._condition.wait()
+                self._condition.wait(self._interval)
+            self.sample()
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    directory, filename = os.path.split(code.co_filename)
+    return '%s/%s:%s' % (os.path.basename(directory), filename, code.co_name)
+
+
+class RequestSelector:
+    # Decides which requests are profiled: every Nth request, requests to the listed endpoints, and requests from
+    # profiler admins carrying the trigger query parameter.
+
+    def __init__(self, every_n: int = 0, endpoints=(), query_parameter: str = None, admins=()):
+        self._every_n = every_n
+        self._counter = count(1)
+        self._endpoints = frozenset(endpoints)
+        self._query_parameter = query_parameter
+        self._admins = frozenset(admins)
+
+    def is_admin(self, username):
+        return username is not None and username in self._admins
+
+    def selects(self, endpoint, args, username):
+        if endpoint in self._endpoints:
+            return True
+        if self._query_parameter and self._query_parameter in args and self.is_admin(username):
+            return True
+        return self._every_n > 0 and next(self._counter) % self._every_n == 0
+
+
+sampler = None
+selector = None
+
+
+def init_app(app):
+    # Only called when profiling is enabled, so that an app without the profiler pays nothing for it.
+    global sampler, selector
+    sampler = StackSampler(app.config['PROFILER_INTERVAL'])
+    selector = RequestSelector(
+        every_n=app.config['PROFILE_EVERY_N'],
+        endpoints=_split(app.config['PROFILE_ENDPOINTS']),
+        query_parameter=app.config['PROFILE_QUERY_PARAMETER'],
+        admins=_split(app.config['PROFILER_ADMINS'])
+    )
+    app.before_request(_begin_profile)
+    app.teardown_request(_end_profile)
+    app.register_blueprint(profiler_blueprint)
+
+
+def _split(value):
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(',') if item.strip()]
+    return list(value or ())
+
+
+def _begin_profile():
+    if selector.selects(request.endpoint, request.args, session.get('username')):
+        request.environ[_PROFILED] = True
+        sampler.begin(get_ident(), request.endpoint or 'unmatched')
+
+
+def _end_profile(exception=None):
+    if request.environ.get(_PROFILED):
+        sampler.end(get_ident())
+
+
+@profiler_blueprint.route('/metrics/profile', methods=['GET'])
+def profile():
+    # Collapsed stacks of the profiled requests so far, for rendering as a flame graph. Restricted to profiler
+    # admins; ?reset clears the stacks after they are returned.
+    if not selector.is_admin(session.get('username')):
+        abort(403)
+    stacks = sampler.collapsed()
+    if 'reset' in request.args:
+        sampler.reset()
+    return Response(stacks, mimetype='text/plain; charset=utf-8')
@@ -0,0 +1,154 @@
+from bisect import bisect_left
+from threading import Lock, local, current_thread
+
+
+# Upper bounds, in seconds, of the latency histogram buckets. Observations above the last bound fall in the +Inf bucket.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HISTOGRAMS = {
+    'covid_http_request_duration_seconds': ('endpoint', 'Time taken to handle a request, by endpoint.'),
+    'covid_repository_call_duration_seconds': ('method', 'Time taken by repository methods, by method.'),
+    'covid_template_render_duration_seconds': ('template', 'Time taken to render templates, by template.')
+}
+COUNTERS = {
+    'covid_http_requests_total': (('endpoint', 'status'), 'Requests handled, by endpoint and response status.')
+}
+
+
+class _Shard:
+    # The metrics recorded by one thread. Only the owning thread writes to a shard, so recording needs no lock; a
+    # scrape reads the shards of all threads while they are being written, which may miss observations in flight but
+    # never corrupts them.
+
+    def __init__(self, thread):
+        self.thread = thread
+        # (histogram name, label) -> [bucket counts..., +Inf count, sum of observations]
+        self.histograms = dict()
+        # (counter name, labels) -> [count]
+        self.counters = dict()
+
+
+class MetricsRegistry:
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = tuple(buckets)
+        self._local = local()
+        self._shards = list()
+        # Totals of shards whose threads have finished, folded in by collect().
+        self._retired = _Shard(None)
+        self._shards_lock = Lock()
+
+    @property
+    def buckets(self):
+        return self._buckets
+
+    def observe(self, name: str, label: str, seconds: float):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        histogram = shard.histograms.get((name, label))
+        if histogram is None:
+            histogram = shard.histograms[(name, label)] = [0] * (len(self._buckets) + 1) + [0.0]
+        histogram[bisect_left(self._buckets, seconds)] += 1
+        histogram[-1] += seconds
+
+    def increment(self, name: str, labels: tuple):
+        try:
+            shard = self._local.shard
+        except AttributeError:
+            shard = self._new_shard()
+        counter = shard.counters.get((name, labels))
+        if counter is None:
+            counter = shard.counters[(name, labels)] = [0]
+        counter[0] += 1
+
+    def collect(self):
+        # Returns (histograms, counters) summed over all threads, keyed as in _Shard.
+        with self._shards_lock:
+            live = list()
+            for shard in self._shards:
+                if shard.thread.is_alive():
+                    live.append(shard)
+                else:
+                    # Threads are often per request, so fold finished threads' shards away rather than keep them.
+                    _merge(self._retired, shard)
+            self._shards = live
+            histograms, counters = dict(), dict()
+            for shard in [self._retired] + live:
+                for key, values in list(shard.histograms.items()):
+                    total = histograms.setdefault(key, [0] * (len(self._buckets) + 1) + [0.0])
+                    for i, value in enumerate(values):
+                        total[i] += value
+                for key, values in list(shard.counters.items()):
+                    counters[key] = counters.get(key, 0) + values[0]
+        return histograms, counters
+
+    def reset(self):
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.histograms.clear()
+                shard.counters.clear()
+            self._retired = _Shard(None)
+
+    def _new_shard(self):
+        shard = _Shard(current_thread())
+        with self._shards_lock:
+            self._shards.append(shard)
+        self._local.shard = shard
+        return shard
+
+
+def _merge(target: _Shard, source: _Shard):
+    for key, values in source.histograms.items():
+        total = target.histograms.setdefault(key, [0] * len(values))
+        for i, value in enumerate(values):
+            total[i] += value
+    for key, values in source.counters.items():
+        total = target.counters.setdefault(key, [0])
+        total[0] += values[0]
+
+
+registry = MetricsRegistry()
+
+
+def render_prometheus(metrics_registry: MetricsRegistry = registry):
+    # Renders the registry in the Prometheus text exposition format, version 0.0.4.
+    histograms, counters = metrics_registry.collect()
+    lines = list()
+
+    for name, (label_name, help_text) in HISTOGRAMS.items():
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s histogram' % name)
+        for (metric, label), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            label_text = '%s="%s"' % (label_name, _escape(label))
+            cumulative = 0
+            for bound, count in zip(metrics_registry.buckets, values):
+                cumulative += count
+                lines.append('%s_bucket{%s,le="%s"} %d' % (name, label_text, _format_bound(bound), cumulative))
+            cumulative += values[-2]
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (name, label_text, cumulative))
+            lines.append('%s_sum{%s} %r' % (name, label_text, values[-1]))
+            lines.append('%s_count{%s} %d' % (name, label_text, cumulative))
+
+    for name, (label_names, help_text) in COUNTERS.items():
+        lines.append('# HELP %s %s' % (name, help_text))
+        lines.append('# TYPE %s counter' % name)
+        for (metric, labels), count in sorted(counters.items()):
+            if metric != name:
+                continue
+            label_text = ','.join('%s="%s"' % (label_name, _escape(value))
+                                  for label_name, value in zip(label_names, labels))
+            lines.append('%s{%s} %d' % (name, label_text, count))
+
+    return '\n'.join(lines) + '\n'
+
+
+def _format_bound(bound: float):
+    return repr(float(bound))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
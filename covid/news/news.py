@@ -1,14 +1,10 @@
 from datetime import date
 
 from flask import Blueprint
-from flask import request, render_template, redirect, url_for, session
-from better_profanity import profanity
-from flask_wtf import FlaskForm
-from wtforms import TextAreaField, HiddenField, SubmitField
-from wtforms.validators import DataRequired, Length, ValidationError
-
+from flask import request, render_template, redirect, url_for, session, abort
 import covid.adapters.repository as repo
 import covid.utilities.utilities as utilities
+import covid.utilities.cursors as cursors
 import covid.news.services as services
 
 from covid.authentication.authentication import login_required
@@ -104,36 +100,30 @@ def movies_by_genre():
         # Convert movie_to_show_reviews from string to int.
         movie_to_show_reviews = int(movie_to_show_reviews)
 
-    if cursor is None:
-        # No cursor query parameter, so initialise cursor to start at the beginning.
-        cursor = 0
-    else:
-        # Convert cursor from string to int.
-        cursor = int(cursor)
-
-    # Retrieve movie ids for movies that are genreged with genre_name.
-    movie_ids = services.get_movie_ids_for_genre(genre_name, repo.repo_instance)
+    # Retrieve the page of movie ids for movies that are genreged with genre_name. Cursors are opaque keys into the
+    # genre's date order, so deep pages cost no more than the first, and don't shift as movies are added.
+    try:
+        movie_ids, prev_cursor, next_cursor, last_cursor = services.get_movie_ids_for_genre(
+            genre_name, cursor, movies_per_page, repo.repo_instance)
+    except cursors.InvalidCursorException:
+        abort(400)
 
     # Retrieve the batch of movies to display on the Web page.
-    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
+    movies = services.get_movies_by_id(movie_ids, repo.repo_instance)
 
     first_movie_url = None
     last_movie_url = None
     next_movie_url = None
     prev_movie_url = None
 
-    if cursor > 0:
+    if prev_cursor is not None:
         # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
-        prev_movie_url = url_for('news_bp.movies_by_genre', genre=genre_name, cursor=cursor - movies_per_page)
+        prev_movie_url = url_for('news_bp.movies_by_genre', genre=genre_name, cursor=prev_cursor)
         first_movie_url = url_for('news_bp.movies_by_genre', genre=genre_name)
 
-    if cursor + movies_per_page < len(movie_ids):
+    if next_cursor is not None:
         # There are further movies, so generate URLs for the 'next' and 'last' navigation buttons.
-        next_movie_url = url_for('news_bp.movies_by_genre', genre=genre_name, cursor=cursor + movies_per_page)
-
-        last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
-        if len(movie_ids) % movies_per_page == 0:
-            last_cursor -= movies_per_page
+        next_movie_url = url_for('news_bp.movies_by_genre', genre=genre_name, cursor=next_cursor)
         last_movie_url = url_for('news_bp.movies_by_genre', genre=genre_name, cursor=last_cursor)
 
     # Construct urls for viewing movie reviews and adding reviews.
@@ -166,6 +156,7 @@ def review_on_movie():
     # Create form. The form maintains state, e.g. when this method is called with a HTTP GET request and populates
     # the form with an movie id, when subsequently called with a HTTP POST request, the movie id remains in the
     # form.
+    from covid.news.forms import ReviewForm
     form = ReviewForm()
 
     if form.validate_on_submit():
@@ -207,23 +198,3 @@ def review_on_movie():
         selected_movies=utilities.get_selected_movies(),
         genre_urls=utilities.get_genres_and_urls()
     )
-
-
-class ProfanityFree:
-    def __init__(self, message=None):
-        if not message:
-            message = u'Field must not contain profanity'
-        self.message = message
-
-    def __call__(self, form, field):
-        if profanity.contains_profanity(field.data):
-            raise ValidationError(self.message)
-
-
-class ReviewForm(FlaskForm):
-    review = TextAreaField('Review', [
-        DataRequired(),
-        Length(min=4, message='Your review is too short'),
-        ProfanityFree(message='Your review must not contain profanity')])
-    movie_id = HiddenField("Movie id")
-    submit = SubmitField('Submit')
\ No newline at end of file
@@ -1,7 +1,9 @@
 from typing import List, Iterable
 
+from covid.adapters.facet_index import MovieFilter
 from covid.adapters.repository import AbstractRepository
 from covid.domain.model import make_review, Movie, Review, Genre
+import covid.utilities.cursors as cursors
 
 
 class NonExistentMovieException(Exception):
@@ -69,10 +71,9 @@ def get_movies_by_date(date, repo: AbstractRepository):
     return movies_dto, prev_date, next_date
 
 
-def get_movie_ids_for_genre(genre_name, repo: AbstractRepository):
-    movie_ids = repo.get_movie_ids_for_genre(genre_name)
-
-    return movie_ids
+def get_movie_ids_for_genre(genre_name, cursor: str, movies_per_page: int, repo: AbstractRepository):
+    # Returns a page of the genre's movies in date order, and cursors for the previous, next and last pages.
+    return cursors.get_movie_ids_page(MovieFilter(genres=[genre_name]), 'date', cursor, movies_per_page, repo)
 
 
 def get_movies_by_id(id_list, repo: AbstractRepository):
@@ -0,0 +1,61 @@
+from flask import Blueprint, request, render_template, url_for, jsonify, abort
+
+import covid.adapters.repository as repo
+import covid.people.services as services
+from covid.adapters.sort_index import SORT_ORDERS
+
+
+# Configure Blueprint.
+people_blueprint = Blueprint(
+    'people_bp', __name__)
+
+
+@people_blueprint.route('/people/<role>', methods=['GET'])
+def people_with_prefix(role):
+    # Type-ahead: the names of people with the role that start with the prefix query parameter, as JSON.
+    prefix = request.args.get('prefix', '')
+    limit = min(request.args.get('limit', 10, type=int), 50)
+
+    try:
+        names = services.get_people_with_prefix(role, prefix, limit, repo.repo_instance)
+    except services.UnknownPersonException:
+        abort(404)
+
+    return jsonify(names)
+
+
+@people_blueprint.route('/people/<role>/<name>', methods=['GET'])
+def movies_for_person(role, name):
+    movies_per_page = 35
+    page = max(request.args.get('page', 0, type=int), 0)
+    sort = request.args.get('sort') if request.args.get('sort') in SORT_ORDERS else None
+
+    try:
+        person = services.get_person(role, name, repo.repo_instance)
+    except services.UnknownPersonException:
+        abort(404)
+    movies, page_count = services.get_movies_for_person(
+        role, name, page, movies_per_page, repo.repo_instance, sort)
+
+    prev_page_url = None
+    next_page_url = None
+    if page > 0:
+        prev_page_url = url_for('people_bp.movies_for_person', role=role, name=person, page=page - 1, sort=sort)
+    if page + 1 < page_count:
+        next_page_url = url_for('people_bp.movies_for_person', role=role, name=person, page=page + 1, sort=sort)
+    sort_urls = [
+        (order, order == sort, url_for('people_bp.movies_for_person', role=role, name=person, sort=order))
+        for order in SORT_ORDERS]
+
+    for movie in movies:
+        movie['url'] = url_for('home_bp.movies_by_genre', id=movie['id'])
+
+    return render_template(
+        'people/movies.html',
+        role=role,
+        person=person,
+        movies=movies,
+        prev_page_url=prev_page_url,
+        next_page_url=next_page_url,
+        sort_urls=sort_urls
+    )
@@ -0,0 +1,48 @@
+from covid.adapters.repository import AbstractRepository
+from covid.home.services import movies_to_dict
+
+
+# Roles people are indexed by.
+ROLES = ('director', 'actor')
+
+
+class UnknownPersonException(Exception):
+    pass
+
+
+def get_person(role: str, name: str, repo: AbstractRepository):
+    if role not in ROLES:
+        raise UnknownPersonException
+
+    person = repo.get_person(role, name)
+    if person is None:
+        raise UnknownPersonException
+
+    return person
+
+
+def get_movie_ids_for_person(role: str, name: str, repo: AbstractRepository):
+    if role not in ROLES:
+        raise UnknownPersonException
+
+    return repo.get_movie_ids_for_person(role, name)
+
+
+def get_movies_for_person(role: str, name: str, page: int, movies_per_page: int, repo: AbstractRepository,
+                          sort: str = None):
+    # Returns the page'th batch of the person's movies, and the number of pages. Movies are in id order unless sort is
+    # given.
+    movie_ids = get_movie_ids_for_person(role, name, repo)
+    if sort is not None:
+        movie_ids = repo.sort_movie_ids(movie_ids, sort)
+    movies = repo.get_movies_by_id(movie_ids[page * movies_per_page:(page + 1) * movies_per_page])
+    page_count = (len(movie_ids) + movies_per_page - 1) // movies_per_page
+
+    return movies_to_dict(movies), page_count
+
+
+def get_people_with_prefix(role: str, prefix: str, limit: int, repo: AbstractRepository):
+    if role not in ROLES:
+        raise UnknownPersonException
+
+    return repo.get_people_with_prefix(role, prefix, limit)
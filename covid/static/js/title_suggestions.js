@@ -0,0 +1,47 @@
+// Title autocomplete for the search box: offers the titles /m/suggest returns for what has been typed as the options of
+// the #titleSuggestions datalist. Requests wait until typing pauses, and a request still in flight when the box
+// changes again is aborted, so a slow response never replaces the suggestions for newer input.
+(function() {
+    var input = document.getElementById('searchInput');
+    var list = document.getElementById('titleSuggestions');
+    if (!input || !list) {
+        return;
+    }
+    var DELAY = 100;
+    var timer = null;
+    var request = null;
+
+    function show(suggestions) {
+        list.innerHTML = '';
+        for (let suggestion of suggestions) {
+            var option = document.createElement('option');
+            option.value = suggestion.title;
+            list.appendChild(option);
+        }
+    }
+
+    input.addEventListener('input', function() {
+        var prefix = input.value;
+        clearTimeout(timer);
+        if (request) {
+            request.abort();
+            request = null;
+        }
+        if (prefix.length == 0) {
+            show([]);
+            return;
+        }
+        timer = setTimeout(function() {
+            var controller = new AbortController();
+            request = controller;
+            fetch('/m/suggest?q=' + encodeURIComponent(prefix), {signal: controller.signal})
+                .then(response => response.json())
+                .then(function(suggestions) {
+                    if (input.value == prefix) {
+                        show(suggestions);
+                    }
+                })
+                .catch(function() {});
+        }, DELAY);
+    });
+})();
@@ -0,0 +1,96 @@
+import base64
+import binascii
+import json
+from datetime import date
+
+from covid.adapters.facet_index import MovieFilter
+from covid.adapters.repository import AbstractRepository
+
+
+class InvalidCursorException(Exception):
+    pass
+
+
+# A cursor is an opaque token for a position in a sort order: the order, the sort key of the movie the position is
+# next to, and whether the page runs forwards from the key or backwards to it. The key of a movie in the date order is
+# its (date, id), so a page stays put when movies are added elsewhere in the order, and finding it is a seek rather
+# than a walk through the pages before it.
+
+# Types of the parts of a movie's key in each sort order, for rejecting keys that can't be compared with the order's.
+_NUMBER = (int, float)
+_KEY_TYPES = {
+    'date': (date, int),
+    'rating': (_NUMBER, int),
+    'runtime': (int, int),
+    'title': (str, int),
+    'review_count': (int, int),
+    'review_average': (_NUMBER, int, int)
+}
+
+
+def encode_cursor(sort: str, key, reverse: bool = False) -> str:
+    payload = json.dumps({'o': sort, 'k': key, 'r': reverse}, separators=(',', ':'), default=_encode_value)
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, sort: str):
+    # Returns the cursor's (key, reverse). Raises InvalidCursorException if the cursor is malformed or for another order.
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(payload.decode('utf-8'), object_hook=_decode_value)
+        key, reverse = position['k'], bool(position['r'])
+        if position['o'] != sort or not (key is None or _is_key(key, sort)):
+            raise InvalidCursorException
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError):
+        raise InvalidCursorException
+    return key, reverse
+
+
+def get_movie_ids_page(movie_filter: MovieFilter, sort: str, cursor: str, movies_per_page: int,
+                       repo: AbstractRepository):
+    # Returns the ids of the movies on the page the cursor points to (the first page if cursor is None), and cursors
+    # for the previous, next and last pages, each None if there is no such page.
+    key, reverse = (None, False) if cursor is None else decode_cursor(cursor, sort)
+
+    movie_ids = repo.get_movie_ids_page(movie_filter, sort, key, movies_per_page + 1, reverse)
+    if reverse:
+        has_previous = len(movie_ids) > movies_per_page
+        movie_ids = movie_ids[-movies_per_page:]
+        anchor = repo.get_sort_key(movie_ids[-1], sort) if movie_ids else key
+        has_next = anchor is not None and len(repo.get_movie_ids_page(movie_filter, sort, anchor, 1)) > 0
+    else:
+        has_next = len(movie_ids) > movies_per_page
+        movie_ids = movie_ids[:movies_per_page]
+        anchor = repo.get_sort_key(movie_ids[0], sort) if movie_ids else key
+        has_previous = anchor is not None and len(repo.get_movie_ids_page(movie_filter, sort, anchor, 1, True)) > 0
+
+    previous_cursor = next_cursor = last_cursor = None
+    if has_previous and movie_ids:
+        previous_cursor = encode_cursor(sort, repo.get_sort_key(movie_ids[0], sort), reverse=True)
+    if has_next and movie_ids:
+        next_cursor = encode_cursor(sort, repo.get_sort_key(movie_ids[-1], sort))
+        last_cursor = encode_cursor(sort, None, reverse=True)
+    return movie_ids, previous_cursor, next_cursor, last_cursor
+
+
+def _is_key(key, sort: str) -> bool:
+    # Keys of orders not listed here, such as offsets into search results, are checked by whoever reads them.
+    if not isinstance(key, list):
+        return False
+    types = _KEY_TYPES.get(sort)
+    if types is None:
+        return True
+    return len(key) == len(types) and all(
+        isinstance(part, part_type) and not isinstance(part, bool) for part, part_type in zip(key, types))
+
+
+def _encode_value(value):
+    if isinstance(value, date):
+        return {'date': value.isoformat()}
+    raise TypeError('Cannot encode {!r} in a cursor'.format(value))
+
+
+def _decode_value(value: dict):
+    if set(value) == {'date'}:
+        return date.fromisoformat(value['date'])
+    return value
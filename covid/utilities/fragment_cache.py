@@ -0,0 +1,81 @@
+from collections import OrderedDict
+from threading import Lock
+
+from markupsafe import Markup
+
+
+class FragmentCache:
+    # Rendered HTML fragments keyed by (kind, key, version). The version is supplied by the caller and identifies
+    # the state of the entity the fragment was rendered from, so a stale fragment is never served: when the entity
+    # changes its version changes, the old entry stops being requested and eventually falls out of the LRU.
+
+    def __init__(self, max_entries: int = 10000):
+        self._max_entries = max_entries
+        self._fragments = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def max_entries(self) -> int:
+        return self._max_entries
+
+    def configure(self, max_entries: int):
+        with self._lock:
+            self._max_entries = max_entries
+            self._evict()
+
+    def get(self, kind: str, key, version):
+        with self._lock:
+            fragment = self._fragments.get((kind, key, version))
+            if fragment is not None:
+                self._fragments.move_to_end((kind, key, version))
+                self.hits += 1
+            else:
+                self.misses += 1
+            return fragment
+
+    def put(self, kind: str, key, version, fragment):
+        with self._lock:
+            self._fragments[(kind, key, version)] = fragment
+            self._fragments.move_to_end((kind, key, version))
+            self._evict()
+
+    def get_or_render(self, kind: str, key, version, render):
+        # render is only called on a miss. Concurrent misses for the same fragment may both render; the fragment is
+        # a pure function of the entity version, so whichever result is stored last is equally valid.
+        fragment = self.get(kind, key, version)
+        if fragment is None:
+            fragment = render()
+            if self._max_entries > 0:
+                self.put(kind, key, version, fragment)
+        return fragment
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._fragments)
+
+    def _evict(self):
+        while len(self._fragments) > self._max_entries:
+            self._fragments.popitem(last=False)
+
+
+fragment_cache = FragmentCache()
+
+
+def cached_fragment(kind: str, key, version, caller):
+    # Jinja entry point, used as a call block so the body is only rendered on a miss:
+    #
+    #   {% call cached_fragment('movie_card', movie.id, movie.version) %} ... {% endcall %}
+    return Markup(fragment_cache.get_or_render(kind, key, version, lambda: str(caller())))
+
+
+def init_app(app):
+    fragment_cache.configure(app.config.get('FRAGMENT_CACHE_SIZE', 10000))
+    fragment_cache.clear()
+    app.jinja_env.globals['cached_fragment'] = cached_fragment
@@ -0,0 +1,170 @@
+import os
+from importlib.util import find_spec
+from string import ascii_letters, digits
+
+
+# Characters that can stand in for a letter, as in better_profanity: '@' for 'a', '1' for 'i' or 'l', and so on.
+CHARS_MAPPING = {
+    'a': ('a', '@', '*', '4'),
+    'i': ('i', '*', 'l', '1'),
+    'o': ('o', '*', '0', '@'),
+    'u': ('u', '*', 'v'),
+    'v': ('v', '*', 'u'),
+    'l': ('l', '1'),
+    'e': ('e', '*', '3'),
+    's': ('s', '$', '5'),
+    't': ('t', '7'),
+}
+
+# Characters that make up words. Any other character separates words. Matches better_profanity, apart from using
+# str.isalpha() for non-ASCII letters.
+WORD_CHARACTERS = frozenset(ascii_letters + digits + '@$*"\'')
+
+_MATCH = -1
+
+
+class _Node:
+    __slots__ = ('children', 'terminal', 'after_separator')
+
+    def __init__(self, after_separator=False):
+        self.children = dict()
+        self.terminal = False
+        self.after_separator = after_separator
+
+
+class ProfanityFilter:
+    # Matches whole words and phrases of a word list, with letters replaceable by their CHARS_MAPPING stand-ins, in a
+    # single pass over the text.
+    #
+    # The word list is compiled into a trie, with the separators inside phrases as ' ' edges, and the trie is fully
+    # determinised when the filter is built: each automaton state is a set of trie nodes still matching, the root
+    # joining the set at the start of each word, and a word boundary reached while the set holds a complete entry is a
+    # match. Characters that neither appear in the word list nor stand in for a letter that does all behave alike, as
+    # do all separators, so the automaton's alphabet is finite. Its tables are never changed once built, so a filter
+    # can be shared by any number of threads, and each character scanned costs a dictionary lookup.
+
+    def __init__(self, words):
+        self._root = _Node()
+        for word in words:
+            self._add_word(word)
+
+        # Letters each text character may stand for.
+        self._stands_for = dict()
+        for letter, replacements in CHARS_MAPPING.items():
+            for replacement in replacements:
+                self._stands_for.setdefault(replacement, set()).add(letter)
+
+        self._build_automaton()
+
+    @classmethod
+    def from_file(cls, filename: str):
+        with open(filename, encoding='utf-8') as infile:
+            return cls([line.strip() for line in infile if line.strip()])
+
+    @property
+    def number_of_states(self) -> int:
+        return len(self._accepting)
+
+    def contains_profanity(self, text: str) -> bool:
+        transitions = self._transitions
+        other_word = self._other_word
+        separator = self._separator
+        state = 0
+        for char in text.lower():
+            next_state = transitions[state].get(char)
+            if next_state is None:
+                next_state = other_word[state] if _is_word_char(char) else separator[state]
+            if next_state == _MATCH:
+                return True
+            state = next_state
+        return self._accepting[state]
+
+    def _add_word(self, word: str):
+        node = self._root
+        for part_number, part in enumerate(''.join(c if _is_word_char(c) else ' ' for c in word.lower()).split()):
+            if part_number > 0:
+                node = node.children.setdefault(' ', _Node(after_separator=True))
+            for char in part:
+                node = node.children.setdefault(char, _Node())
+        if node is not self._root:
+            node.terminal = True
+
+    def _build_automaton(self):
+        # Subset construction from the start state. State 0 is the start.
+        symbols = set(self._stands_for)
+        pending = [self._root]
+        while pending:
+            node = pending.pop()
+            symbols.update(char for char in node.children if char != ' ')
+            pending.extend(node.children.values())
+
+        state_ids = dict()
+        states = list()
+        self._transitions = list()
+        self._other_word = list()
+        self._separator = list()
+        self._accepting = list()
+
+        def state_id(nodes: frozenset):
+            state = state_ids.get(nodes)
+            if state is None:
+                state = state_ids[nodes] = len(states)
+                states.append(nodes)
+                self._accepting.append(any(node.terminal for node in nodes))
+            return state
+
+        state_id(frozenset([self._root]))
+        state = 0
+        while state < len(states):
+            nodes = states[state]
+            # Only transitions to states still matching something are kept; any other word character goes to the
+            # state matching nothing, and any separator ends the word.
+            transitions = dict()
+            for char in symbols:
+                letters = self._stands_for.get(char, set()) | {char}
+                next_nodes = frozenset(
+                    child for node in nodes for letter in letters
+                    for child in (node.children.get(letter),) if child is not None)
+                if next_nodes:
+                    transitions[char] = state_id(next_nodes)
+            self._transitions.append(transitions)
+            self._other_word.append(state_id(frozenset()))
+            if self._accepting[state]:
+                self._separator.append(_MATCH)
+            else:
+                # Phrases continue across a separator, runs of separators count as one, and a new word may start
+                # after it.
+                next_nodes = {self._root}
+                for node in nodes:
+                    if node.after_separator:
+                        next_nodes.add(node)
+                    elif ' ' in node.children:
+                        next_nodes.add(node.children[' '])
+                self._separator.append(state_id(frozenset(next_nodes)))
+            state += 1
+
+
+def _is_word_char(char: str) -> bool:
+    return char in WORD_CHARACTERS or char.isalpha()
+
+
+def default_wordlist_path():
+    # The word list shipped with better_profanity, located without importing the package.
+    spec = find_spec('better_profanity')
+    return os.path.join(list(spec.submodule_search_locations)[0], 'profanity_wordlist.txt')
+
+
+_filter = None
+
+
+def init_app(app):
+    # Compiles the word list once, as the app starts, so that no request pays for it.
+    global _filter
+    _filter = ProfanityFilter.from_file(app.config.get('PROFANITY_WORDLIST') or default_wordlist_path())
+
+
+def contains_profanity(text: str) -> bool:
+    global _filter
+    if _filter is None:
+        _filter = ProfanityFilter.from_file(default_wordlist_path())
+    return _filter.contains_profanity(text)
@@ -21,6 +21,11 @@ def get_genre_names(repo: AbstractRepository):
     return genre_names
 
 
+def get_genre_version(repo: AbstractRepository):
+    # Genres are only ever added, so the number of Genres identifies the state of the genre navigation.
+    return len(repo.get_genres())
+
+
 def get_years(repo: AbstractRepository):
     genres = repo.get_genres()
     genre_names = [genre.genre_name for genre in genres]
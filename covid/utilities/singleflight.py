@@ -0,0 +1,69 @@
+from threading import Event, Lock
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error')
+
+    def __init__(self):
+        self.done = Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    # Coalesces concurrent calls with the same key: the first caller runs the function, and callers arriving while it
+    # runs wait for it and share its result, or its exception. Once the call completes the key is forgotten, so a later
+    # call runs the function afresh; caching results is left to the caller.
+
+    def __init__(self):
+        self._calls = dict()
+        self._lock = Lock()
+        self.shared = 0
+
+    def do(self, key, function):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.shared += 1
+
+        if leader:
+            try:
+                call.result = function()
+            except BaseException as error:
+                call.error = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class AsyncSingleFlight:
+    # The asyncio counterpart of SingleFlight: concurrent awaits with the same key share one task. Waiters are shielded
+    # from each other, so cancelling one waiter doesn't cancel the shared task.
+
+    def __init__(self):
+        self._calls = dict()
+        self.shared = 0
+
+    async def do(self, key, coroutine_function):
+        # Imported here: only an asyncio server, already running a loop, gets this far.
+        import asyncio
+
+        key = (asyncio.get_running_loop(), key)
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(coroutine_function())
+            self._calls[key] = task
+            task.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
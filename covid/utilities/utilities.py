@@ -2,6 +2,7 @@ from flask import Blueprint, request, render_template, redirect, url_for, sessio
 
 import covid.adapters.repository as repo
 import covid.utilities.services as services
+from covid.utilities.fragment_cache import fragment_cache
 
 
 # Configure Blueprint.
@@ -9,7 +10,16 @@ utilities_blueprint = Blueprint(
     'utilities_bp', __name__)
 
 
+def get_genre_version():
+    return services.get_genre_version(repo.repo_instance)
+
+
 def get_genres_and_urls():
+    # The genre navigation only changes when a Genre is added, so build it once per genre version.
+    return fragment_cache.get_or_render('genre_urls', None, get_genre_version(), _build_genres_and_urls)
+
+
+def _build_genres_and_urls():
     genre_names = services.get_genre_names(repo.repo_instance)
     genre_urls = dict()
     for genre_name in genre_names:
@@ -0,0 +1,38 @@
+"""Gunicorn settings for serving the app from several pre-forked worker processes:
+
+    $ gunicorn -c gunicorn.conf.py wsgi:app
+
+The app, and with it the repository and its indexes, is built once in the master process and shared with the workers
+by copy-on-write, rather than each worker reading and indexing the catalogue itself.
+"""
+import gc
+import multiprocessing
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '127.0.0.1:5000')
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Import wsgi.py, building the app, in the master before forking the workers.
+preload_app = True
+
+# A collection in the master would free objects in the middle of pages the workers share, and one in a worker would
+# write to the GC header of every object it traverses, copying the page it's on. So the cyclic GC is off while the app
+# is built (this file is read again, and the app built again, on a reload), and everything built by then is frozen:
+# moved to a permanent generation that no collection, in the master or the workers, looks at. The GC is then back on,
+# in the master and in the workers forked from it.
+gc.disable()
+
+
+def _freeze():
+    gc.freeze()
+    gc.enable()
+
+
+def when_ready(server):
+    _freeze()
+
+
+def pre_fork(server, worker):
+    # Also freezes whatever the master has built since the last fork, and the app rebuilt by a reload.
+    _freeze()
@@ -6,20 +6,27 @@ from covid.adapters import memory_repository
 from covid.adapters.memory_repository import MemoryRepository
 
 
-# TEST_DATA_PATH = r"C:\Users\admin\Desktop\uni\235\a2\CS235FLIX\COMPSCI-235-04_COVID_web_app\covid\adapters\data"
+TEST_DATA_PATH = os.path.join(os.path.dirname(__file__), "..", "covid", "adapters", "data")
 
-@pytest.fixture
-def in_memory_repo():
+@pytest.fixture(scope='session')
+def base_repo():
+    # Loaded once, and only ever forked: tests change their forks, never this.
     repo = MemoryRepository()
     memory_repository.populate(TEST_DATA_PATH, repo)
     return repo
 
 
 @pytest.fixture
-def client():
+def in_memory_repo(base_repo):
+    return base_repo.fork()
+
+
+@pytest.fixture
+def client(base_repo):
     my_app = create_app({
         'TESTING': True,                                # Set to True during testing.
         'TEST_DATA_PATH': TEST_DATA_PATH,               # Path for loading test data into the repository.
+        'REPOSITORY': base_repo.fork(),                 # Repository to use instead of loading one.
         'WTF_CSRF_ENABLED': False                       # test_client will not send a CSRF token, so disable validation.
     })
 
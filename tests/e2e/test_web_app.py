@@ -1,7 +1,19 @@
+import csv
+import gzip
+import html
+import os
+import re
+import shutil
+
 import pytest
 
 from flask import session
 
+from covid import create_app
+from covid.adapters import catalogue_reloader
+from covid.authentication import hashing
+from covid.utilities.cursors import encode_cursor
+
 
 def test_register(client):
     # Check that we retrieve the register page.
@@ -48,6 +60,22 @@ def test_login(client, auth):
         assert session['username'] == 'thorke'
 
 
+def test_busy_server_shows_the_credentials_forms_again(client, monkeypatch):
+    def overloaded(*args):
+        raise hashing.HashingOverloadedException
+    monkeypatch.setattr(hashing, 'check_password_hash', overloaded)
+    monkeypatch.setattr(hashing, 'generate_password_hash', overloaded)
+
+    response = client.post('/authentication/login', data={'username': 'thorke', 'password': 'cLQ^C#oFXloS'})
+    assert response.status_code == 503
+    assert b'The server is busy' in response.data
+    assert b'action="/authentication/login"' in response.data
+
+    response = client.post('/authentication/register', data={'username': 'gmichael', 'password': 'CarelessWh1sper'})
+    assert response.status_code == 503
+    assert b'action="/authentication/register"' in response.data
+
+
 def test_logout(client, auth):
     # Login a user.
     auth.login()
@@ -105,3 +133,239 @@ def test_movies_with_genre(client):
     # Check that all movies genreged with 'Health' are included on the page.
     assert b'https://image.tmdb.org/t/p/w200/zNlJvCY3Pz7SE09Lf4G7uPs5XFZ.jpg' in response.data
 
+
+
+def test_movie_cards_are_served_from_the_fragment_cache(client):
+    from covid.utilities.fragment_cache import fragment_cache
+
+    first = client.get('/m?id=1').data
+    hits = fragment_cache.hits
+    second = client.get('/m?id=1').data
+
+    assert fragment_cache.hits > hits
+    assert b'good film' in second
+    assert first.count(b'movie-item choose') == second.count(b'movie-item choose')
+
+
+def metrics_client(base_repo, **config):
+    return create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': os.path.join(os.path.dirname(__file__), '..', '..', 'covid', 'adapters', 'data'),
+        'REPOSITORY': base_repo.fork(),
+        'METRICS_ENABLED': True,
+        **config
+    }).test_client()
+
+
+def test_metrics_are_off_by_default(client):
+    assert client.get('/metrics').status_code == 404
+
+
+def test_metrics_are_refused_to_other_hosts_and_without_the_token(base_repo):
+    client = metrics_client(base_repo)
+    assert client.get('/metrics', environ_base={'REMOTE_ADDR': '203.0.113.7'}).status_code == 403
+
+    client = metrics_client(base_repo, METRICS_TOKEN='s3cret')
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer s3cret'},
+                          environ_base={'REMOTE_ADDR': '203.0.113.7'})
+    assert response.status_code == 200
+
+
+def test_metrics(base_repo):
+    client = metrics_client(base_repo)
+    client.get('/')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert b'covid_http_request_duration_seconds_count{endpoint="home_bp.home"}' in response.data
+    assert b'covid_repository_call_duration_seconds_count{method="get_genres"}' in response.data
+    assert b'covid_template_render_duration_seconds_count{template="front.html"}' in response.data
+
+
+def test_profiler_is_not_installed_unless_enabled(client):
+    response = client.get('/metrics/profile')
+    assert response.status_code == 404
+
+
+def test_review_with_profanity_is_rejected(client, auth):
+    auth.login()
+
+    response = client.post(
+        '/review',
+        data={'review': 'what a load of sh1t', 'rating': 2, 'movie_id': 2}
+    )
+    assert b'Your review must not contain profanity' in response.data
+
+
+def test_movies_for_person(client):
+    response = client.get('/people/director/James Gunn')
+    assert response.status_code == 200
+    assert b'James Gunn' in response.data
+    assert b'/m?id=909' in response.data
+
+    assert client.get('/people/director/Nobody At All').status_code == 404
+    assert client.get('/people/producer/James Gunn').status_code == 404
+
+
+def test_people_type_ahead(client):
+    response = client.get('/people/actor?prefix=chris pr')
+    assert response.status_code == 200
+    assert 'Chris Pratt' in response.json
+
+
+def test_title_suggestions(client):
+    response = client.get('/m/suggest?q=guardians of')
+    assert response.status_code == 200
+    assert response.json[0]['title'] == 'Guardians of the Galaxy'
+
+
+def test_pages_with_a_search_box_share_the_title_suggestion_script(client):
+    script = b'/static/js/title_suggestions.js'
+    for url in ('/', '/m?id=1'):
+        page = client.get(url).data
+        assert page.count(script) == 1
+        assert b'/m/suggest' not in page
+    assert client.get(script.decode()).status_code == 200
+
+
+def test_misspelt_search_suggests_a_correction(client):
+    response = client.get('/m?id=1&s=Guardiens Galxy')
+    assert b'Did you mean' in response.data
+    assert b'guardians galaxy' in response.data
+
+    response = client.get('/m?id=1&s=guardians')
+    assert b'Did you mean' not in response.data
+
+    # A misspelling that still fuzzy matches titles shows those, with no suggestion.
+    response = client.get('/m?id=1&s=incep')
+    assert b'Did you mean' not in response.data
+
+
+def test_movies_with_facets(client):
+    response = client.get('/m?id=1&g=Action&g=Sci-Fi&match=all&year_from=2014&year_to=2014&min_rating=8')
+    assert response.status_code == 200
+    assert b'matching all' in response.data
+    # Movie 1, Guardians of the Galaxy, passes every facet.
+    assert b"movie-item choose' name=\"1\"" in response.data
+
+
+def test_explain_movies(client):
+    response = client.get('/m/explain?s=galaxy&g=Action&g=Sci-Fi&match=all')
+    assert response.status_code == 200
+    assert [stage['stage'] for stage in response.json['plan']] == ['genres', 'text']
+
+
+def test_movies_sorted_by_rating(client):
+    response = client.get('/m?sort=rating')
+    assert response.status_code == 200
+    assert b'Sort by' in response.data
+
+    # An unknown order falls back to the default.
+    assert client.get('/m?sort=budget').status_code == 200
+
+
+def test_movies_are_paged_with_cursors(client):
+    response = client.get('/m?g=Action')
+    assert response.status_code == 200
+    next_url = re.search(r"location.href='([^']*cursor=[^']*)'\" style=\"float: right;\"><i class=\"fas fa-angle-right",
+                         response.data.decode())
+    assert next_url is not None
+
+    assert client.get(html.unescape(next_url.group(1))).status_code == 200
+    assert client.get('/m?cursor=garbage').status_code == 400
+    # Well-formed cursors whose keys don't fit the order.
+    assert client.get('/m?cursor=' + encode_cursor('date', ['x', 1])).status_code == 400
+    assert client.get('/m?cursor=' + encode_cursor('date', [1])).status_code == 400
+    assert client.get('/m?sort=rating&cursor=' + encode_cursor('rating', ['x', 1])).status_code == 400
+
+
+def test_api_batch_fetch_with_sparse_fields(client):
+    response = client.get('/api/v1/movies?ids=2,1&fields=title')
+    assert response.status_code == 200
+    assert response.json == {'movies': [{'id': 2, 'title': 'Prometheus'}, {'id': 1, 'title': 'Guardians of the Galaxy'}]}
+
+    assert client.get('/api/v1/movies?ids=1,x').status_code == 400
+    assert client.get('/api/v1/movies?ids=1&fields=budget').json['error'].startswith('Unknown fields')
+
+
+def test_api_listing_with_cursors(client):
+    first = client.get('/api/v1/movies?g=Action&sort=rating&limit=3&fields=rating').json
+    assert len(first['movies']) == 3 and first['previous'] is None
+    ratings = [movie['rating'] for movie in first['movies']]
+    assert ratings == sorted(ratings, reverse=True)
+
+    second = client.get('/api/v1/movies?g=Action&sort=rating&limit=3&cursor=' + first['next']).json
+    assert second['movies'][0]['rating'] <= ratings[-1]
+    assert client.get('/api/v1/movies?cursor=' + first['next']).status_code == 400
+    assert client.get('/api/v1/movies?cursor=' + encode_cursor('date', ['x', 1])).status_code == 400
+    assert client.get('/api/v1/movies?sort=rating&cursor=' + encode_cursor('rating', [1])).status_code == 400
+
+
+def test_api_movie_and_reviews(client):
+    assert client.get('/api/v1/movies/1').json['title'] == 'Guardians of the Galaxy'
+    assert 'reviews' in client.get('/api/v1/movies/1/reviews').json
+    assert client.get('/api/v1/movies/5000').status_code == 404
+    assert client.get('/api/v1/movies/5000/reviews').json['error'] == 'No movie with id 5000'
+
+
+def test_export_is_restricted_to_export_admins(client):
+    assert client.get('/export/movies.csv').status_code == 403
+
+
+def test_export_streams_datasets(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': os.path.join(os.path.dirname(__file__), '..', '..', 'covid', 'adapters', 'data'),
+        'WTF_CSRF_ENABLED': False,
+        'EXPORT_ADMINS': 'thorke'
+    })
+    client = app.test_client()
+    with client.session_transaction() as session_data:
+        session_data['username'] = 'thorke'
+
+    response = client.get('/export/genres.csv')
+    assert response.status_code == 200
+    assert response.data.decode('utf-8').splitlines()[0] == 'name,movie-count'
+    response = client.get('/export/reviews.ndjson', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert b'"movie_id"' in gzip.decompress(response.data)
+    assert client.get('/export/passwords.csv').status_code == 404
+
+    result = app.test_cli_runner().invoke(args=['export', str(tmp_path), '--dataset', 'movies'])
+    assert result.exit_code == 0
+    assert os.path.exists(os.path.join(str(tmp_path), 'Data1000Movies.csv'))
+
+
+def test_requests_are_served_with_catalogue_reloading_enabled(tmp_path):
+    data_path = os.path.join(os.path.dirname(__file__), '..', '..', 'covid', 'adapters', 'data')
+    for name in ('Data1000Movies.csv', 'users.csv', 'comments.csv'):
+        shutil.copy(os.path.join(data_path, name), str(tmp_path))
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': str(tmp_path),
+        'WTF_CSRF_ENABLED': False,
+        'CATALOGUE_RELOAD_INTERVAL': 3600
+    })
+    client = app.test_client()
+    assert client.get('/m?g=Action').status_code == 200
+    assert client.get('/api/v1/movies/1').status_code == 200
+
+    # Requests after a reload are served from the new catalogue.
+    path = os.path.join(str(tmp_path), 'Data1000Movies.csv')
+    with open(path, encoding='utf-8-sig') as infile:
+        rows = [row for row in csv.reader(infile) if row[0] != '1']
+    with open(path, 'w', encoding='utf-8', newline='') as outfile:
+        csv.writer(outfile).writerows(rows)
+    catalogue_reloader.reloader.stop()
+    assert catalogue_reloader.reloader.reload() == {'added': 0, 'updated': 0, 'removed': 1}
+    assert client.get('/api/v1/movies/1').status_code == 404
+    assert client.get('/m?g=Action').status_code == 200
+
+
+def test_ready_when_no_indexes_are_built_in_background(client):
+    response = client.get('/healthz/ready')
+
+    assert response.status_code == 200
+    assert response.get_json() == {'ready': True, 'indexes': {}}
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+import covid.api.services as api_services
+from covid.domain.model import make_review
+
+
+def test_parse_fields():
+    assert api_services.parse_fields(None) == api_services.DEFAULT_FIELDS
+    assert 'reviews' not in api_services.DEFAULT_FIELDS
+    assert api_services.parse_fields('rating, title') == ('id', 'title', 'rating')
+    with pytest.raises(api_services.UnknownFieldException):
+        api_services.parse_fields('title,budget')
+
+
+def test_can_get_movies_json_in_order_of_ids(in_memory_repo):
+    movies = json.loads(api_services.get_movies_json([3, 1, 5000], ('id', 'title', 'genres'), in_memory_repo))
+
+    assert [movie['id'] for movie in movies] == [3, 1]
+    assert movies[1] == {'id': 1, 'title': 'Guardians of the Galaxy', 'genres': ['Action', 'Adventure', 'Sci-Fi']}
+
+
+def test_movie_json_follows_new_reviews(in_memory_repo):
+    fields = ('id', 'review_count', 'reviews')
+    before = json.loads(api_services.get_movie_json(2, fields, in_memory_repo))
+
+    user = in_memory_repo.get_user('fmercury')
+    in_memory_repo.add_review(make_review(user, in_memory_repo.get_movie(2), 'Worth it', 8))
+    after = json.loads(api_services.get_movie_json(2, fields, in_memory_repo))
+
+    assert after['review_count'] == before['review_count'] + 1
+    assert after['reviews'][-1]['review_text'] == 'Worth it'
+
+
+def test_cannot_get_movie_json_for_non_existent_id(in_memory_repo):
+    with pytest.raises(api_services.NonExistentMovieException):
+        api_services.get_movie_json(5000, api_services.DEFAULT_FIELDS, in_memory_repo)
+
+
+def test_search_pages_follow_cursors(in_memory_repo):
+    all_ids = list(in_memory_repo.get_movie_ids_for_genre('the', 'all'))
+    movie_ids, previous_cursor, next_cursor = api_services.search_movie_ids('the', 'all', None, 5, in_memory_repo)
+    assert movie_ids == all_ids[:5] and previous_cursor is None
+
+    movie_ids, previous_cursor, next_cursor = api_services.search_movie_ids(
+        'the', 'all', next_cursor, 5, in_memory_repo)
+    assert movie_ids == all_ids[5:10]
+    assert api_services.search_movie_ids('the', 'all', previous_cursor, 5, in_memory_repo)[0] == all_ids[:5]
@@ -0,0 +1,192 @@
+import csv
+import os
+import shutil
+import time
+from threading import Thread
+
+import pytest
+
+from covid.adapters.catalogue_reloader import CatalogueReloader
+from covid.adapters.data_generator import generate
+from covid.adapters.facet_index import MovieFilter
+from covid.adapters.memory_repository import MemoryRepository, populate
+from covid.adapters.overlay_repository import OverlayRepository
+from covid.domain.model import make_review
+from covid.utilities.rwlock import ReadWriteLock
+
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), '..', '..', 'covid', 'adapters', 'data')
+
+
+@pytest.fixture
+def catalogue(tmp_path):
+    for name in ('Data1000Movies.csv', 'users.csv', 'comments.csv'):
+        shutil.copy(os.path.join(DATA_PATH, name), str(tmp_path))
+    repo = MemoryRepository()
+    populate(str(tmp_path), repo)
+    return str(tmp_path), repo
+
+
+def edit_movies(data_path, edit):
+    path = os.path.join(data_path, 'Data1000Movies.csv')
+    with open(path, encoding='utf-8-sig') as infile:
+        rows = list(csv.reader(infile))
+    rows = [rows[0]] + edit(rows[1:])
+    with open(path, 'w', encoding='utf-8', newline='') as outfile:
+        csv.writer(outfile).writerows(rows)
+
+
+def object_graph(repo):
+    # The repository's movies, genres and users, the links between them and their reviews, by identity.
+    return (
+        [(id(movie), movie.title, [id(genre) for genre in movie._genres], [id(review) for review in movie._reviews])
+         for movie in repo._movies],
+        [(id(genre), [id(movie) for movie in genre._genreged_movies]) for genre in repo._genres],
+        [(id(user), [id(review) for review in user._reviews]) for user in repo._users])
+
+
+def test_reload_applies_only_the_changes(catalogue):
+    data_path, repo = catalogue
+    repo.add_review(make_review(repo.get_user('fmercury'), repo.get_movie(2), 'Still good', 8))
+    reloader = CatalogueReloader(data_path, repo)
+    review_count = repo.get_movie(2).number_of_reviews
+
+    def edit(rows):
+        rows = [row for row in rows if row[0] != '5']
+        for row in rows:
+            if row[0] == '2':
+                row[1] = 'Prometheus Redux'
+                row[2] = 'Horror,Western'
+        new_row = list(rows[0])
+        new_row[0], new_row[1], new_row[2] = '5000', 'Quasar Patrol', 'Sci-Fi'
+        return rows + [new_row]
+    edit_movies(data_path, edit)
+
+    assert reloader.reload() == {'added': 1, 'updated': 1, 'removed': 1}
+    current = reloader.repository
+    assert current.get_movie(3) == repo.get_movie(3)
+    assert current.get_movies_by_id([5]) == []
+    assert current.get_number_of_movies() == 1000
+
+    # The updated movie keeps its reviews, now of the updated movie, and every index follows the changes.
+    updated = current.get_movie(2)
+    assert updated.title == 'Prometheus Redux'
+    assert updated.number_of_reviews == review_count
+    assert all(review.movie is updated for review in updated.reviews)
+    user_reviews = list(current.get_user('fmercury').reviews)
+    assert user_reviews[-1].movie is updated and user_reviews[-1].review == 'Still good'
+    assert 2 in current.get_movie_ids_for_filter(None, MovieFilter(genres=['Western']))
+    assert 2 not in current.get_movie_ids_for_filter(None, MovieFilter(genres=['Adventure']))
+    assert current.get_movie_ids_for_genre('quasar', 'all')[0] == 5000
+    assert 5000 in current.get_title_suggestions('quasar')
+    assert current.get_sort_key(2, 'review_count')[0] == -updated.number_of_reviews
+
+    assert reloader.reload() == {'added': 0, 'updated': 0, 'removed': 0}
+    assert reloader.reload_if_changed() is None
+
+
+def test_reload_leaves_the_previous_catalogue_unchanged(catalogue):
+    data_path, repo = catalogue
+    repo.add_review(make_review(repo.get_user('fmercury'), repo.get_movie(2), 'Still good', 8))
+    reloader = CatalogueReloader(data_path, repo)
+    title = repo.get_movie(2).title
+    graph = object_graph(repo)
+
+    def edit(rows):
+        for row in rows:
+            if row[0] == '2':
+                row[1] = 'Prometheus Redux'
+            if row[0] == '3':
+                row[2] = 'Western'
+        return [row for row in rows if row[0] != '1']
+    edit_movies(data_path, edit)
+    reloader.reload()
+
+    # Requests that started before the reload are still served from the repository they started with.
+    assert reloader.repository is not repo
+    assert repo.get_movie(2).title == title
+    assert repo.get_movies_by_id([1]) != []
+    assert repo.get_sort_key(2, 'title')[0] == title.casefold()
+    assert reloader.repository.get_sort_key(2, 'title')[0] == 'prometheus redux'
+    assert reloader.repository.get_movies_by_id([1]) == []
+    assert object_graph(repo) == graph
+    assert [genre.genre_name for genre in repo.get_movie(3).genres] != ['Western']
+
+    # Nor does the reload after it change the catalogue it replaces.
+    current = reloader.repository
+    graph = object_graph(current)
+    edit_movies(data_path, lambda rows: [row for row in rows if row[0] != '4'])
+    reloader.reload()
+    assert object_graph(current) == graph
+    assert [genre.genre_name for genre in current.get_movie(3).genres] == ['Western']
+
+
+def test_failed_reload_leaves_the_catalogue_in_place(catalogue, monkeypatch):
+    data_path, repo = catalogue
+    reloader = CatalogueReloader(data_path, repo)
+    graph = object_graph(repo)
+
+    def edit(rows):
+        for row in rows:
+            if row[0] == '3':
+                row[2] = 'Western'
+        return [row for row in rows if row[0] not in ('1', '2')]
+    edit_movies(data_path, edit)
+
+    def fail(self, movie):
+        if movie.id == 2:
+            raise RuntimeError('Failed part way')
+        return remove_movie(self, movie)
+    remove_movie = OverlayRepository.remove_movie
+    monkeypatch.setattr(OverlayRepository, 'remove_movie', fail)
+    with pytest.raises(RuntimeError):
+        reloader.reload()
+
+    assert reloader.repository is repo
+    assert repo.get_movies_by_id([1]) != [] and repo.get_movies_by_id([2]) != []
+    assert 1 in repo.get_movie_ids_for_genre(None, 'all')
+    assert object_graph(repo) == graph
+
+    # The changes are tried again at the next reload.
+    monkeypatch.undo()
+    assert reloader.reload_if_changed() == {'added': 0, 'updated': 1, 'removed': 2}
+    assert object_graph(repo) == graph
+    assert reloader.repository.get_movies_by_id([1, 2]) == []
+
+
+def test_reload_waits_for_requests_changing_the_catalogue(catalogue):
+    data_path, repo = catalogue
+    lock = ReadWriteLock()
+    reloader = CatalogueReloader(data_path, repo, lock)
+    edit_movies(data_path, lambda rows: [row for row in rows if row[0] != '1'])
+
+    lock.acquire_read()
+    thread = Thread(target=reloader.reload)
+    thread.start()
+    thread.join(0.2)
+    # The writer still sees the old catalogue.
+    assert thread.is_alive() and reloader.repository is repo
+    lock.release_read()
+    thread.join()
+    assert reloader.repository.get_movies_by_id([1]) == []
+
+
+def test_small_reload_costs_much_less_than_a_populate(tmp_path):
+    # A reload forks the repository, sharing every index's contents, so changing a movie copies only what it touches.
+    data_path = str(tmp_path)
+    generate(data_path, movies=2000, users=5, reviews=2000)
+    repo = MemoryRepository()
+    start = time.perf_counter()
+    populate(data_path, repo)
+    populate_time = time.perf_counter() - start
+    reloader = CatalogueReloader(data_path, repo)
+
+    def edit(rows):
+        rows[0][1] = rows[0][1] + ' Redux'
+        return rows
+    edit_movies(data_path, edit)
+    start = time.perf_counter()
+    assert reloader.reload()['updated'] == 1
+    reload_time = time.perf_counter() - start
+
+    assert reload_time < populate_time / 10
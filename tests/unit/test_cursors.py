@@ -0,0 +1,57 @@
+from datetime import date
+
+import pytest
+
+from covid.adapters.facet_index import MovieFilter
+from covid.domain.model import Movie
+from covid.utilities.cursors import encode_cursor, decode_cursor, get_movie_ids_page, InvalidCursorException
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('date', [date(2014, 1, 1), 1], reverse=True)
+
+    assert decode_cursor(cursor, 'date') == ([date(2014, 1, 1), 1], True)
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor, 'rating')
+    with pytest.raises(InvalidCursorException):
+        decode_cursor('not a cursor', 'date')
+
+
+@pytest.mark.parametrize('sort, key', [
+    ('date', ['x', 1]), ('date', [1]), ('date', [date(2014, 1, 1), 1, 2]), ('date', [date(2014, 1, 1), 'x']),
+    ('rating', ['x', 1]), ('rating', [-8.1, True]), ('title', [1, 1]), ('review_average', [-7.5, 1])
+])
+def test_cursors_with_keys_of_the_wrong_shape_are_invalid(sort, key):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(encode_cursor(sort, key), sort)
+
+
+def test_pages_follow_cursors(in_memory_repo):
+    movie_filter = MovieFilter(genres=['Action'])
+    all_ids = list(in_memory_repo.get_movie_ids_for_genre(None, 'Action', 'date'))
+
+    movie_ids, previous_cursor, next_cursor, last_cursor = get_movie_ids_page(
+        movie_filter, 'date', None, 10, in_memory_repo)
+    assert movie_ids == all_ids[:10] and previous_cursor is None
+
+    movie_ids, previous_cursor, next_cursor, _ = get_movie_ids_page(
+        movie_filter, 'date', next_cursor, 10, in_memory_repo)
+    assert movie_ids == all_ids[10:20]
+
+    assert get_movie_ids_page(movie_filter, 'date', previous_cursor, 10, in_memory_repo)[0] == all_ids[:10]
+
+    movie_ids, previous_cursor, next_cursor, _ = get_movie_ids_page(
+        movie_filter, 'date', last_cursor, 10, in_memory_repo)
+    assert movie_ids == all_ids[-10:] and next_cursor is None and previous_cursor is not None
+
+
+def test_pages_are_stable_as_movies_are_added(in_memory_repo):
+    movie_filter = MovieFilter()
+    _, _, next_cursor, _ = get_movie_ids_page(movie_filter, 'date', None, 10, in_memory_repo)
+    second_page = get_movie_ids_page(movie_filter, 'date', next_cursor, 10, in_memory_repo)[0]
+
+    # A movie dated before every other one lands on the first page, not the second.
+    in_memory_repo.add_movie(Movie(date(1900, 1, 1), 'Early', '', '', '', '5.0', '', 5000, 90, '', []))
+
+    assert get_movie_ids_page(movie_filter, 'date', next_cursor, 10, in_memory_repo)[0] == second_page
+    assert get_movie_ids_page(movie_filter, 'date', None, 10, in_memory_repo)[0][0] == 5000
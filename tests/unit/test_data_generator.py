@@ -0,0 +1,48 @@
+import csv
+import os
+from collections import Counter
+
+from covid.adapters import data_generator
+from covid.adapters.memory_repository import MemoryRepository, populate
+
+
+def read_rows(data_path, filename):
+    with open(os.path.join(data_path, filename), encoding='utf-8') as infile:
+        return list(csv.reader(infile))
+
+
+def test_generated_catalogue_can_be_populated(tmp_path):
+    data_generator.generate(str(tmp_path), movies=200, users=3, reviews=500)
+
+    repo = MemoryRepository()
+    populate(str(tmp_path), repo)
+
+    assert repo.get_number_of_movies() == 200
+    assert len(repo.get_reviews()) == 500
+    assert repo.get_user('user2') is not None
+
+
+def test_generated_files_use_the_populate_schemas(tmp_path):
+    data_generator.generate(str(tmp_path), movies=10, users=2, reviews=10)
+
+    assert read_rows(tmp_path, 'Data1000Movies.csv')[0] == data_generator.MOVIE_HEADER
+    assert read_rows(tmp_path, 'users.csv')[0] == data_generator.USER_HEADER
+    assert read_rows(tmp_path, 'comments.csv')[0] == data_generator.REVIEW_HEADER
+
+
+def test_generation_is_seeded(tmp_path):
+    data_generator.generate(str(tmp_path / 'a'), movies=50, users=5, reviews=100, seed=7)
+    data_generator.generate(str(tmp_path / 'b'), movies=50, users=5, reviews=100, seed=7)
+
+    for filename in ('Data1000Movies.csv', 'users.csv', 'comments.csv'):
+        assert read_rows(tmp_path / 'a', filename) == read_rows(tmp_path / 'b', filename)
+
+
+def test_review_counts_are_skewed_towards_popular_movies(tmp_path):
+    data_generator.generate(str(tmp_path), movies=1000, users=5, reviews=20000)
+
+    counts = Counter(row[2] for row in read_rows(tmp_path, 'comments.csv')[1:])
+    most_reviewed = [count for movie_id, count in counts.most_common(10)]
+
+    # Under a Zipf distribution the ten most popular of 1000 movies draw around a third of all reviews.
+    assert sum(most_reviewed) > 20000 * 0.2
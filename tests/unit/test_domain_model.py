@@ -109,3 +109,14 @@ def test_make_genre_associations_with_movie_already_genreged(movie, genre):
 
     with pytest.raises(ModelException):
         make_genre_association(movie, genre)
+
+
+def test_movie_version_changes_when_reviewed_or_genreged(movie, user, genre):
+    version = movie.version
+
+    make_review(user, movie, 'Loved it', 9)
+    assert movie.version != version
+
+    version = movie.version
+    make_genre_association(movie, genre)
+    assert movie.version != version
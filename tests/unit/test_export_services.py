@@ -0,0 +1,47 @@
+import gzip
+import json
+import os
+
+import pytest
+
+import covid.export.services as export_services
+from covid.adapters.memory_repository import MemoryRepository, populate
+
+
+def write_export(directory, repo):
+    for dataset in ('movies', 'users', 'reviews'):
+        with open(os.path.join(directory, export_services.filename(dataset, 'csv')), 'wb') as outfile:
+            for chunk in export_services.stream(dataset, 'csv', repo):
+                outfile.write(chunk)
+
+
+def test_csv_export_round_trips_through_populate(in_memory_repo, tmp_path):
+    write_export(tmp_path, in_memory_repo)
+    repo = MemoryRepository()
+    populate(str(tmp_path), repo)
+
+    assert repo.get_number_of_movies() == in_memory_repo.get_number_of_movies()
+    original, loaded = in_memory_repo.get_movie(1), repo.get_movie(1)
+    assert (loaded.title, loaded.date, loaded.rating, loaded.runtime, loaded.director, loaded.actors) == \
+        (original.title, original.date, original.rating, original.runtime, original.director, original.actors)
+    assert sorted(genre.genre_name for genre in loaded.genres) == sorted(genre.genre_name for genre in original.genres)
+    assert [user.username for user in repo.get_users()] == [user.username for user in in_memory_repo.get_users()]
+    assert [(review.user.username, review.movie.id, review.review) for review in repo.get_reviews()] == \
+        [(review.user.username, review.movie.id, review.review) for review in in_memory_repo.get_reviews()]
+
+
+def test_ndjson_export_is_gzipped_on_the_fly(in_memory_repo):
+    chunks = list(export_services.stream('movies', 'ndjson', in_memory_repo, compress=True))
+    assert len(chunks) > 1
+
+    records = [json.loads(line) for line in gzip.decompress(b''.join(chunks)).decode('utf-8').splitlines()]
+    assert len(records) == in_memory_repo.get_number_of_movies()
+    assert next(record for record in records if record['id'] == 1)['title'] == 'Guardians of the Galaxy'
+
+
+def test_users_are_exported_without_passwords(in_memory_repo):
+    records = b''.join(export_services.stream('users', 'ndjson', in_memory_repo)).decode('utf-8').splitlines()
+
+    assert json.loads(records[0]) == {'id': 'thorke', 'username': 'thorke'}
+    with pytest.raises(export_services.UnknownDatasetException):
+        export_services.stream('passwords', 'csv', in_memory_repo)
@@ -0,0 +1,110 @@
+from datetime import date
+
+from covid.adapters.facet_index import FacetIndex, MovieFilter, popcount
+from covid.domain.model import Movie, Genre, make_genre_association
+
+
+def make_movie(movie_id, year, rating, runtime, genres):
+    movie = Movie(date(year, 1, 1), 'Movie {}'.format(movie_id), '', '', '', rating, '', movie_id, runtime, '', [])
+    for genre in genres:
+        make_genre_association(movie, Genre(genre))
+    return movie
+
+
+def make_index():
+    index = FacetIndex()
+    index.add_movie(make_movie(1, 2014, '8.1', 121, ['Action', 'Sci-Fi']))
+    index.add_movie(make_movie(2, 2016, '7.0', 108, ['Comedy']))
+    index.add_movie(make_movie(3, 2016, '6.2', 85, ['Action', 'Comedy']))
+    index.add_movie(make_movie(4, 2012, '5.5', 140, ['Drama']))
+    return index
+
+
+def test_popcount():
+    assert popcount(0) == 0
+    assert popcount(0b1011) == 3
+
+
+def test_genres_combine_with_or_and_and():
+    index = make_index()
+
+    assert index.movie_ids(index.match(MovieFilter(genres=['Action', 'Comedy']))) == [1, 2, 3]
+    assert index.movie_ids(index.match(MovieFilter(genres=['Action', 'Comedy'], match_all_genres=True))) == [3]
+    assert index.movie_ids(index.match(MovieFilter(genres=['Western']))) == []
+
+
+def test_numeric_facets():
+    index = make_index()
+
+    assert index.movie_ids(index.match(MovieFilter(year_from=2014, year_to=2016))) == [1, 2, 3]
+    assert index.movie_ids(index.match(MovieFilter(min_rating=7))) == [1, 2]
+    assert index.movie_ids(index.match(MovieFilter(runtime='long'))) == [1, 4]
+    assert index.movie_ids(index.match(MovieFilter(genres=['Comedy'], min_rating=6.5, runtime='medium'))) == [2]
+
+
+def test_counts_leave_out_the_facets_own_selection():
+    index = make_index()
+    counts = index.counts(MovieFilter(genres=['Comedy'], year_from=2016, year_to=2016))
+
+    # Genres are OR-ed, so each genre counts the 2016 movies it would add.
+    assert counts['genres'] == {'Action': 1, 'Comedy': 2, 'Drama': 0, 'Sci-Fi': 0}
+    # Years count comedies in each year.
+    assert counts['years'] == {2012: 0, 2014: 0, 2016: 2}
+    assert counts['min_rating'][7] == 1
+    assert counts['runtime'] == {'short': 1, 'medium': 1, 'long': 0}
+
+
+def test_counts_within_a_search():
+    index = make_index()
+    counts = index.counts(MovieFilter(), within=index.ordinal_bits([1, 4]))
+
+    assert counts['genres'] == {'Action': 1, 'Comedy': 0, 'Drama': 1, 'Sci-Fi': 1}
+
+
+def test_removed_movies_are_not_matched():
+    index = make_index()
+    index.remove_movie(make_movie(3, 2016, '6.2', 85, ['Action', 'Comedy']))
+
+    assert index.movie_ids(index.match(MovieFilter(genres=['Comedy']))) == [2]
+    assert index.counts(MovieFilter())['years'] == {2012: 1, 2014: 1, 2016: 1}
+    assert not index.member_test(index.match(MovieFilter()))(3)
+    assert len(index) == 3
+
+
+def test_updated_movies_keep_their_ordinals():
+    index = make_index()
+    for _ in range(100):
+        index.remove_movie(make_movie(2, 2016, '7.0', 108, ['Comedy']))
+        index.add_movie(make_movie(2, 2016, '7.5', 108, ['Comedy', 'Drama']))
+
+    assert index.movie_ids(index.match(MovieFilter())) == [1, 2, 3, 4]
+    assert index.movie_ids(index.match(MovieFilter(genres=['Drama']))) == [2, 4]
+    assert index.match(MovieFilter()) == 0b1111
+
+
+def test_free_ordinals_are_compacted():
+    index = make_index()
+    for movie_id in range(5, 3000):
+        index.add_movie(make_movie(movie_id, 2000, '6.0', 100, ['Western']))
+        index.remove_movie(make_movie(movie_id, 2000, '6.0', 100, ['Western']))
+    index.add_movie(make_movie(5000, 2001, '9.0', 95, ['Western']))
+
+    assert len(index._movie_ids) < 1100
+    assert index.movie_ids(index.match(MovieFilter())) == [1, 2, 3, 4, 5000]
+    assert index.movie_ids(index.match(MovieFilter(genres=['Western'], min_rating=9))) == [5000]
+    assert index.counts(MovieFilter())['genres']['Action'] == 2
+
+
+def test_fork_is_changed_without_changing_the_index():
+    index = make_index()
+    fork = index.fork()
+    fork.remove_movie(make_movie(1, 2014, '8.1', 121, ['Action', 'Sci-Fi']))
+    fork.add_genre_association(make_movie(2, 2016, '7.0', 108, []), Genre('Drama'))
+    fork.add_movie(make_movie(5, 2014, '9.0', 95, ['Action']))
+
+    assert index.movie_ids(index.match(MovieFilter(genres=['Action']))) == [1, 3]
+    assert index.movie_ids(index.match(MovieFilter(genres=['Drama']))) == [4]
+    assert index.movie_ids(index.match(MovieFilter(year_from=2014, year_to=2014))) == [1]
+    assert sorted(fork.movie_ids(fork.match(MovieFilter(genres=['Action'])))) == [3, 5]
+    assert fork.movie_ids(fork.match(MovieFilter(genres=['Drama']))) == [2, 4]
+    assert fork.movie_ids(fork.match(MovieFilter(year_from=2014, year_to=2014))) == [5]
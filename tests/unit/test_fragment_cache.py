@@ -0,0 +1,30 @@
+from covid.utilities.fragment_cache import FragmentCache
+
+
+def test_fragment_is_rendered_once_per_version():
+    cache = FragmentCache()
+    renders = []
+
+    def render():
+        renders.append(1)
+        return '<movie>'
+
+    assert cache.get_or_render('movie_card', 1, 7, render) == '<movie>'
+    assert cache.get_or_render('movie_card', 1, 7, render) == '<movie>'
+    assert len(renders) == 1
+
+    # A new version of the entity is rendered afresh.
+    cache.get_or_render('movie_card', 1, 8, render)
+    assert len(renders) == 2
+
+
+def test_least_recently_used_fragment_is_evicted():
+    cache = FragmentCache(max_entries=2)
+    cache.put('movie_card', 1, 1, 'a')
+    cache.put('movie_card', 2, 1, 'b')
+    cache.get('movie_card', 1, 1)
+    cache.put('movie_card', 3, 1, 'c')
+
+    assert len(cache) == 2
+    assert cache.get('movie_card', 2, 1) is None
+    assert cache.get('movie_card', 1, 1) == 'a'
@@ -0,0 +1,53 @@
+import os
+import signal
+from threading import Event, Thread
+
+import pytest
+
+import covid.authentication.hashing as hashing
+from covid.authentication.hashing import PasswordHasher, HashingOverloadedException
+
+
+def test_hasher_uses_configured_method():
+    hasher = PasswordHasher(workers=2, method='pbkdf2:sha256:1000')
+
+    password_hash = hasher.generate_password_hash('abcd1A23')
+
+    assert password_hash.startswith('pbkdf2:sha256:1000$')
+    assert hasher.check_password_hash(password_hash, 'abcd1A23')
+    assert not hasher.check_password_hash(password_hash, 'abcd1A24')
+
+
+def test_hasher_rejects_work_beyond_its_admission_limit():
+    hasher = PasswordHasher(workers=1, queue_limit=0, method='pbkdf2:sha256:1000')
+    started, release = Event(), Event()
+
+    def occupy():
+        started.set()
+        release.wait()
+
+    busy = Thread(target=hasher._run, args=(occupy,))
+    busy.start()
+    started.wait()
+
+    with pytest.raises(HashingOverloadedException):
+        hasher.generate_password_hash('abcd1A23')
+
+    release.set()
+    busy.join()
+    assert hasher.generate_password_hash('abcd1A23')
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs os.fork')
+def test_hasher_works_in_a_forked_child(monkeypatch):
+    monkeypatch.setattr(hashing, 'hasher', PasswordHasher(workers=1, method='pbkdf2:sha256:1000'))
+    hashing.hasher.generate_password_hashes(['abcd1A23'])
+
+    pid = os.fork()
+    if pid == 0:
+        # Exit with 0 only if the child, whose pool thread didn't survive the fork, can still hash.
+        signal.alarm(10)
+        os._exit(0 if hashing.check_password_hash(hashing.generate_password_hash('abcd1A23'), 'abcd1A23') else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
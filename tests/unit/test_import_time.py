@@ -0,0 +1,20 @@
+import os
+
+import pytest
+
+from benchmarks.import_time import OPTIONAL_MODULES, budget, measure
+
+
+def test_cold_create_app_skips_optional_modules():
+    _, _, loaded = measure()
+
+    assert [name for name in OPTIONAL_MODULES if name in loaded] == []
+
+
+# Wall-clock time depends on the machine and its load, so the budget is only checked when one is asked for.
+@pytest.mark.skipif('IMPORT_TIME_BUDGET' not in os.environ, reason='set IMPORT_TIME_BUDGET to check import time')
+def test_cold_create_app_imports_within_budget():
+    total, modules, _ = measure()
+
+    slowest = sorted(modules, key=lambda name: modules[name][0], reverse=True)[:5]
+    assert total <= budget(), 'Imports took {:.3f}s; slowest: {}'.format(total, ', '.join(slowest))
@@ -0,0 +1,88 @@
+import pytest
+
+import covid.health.services as health_services
+from covid.adapters.data_generator import generate
+from covid.adapters.facet_index import MovieFilter
+from covid.adapters.memory_repository import MemoryRepository, populate, movie_from_row, read_csv_file
+
+
+@pytest.fixture(scope='module')
+def data_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('catalogue'))
+    generate(path, movies=500, users=5, reviews=500)
+    return path
+
+
+def load(data_path, defer_indexes):
+    repo = MemoryRepository(defer_indexes=defer_indexes)
+    populate(data_path, repo)
+    return repo
+
+
+def queries(repo):
+    return (
+        [repo.get_title_suggestions(prefix) for prefix in ('a', 'the', 'lo')],
+        [repo.get_people_with_prefix(role, 'a') for role in ('director', 'actor')],
+        [repo.get_movie_ids_for_person('actor', name) for name in repo.get_people_with_prefix('actor', '', 20)],
+        list(repo.get_movie_ids_for_genre('love', 'all'))
+    )
+
+
+def test_deferred_indexes_are_answered_by_scans_until_built(data_path):
+    built, deferred = load(data_path, False), load(data_path, True)
+
+    assert not any(status['ready'] for status in deferred.get_index_status().values())
+    assert queries(deferred)[:3] == queries(built)[:3]
+    # Searches are fuzzy matched, and not spelling corrected, until the search index is built.
+    assert deferred.explain_query('love', MovieFilter())[-1]['stage'] == 'fuzzy'
+    assert deferred.get_spelling_suggestion('lvoe') is None
+
+    deferred.build_indexes(background=False)
+
+    assert all(status['ready'] and status['built'] == 500 for status in deferred.get_index_status().values())
+    assert queries(deferred) == queries(built)
+    assert built.get_index_status() == dict()
+
+
+def test_indexes_built_in_background_see_concurrent_changes(data_path):
+    repo = load(data_path, True)
+    rows = list(read_csv_file(data_path + '/Data1000Movies.csv'))
+    removed = [repo.get_movie(movie_id) for movie_id in range(1, 500, 3)]
+
+    repo.build_indexes()
+    for movie in removed:
+        repo.remove_movie(movie)
+    for movie in removed[::2]:
+        repo.add_movie(movie_from_row(rows[movie.id - 1]))
+    repo._builder.join()
+
+    expected = load(data_path, False)
+    for movie in removed[1::2]:
+        expected.remove_movie(movie)
+    assert repo.get_number_of_movies() == expected.get_number_of_movies()
+    assert queries(repo) == queries(expected)
+
+
+def test_readiness_waits_for_required_indexes(data_path, monkeypatch):
+    repo = load(data_path, True)
+    assert not health_services.get_readiness(repo)['ready']
+
+    status = repo.get_index_status()
+    status['search']['ready'] = True
+    monkeypatch.setattr(repo, 'get_index_status', lambda: status)
+    assert health_services.get_readiness(repo, ['search'])['ready']
+    assert not health_services.get_readiness(repo, ['search', 'titles'])['ready']
+    assert not health_services.get_readiness(repo)['ready']
+
+    assert health_services.get_readiness(load(data_path, False))['ready']
+
+
+def test_readiness_rejects_unknown_indexes(data_path):
+    repo = load(data_path, True)
+
+    assert health_services.get_required_indexes(' search, titles,') == ['search', 'titles']
+    with pytest.raises(ValueError, match='serach'):
+        health_services.get_readiness(repo, ['serach'])
+    with pytest.raises(ValueError, match='serach'):
+        health_services.check_required_indexes(repo, ['titles', 'serach'])
+    health_services.check_required_indexes(load(data_path, False), ['serach'])
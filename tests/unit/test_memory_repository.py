@@ -5,6 +5,9 @@ import pytest
 
 from covid.domain.model import User, Movie, Genre, Review, make_review
 from covid.adapters.repository import RepositoryException
+from covid.adapters.facet_index import MovieFilter
+from covid.adapters.data_generator import generate
+from covid.adapters.memory_repository import MemoryRepository, populate, record_ranges
 
 
 def test_repository_can_add_a_user(in_memory_repo):
@@ -143,3 +146,188 @@ def test_repository_can_retrieve_reviews(in_memory_repo):
 
 
 
+
+
+def test_repository_caches_movie_ids_for_genre(in_memory_repo):
+    first = in_memory_repo.get_movie_ids_for_genre(None, 'Mystery')
+    second = in_memory_repo.get_movie_ids_for_genre(None, 'Mystery')
+
+    assert list(first) == list(second)
+    assert in_memory_repo._query_cache.hits == 1
+
+
+def test_repository_invalidates_cached_movie_ids_when_a_genre_association_is_added(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_genre(None, 'Motoring')
+    assert len(movie_ids) == 0
+
+    genre = Genre('Motoring')
+    in_memory_repo.add_genre(genre)
+    in_memory_repo.add_genre_association(in_memory_repo.get_movie(2), genre)
+
+    assert list(in_memory_repo.get_movie_ids_for_genre(None, 'Motoring')) == [2]
+
+
+def test_repository_does_not_cache_results_overtaken_by_a_change(in_memory_repo, monkeypatch):
+    find = in_memory_repo._find_movie_ids_for_genre
+
+    def find_during_a_change(s, genre_name):
+        movie_ids = find(s, genre_name)
+        # Another thread changes the catalogue before the result is stored.
+        in_memory_repo._query_cache.invalidate()
+        return movie_ids
+    monkeypatch.setattr(in_memory_repo, '_find_movie_ids_for_genre', find_during_a_change)
+
+    assert len(in_memory_repo.get_movie_ids_for_genre(None, 'Action')) > 0
+    assert len(in_memory_repo._query_cache) == 0
+
+
+def test_repository_ranks_search_results(in_memory_repo):
+    ranked = in_memory_repo.search_movies('guardians galaxy', k=3)
+
+    assert ranked[0][0] == 1
+    assert ranked[0][1] > ranked[-1][1]
+
+
+def test_repository_search_matches_directors_and_actors(in_memory_repo):
+    movie_ids = list(in_memory_repo.get_movie_ids_for_genre('James Gunn', 'all'))
+
+    assert 1 in movie_ids
+    assert movie_ids == [movie_id for movie_id, score in in_memory_repo.search_movies('James Gunn', k=len(movie_ids))]
+
+
+def test_repository_search_is_restricted_to_genre(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_genre('galaxy', 'Comedy')
+
+    assert 1 not in movie_ids
+    for movie_id in movie_ids:
+        assert 'Comedy' in [genre.genre_name for genre in in_memory_repo.get_movie(movie_id).genres]
+
+
+def test_repository_suggests_corrections_of_misspellings(in_memory_repo):
+    assert in_memory_repo.search_movies('Guardiens Galxy') == []
+    assert in_memory_repo.get_spelling_suggestion('Guardiens Galxy') == 'guardians galaxy'
+
+
+def test_repository_search_falls_back_to_fuzzy_matching(in_memory_repo):
+    assert in_memory_repo.get_spelling_suggestion('Guardi') is None
+    assert 1 in in_memory_repo.get_movie_ids_for_genre('Guardi', 'all')
+
+
+def test_repository_can_retrieve_movie_ids_for_person(in_memory_repo):
+    assert in_memory_repo.get_movie_ids_for_person('director', 'james gunn') == [1, 909, 938]
+    assert in_memory_repo.get_movie_ids_for_person('actor', 'Chris Pratt') == [1, 10, 39, 86, 385, 407, 697]
+    assert in_memory_repo.get_person('actor', 'chris  pratt') == 'Chris Pratt'
+
+
+def test_repository_can_retrieve_people_with_prefix(in_memory_repo):
+    names = in_memory_repo.get_people_with_prefix('actor', 'chris p', 5)
+
+    assert 'Chris Pratt' in names
+    assert all(name.lower().startswith('chris p') for name in names)
+
+
+def test_repository_does_not_retrieve_people_for_unknown_role(in_memory_repo):
+    with pytest.raises(RepositoryException):
+        in_memory_repo.get_movie_ids_for_person('producer', 'James Gunn')
+
+
+def test_repository_can_filter_movies_by_facets(in_memory_repo):
+    movie_filter = MovieFilter(genres=['Action', 'Sci-Fi'], match_all_genres=True, year_from=2014, year_to=2014,
+                               min_rating=8, runtime='long')
+    movie_ids = list(in_memory_repo.get_movie_ids_for_filter(None, movie_filter))
+
+    assert 1 in movie_ids
+    for movie in in_memory_repo.get_movies_by_id(movie_ids):
+        assert {'Action', 'Sci-Fi'} <= {genre.genre_name for genre in movie.genres}
+        assert movie.date.year == 2014 and float(movie.rating) >= 8 and movie.runtime > 120
+    assert in_memory_repo.get_facet_counts(None, movie_filter)['runtime']['long'] == len(movie_ids)
+
+
+def test_repository_filters_search_results_by_facets(in_memory_repo):
+    movie_ids = list(in_memory_repo.get_movie_ids_for_filter('galaxy', MovieFilter(year_from=2014, year_to=2014)))
+
+    assert movie_ids[0] == 1
+    assert in_memory_repo.get_facet_counts('galaxy', MovieFilter())['years'][2014] == len(movie_ids)
+
+
+def test_repository_sorts_movie_ids(in_memory_repo):
+    movie_ids = in_memory_repo.get_movie_ids_for_genre(None, 'all', 'rating')
+    ratings = [float(movie.rating) for movie in in_memory_repo.get_movies_by_id(movie_ids[:20])]
+    assert ratings == sorted(ratings, reverse=True)
+
+    movie_ids = in_memory_repo.get_movie_ids_for_genre(None, 'Action', 'runtime')
+    runtimes = [movie.runtime for movie in in_memory_repo.get_movies_by_id(movie_ids)]
+    assert runtimes == sorted(runtimes)
+
+    with pytest.raises(RepositoryException):
+        in_memory_repo.get_movie_ids_for_genre(None, 'all', 'budget')
+
+
+def test_repository_review_orders_follow_new_reviews(in_memory_repo):
+    user = in_memory_repo.get_user('fmercury')
+    movie = in_memory_repo.get_movie(7)
+    genre_name = next(iter(movie.genres)).genre_name
+    before = list(in_memory_repo.get_movie_ids_for_genre(None, genre_name, 'review_count'))
+
+    # Movie 1 has the most reviews, three, to begin with.
+    for _ in range(4):
+        in_memory_repo.add_review(make_review(user, movie, 'Again', 10))
+
+    assert in_memory_repo.get_movie_ids_for_genre(None, 'all', 'review_count')[0] == 7
+    after = list(in_memory_repo.get_movie_ids_for_genre(None, genre_name, 'review_count'))
+    assert after[0] == 7 and after != before
+
+
+def test_repository_can_remove_a_movie(in_memory_repo):
+    movie = in_memory_repo.get_movie(1)
+    in_memory_repo.remove_movie(movie)
+
+    assert in_memory_repo.get_movies_by_id([1]) == []
+    assert in_memory_repo.get_number_of_movies() == 999
+    assert 1 not in in_memory_repo.get_movie_ids_for_genre(None, 'Action')
+    assert 1 not in in_memory_repo.get_movie_ids_for_genre('galaxy', 'all')
+    assert all(review.movie is not movie for review in in_memory_repo.get_reviews())
+    assert 1 not in in_memory_repo.get_movie_ids_for_person('director', 'James Gunn')
+
+
+def test_movies_added_in_a_batch_are_ordered_as_if_added_one_at_a_time():
+    movies = [Movie(date(2020, 1, 1 + movie_id % 3), 'Movie {}'.format(movie_id), '', '', '', '6.0', '', movie_id,
+                    90, '', []) for movie_id in range(1, 13)]
+    single, batched = MemoryRepository(), MemoryRepository()
+    for movie in movies:
+        single.add_movie(movie)
+    batched.add_movies(movies[:6])
+    batched.add_movies(movies[6:])
+
+    assert [movie.id for movie in batched._movies] == [movie.id for movie in single._movies]
+    assert list(batched.get_movie_ids_for_genre('movie', 'all', 'date')) == \
+        list(single.get_movie_ids_for_genre('movie', 'all', 'date'))
+
+
+def test_record_ranges_split_only_between_records(tmp_path):
+    path = tmp_path / 'quoted.csv'
+    rows = ['id,text\n'] + ['{},"line one\nline, two ""{}""\n"\n'.format(i, i) for i in range(50)]
+    path.write_text(''.join(rows))
+
+    ranges = record_ranges(str(path), 7)
+    assert len(ranges) > 1
+    assert ranges[0][0] == len(rows[0])
+    assert ranges[-1][1] == path.stat().st_size
+    starts = {len(''.join(rows[:i]).encode()) for i in range(1, len(rows))}
+    assert all(start in starts for start, end in ranges)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(ranges, ranges[1:]))
+
+
+def test_populate_in_parallel_loads_the_same_catalogue(tmp_path):
+    generate(str(tmp_path), movies=300, users=5, reviews=600)
+    serial_repo, parallel_repo = MemoryRepository(), MemoryRepository()
+    populate(str(tmp_path), serial_repo)
+    populate(str(tmp_path), parallel_repo, workers=2)
+
+    assert parallel_repo.get_number_of_movies() == 300
+    assert parallel_repo.get_movies_by_id(range(1, 301)) == serial_repo.get_movies_by_id(range(1, 301))
+    for genre in serial_repo.get_genres():
+        assert parallel_repo.get_movie_ids_for_genre(None, genre.genre_name) == \
+            serial_repo.get_movie_ids_for_genre(None, genre.genre_name)
+    assert [(review.movie.id, review.review) for review in parallel_repo.get_reviews()] == \
+        [(review.movie.id, review.review) for review in serial_repo.get_reviews()]
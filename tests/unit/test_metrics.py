@@ -0,0 +1,34 @@
+import threading
+
+from covid.metrics.services import MetricsRegistry, render_prometheus
+
+
+def test_histogram_counts_observations_in_cumulative_buckets():
+    registry = MetricsRegistry(buckets=(0.01, 0.1))
+    registry.observe('covid_http_request_duration_seconds', 'home_bp.home', 0.005)
+    registry.observe('covid_http_request_duration_seconds', 'home_bp.home', 0.05)
+    registry.observe('covid_http_request_duration_seconds', 'home_bp.home', 5)
+
+    text = render_prometheus(registry)
+
+    assert 'covid_http_request_duration_seconds_bucket{endpoint="home_bp.home",le="0.01"} 1' in text
+    assert 'covid_http_request_duration_seconds_bucket{endpoint="home_bp.home",le="0.1"} 2' in text
+    assert 'covid_http_request_duration_seconds_bucket{endpoint="home_bp.home",le="+Inf"} 3' in text
+    assert 'covid_http_request_duration_seconds_count{endpoint="home_bp.home"} 3' in text
+
+
+def test_observations_from_finished_threads_are_kept():
+    registry = MetricsRegistry()
+
+    def record():
+        registry.increment('covid_http_requests_total', ('home_bp.home', 200))
+
+    threads = [threading.Thread(target=record) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    record()
+
+    histograms, counters = registry.collect()
+    assert counters[('covid_http_requests_total', ('home_bp.home', 200))] == 6
@@ -0,0 +1,106 @@
+from datetime import date
+
+import pytest
+
+from covid.domain.model import User, Movie, Genre, make_review
+from covid.adapters.repository import RepositoryException
+from covid.adapters.memory_repository import MemoryRepository
+
+
+def test_fork_reviews_leave_the_base_unchanged(base_repo):
+    reviews = len(base_repo.get_reviews())
+    sort_key = base_repo.get_sort_key(1, 'review_count')
+    fork = base_repo.fork()
+    movie = fork.get_movie(1)
+    user = fork.get_user('fmercury')
+    review = make_review(user, movie, 'Loved it', 9)
+    fork.add_review(review)
+
+    assert fork.get_reviews()[-1] is review
+    assert fork.get_movie(1).has_review(review)
+    assert fork.get_sort_key(1, 'review_count') != sort_key
+    assert len(base_repo.get_reviews()) == reviews
+    assert not base_repo.get_movie(1).has_review(review)
+    assert not base_repo.get_user('fmercury').has_review(review)
+    assert base_repo.get_sort_key(1, 'review_count') == sort_key
+
+
+def test_fork_added_movies_and_users_are_not_in_the_base(base_repo):
+    fork = base_repo.fork()
+    movie = Movie(date.fromisoformat('2020-03-15'), 'Zyzzyva returns', 'fp', 'h', 'ih', 7.0, 'bh', 5000, 90,
+                  'Someone', ['Anyone'])
+    fork.add_movie(movie)
+    fork.add_user(User('Dave', '123456789'))
+
+    assert fork.get_number_of_movies() == 1001
+    assert list(fork.get_movie_ids_for_genre('Zyzzyva', 'all')) == [5000]
+    assert fork.get_user('Dave') is not None
+    assert base_repo.get_number_of_movies() == 1000
+    assert list(base_repo.get_movie_ids_for_genre('Zyzzyva', 'all')) == []
+    assert base_repo.get_user('Dave') is None
+
+
+def test_fork_removed_movies_stay_in_the_base(base_repo):
+    fork = base_repo.fork()
+    genre_names = [genre.genre_name for genre in base_repo.get_movie(1).genres]
+    fork.remove_movie(fork.get_movie(1))
+
+    assert fork.get_movies_by_id([1]) == []
+    assert 1 not in fork.get_movie_ids_for_genre(None, genre_names[0])
+    assert base_repo.get_movie(1).id == 1
+    assert 1 in base_repo.get_movie_ids_for_genre(None, genre_names[0])
+    base_genre = next(genre for genre in base_repo.get_genres() if genre.genre_name == genre_names[0])
+    assert base_genre.is_applied_to(base_repo.get_movie(1))
+
+
+def test_fork_genre_associations_leave_the_base_unchanged(base_repo):
+    fork = base_repo.fork()
+    genre = Genre('Documentary')
+    fork.add_genre(genre)
+    fork.add_genre_association(fork.get_movie(1), genre)
+    existing = next(genre for genre in fork.get_genres() if not genre.is_applied_to(fork.get_movie(1)))
+    fork.add_genre_association(fork.get_movie(1), existing)
+
+    assert 1 in fork.get_movie_ids_for_genre(None, 'Documentary')
+    assert 1 in fork.get_movie_ids_for_genre(None, existing.genre_name)
+    assert len(base_repo.get_genres()) == len(fork.get_genres()) - 1
+    assert 1 not in base_repo.get_movie_ids_for_genre(None, existing.genre_name)
+    assert not base_repo.get_movie(1).is_genreged_by(existing)
+
+
+def test_forks_are_independent(base_repo):
+    first, second = base_repo.fork(), base_repo.fork()
+    first.add_user(User('Dave', '123456789'))
+
+    assert first.get_user('Dave') is not None
+    assert second.get_user('Dave') is None
+
+
+def test_cannot_fork_before_indexes_are_built():
+    repo = MemoryRepository(defer_indexes=True)
+
+    with pytest.raises(RepositoryException):
+        repo.fork()
+
+
+def test_fork_reads_and_writes_leave_the_base_objects_unchanged(base_repo):
+    def links(repo):
+        # Each genre's movies, and each movie's genres, by identity.
+        return ([[id(movie) for movie in genre._genreged_movies] for genre in repo._genres],
+                [[id(genre) for genre in movie._genres] for movie in repo._movies])
+    before = links(base_repo)
+
+    fork = base_repo.fork()
+    fork.get_movies_by_id([1, 2, 3])
+    fork.get_genres()
+    fork.get_movies_by_id([4])
+    movie = fork.get_movie(5)
+    fork.add_genre_association(movie, next(genre for genre in fork.get_genres() if not genre.is_applied_to(movie)))
+    fork.remove_movie(fork.get_movie(6))
+    fork.add_review(make_review(fork.get_user('fmercury'), fork.get_movie(7), 'Loved it', 9))
+
+    assert links(base_repo) == before
+    for movie in fork.get_movies_by_id([1, 4, 5, 7]):
+        for genre in movie.genres:
+            assert any(item is genre for item in fork.get_genres())
+            assert any(item is movie for item in genre._genreged_movies)
@@ -0,0 +1,61 @@
+from datetime import date
+
+from covid.adapters.people_index import PersonIndex, normalise_name
+from covid.domain.model import Movie
+
+
+def make_movie(movie_id, director, actors=()):
+    return Movie(date(2020, 1, 1), 'Movie {}'.format(movie_id), '', '', '', 7.0, '', movie_id, 100, director, list(actors))
+
+
+def test_names_are_normalised():
+    assert normalise_name(' Chris  Pratt ') == normalise_name('chris pratt')
+
+
+def test_movie_ids_are_sorted_and_names_keep_their_credit():
+    index = PersonIndex(lambda movie: movie.actors)
+    index.add_movie(make_movie(3, 'A', [' Chris Pratt']))
+    index.add_movie(make_movie(1, 'A', ['chris pratt', 'Zoe Saldana']))
+
+    assert index.movie_ids('CHRIS PRATT') == [1, 3]
+    assert index.name('chris pratt') == 'Chris Pratt'
+    assert index.movie_ids('Nobody') == []
+    assert index.name('Nobody') is None
+
+
+def test_names_with_prefix():
+    index = PersonIndex(lambda movie: movie.actors)
+    index.add_movie(make_movie(1, 'A', ['Chris Pratt', 'Chris Evans', 'Christian Bale', 'Zoe Saldana']))
+
+    assert index.names_with_prefix('chris') == ['Chris Evans', 'Chris Pratt', 'Christian Bale']
+    assert index.names_with_prefix('Chris ', limit=1) == ['Chris Evans']
+    assert index.names_with_prefix('x') == []
+
+
+def test_removing_a_movie_removes_its_credits():
+    index = PersonIndex(lambda movie: [movie.director])
+    index.add_movie(make_movie(1, 'James Gunn'))
+    index.add_movie(make_movie(2, 'James Gunn'))
+    index.add_movie(make_movie(3, 'Ridley Scott'))
+
+    index.remove_movie(make_movie(1, 'James Gunn'))
+    index.remove_movie(make_movie(3, 'Ridley Scott'))
+
+    assert index.movie_ids('James Gunn') == [2]
+    assert index.names_with_prefix('') == ['James Gunn']
+    assert len(index) == 1
+
+
+def test_fork_is_changed_without_changing_the_index():
+    index = PersonIndex(lambda movie: movie.actors)
+    index.add_movie(make_movie(1, 'A', ['Chris Pratt']))
+    index.add_movie(make_movie(2, 'A', ['Chris Pratt', 'Zoe Saldana']))
+
+    fork = index.fork()
+    fork.remove_movie(make_movie(1, 'A', ['Chris Pratt']))
+    fork.add_movie(make_movie(3, 'A', ['Chris Evans']))
+
+    assert index.movie_ids('chris pratt') == [1, 2]
+    assert index.names_with_prefix('chris') == ['Chris Pratt']
+    assert fork.movie_ids('chris pratt') == [2]
+    assert fork.names_with_prefix('chris') == ['Chris Evans', 'Chris Pratt']
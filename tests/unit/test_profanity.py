@@ -0,0 +1,48 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from covid.utilities.profanity import ProfanityFilter
+
+
+@pytest.fixture
+def profanity_filter():
+    return ProfanityFilter(['shit', 'ass', 'blow job'])
+
+
+@pytest.mark.parametrize(('text', 'expected'), (
+        ('a good film', False),
+        ('this film is shit', True),
+        ('SHIT', True),
+        ('sh1t happens', True),
+        ('what an @ss', True),
+        ('a$$', True),
+        ('a class act', False),
+        ('assassins everywhere', False),
+        ('blow job', True),
+        ('blow--job', True),
+        ('blowjob', False),
+        ('ok,shit,ok', True),
+        ('', False),
+))
+def test_profanity_filter_matches_whole_words_and_variants(profanity_filter, text, expected):
+    assert profanity_filter.contains_profanity(text) is expected
+
+
+def test_default_word_list_is_compiled():
+    from covid.utilities import profanity
+
+    assert profanity.contains_profanity('what the fuck')
+    assert not profanity.contains_profanity('what the duck')
+
+
+def test_profanity_filter_is_built_once_and_shared_by_threads(profanity_filter):
+    states = profanity_filter.number_of_states
+    texts = ['this film is shit', 'a good film', 'blow--job', 'assassins everywhere', 'a$$', 'ünïcödé wörds shit']
+    expected = [profanity_filter.contains_profanity(text) for text in texts]
+
+    with ThreadPoolExecutor(8) as pool:
+        results = list(pool.map(profanity_filter.contains_profanity, texts * 2000))
+
+    assert results == expected * 2000
+    assert profanity_filter.number_of_states == states
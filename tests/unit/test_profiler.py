@@ -0,0 +1,32 @@
+from threading import get_ident
+
+from covid.metrics.profiler import StackSampler, RequestSelector
+
+
+def test_sampler_collects_collapsed_stacks_of_profiled_threads():
+    sampler = StackSampler()
+    sampler.begin(get_ident(), 'home_bp.movies_by_genre')
+    sampler.sample()
+    sampler.end(get_ident())
+    sampler.sample()
+
+    stacks = sampler.collapsed()
+    assert sampler.samples == 1
+    assert stacks.startswith('home_bp.movies_by_genre;')
+    assert 'test_profiler.py:test_sampler_collects_collapsed_stacks_of_profiled_threads;' in stacks
+
+
+def test_selector_profiles_every_nth_request():
+    selector = RequestSelector(every_n=3)
+
+    selected = [selector.selects('home_bp.home', {}, None) for _ in range(6)]
+    assert selected == [False, False, True, False, False, True]
+
+
+def test_selector_profiles_listed_endpoints_and_admin_triggers():
+    selector = RequestSelector(endpoints=['home_bp.movies_by_genre'], query_parameter='_profile', admins=['thorke'])
+
+    assert selector.selects('home_bp.movies_by_genre', {}, None)
+    assert selector.selects('home_bp.home', {'_profile': '1'}, 'thorke')
+    assert not selector.selects('home_bp.home', {'_profile': '1'}, 'fmercury')
+    assert not selector.selects('home_bp.home', {}, 'thorke')
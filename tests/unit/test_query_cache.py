@@ -0,0 +1,41 @@
+import pytest
+
+from covid.adapters.query_cache import QueryCache
+
+
+def test_cached_ids_are_read_only():
+    cache = QueryCache()
+    ids = cache.put(('galaxy', 'all'), [1, 2, 3])
+
+    assert list(cache.get(('galaxy', 'all'))[1:]) == [2, 3]
+    with pytest.raises(TypeError):
+        ids[0] = 7
+
+
+def test_cache_is_bounded_by_total_ids():
+    cache = QueryCache(max_ids=5)
+    cache.put(('a', 'all'), [1, 2, 3])
+    cache.put(('b', 'all'), [4, 5])
+    cache.get(('a', 'all'))
+    cache.put(('c', 'all'), [6])
+
+    # The least recently used result is evicted to make room.
+    assert cache.get(('b', 'all')) is None
+    assert cache.size == 4
+
+    # A result larger than the whole cache is returned but not kept.
+    assert len(cache.put(('d', 'all'), range(10))) == 10
+    assert cache.get(('d', 'all')) is None
+
+
+def test_results_computed_before_an_invalidation_are_not_kept():
+    cache = QueryCache()
+    generation = cache.generation
+    # The catalogue changes while the result is being computed.
+    cache.invalidate()
+
+    assert list(cache.put(('galaxy', 'all'), [1, 2], generation)) == [1, 2]
+    assert cache.get(('galaxy', 'all')) is None
+
+    cache.put(('galaxy', 'all'), [1, 2], cache.generation)
+    assert list(cache.get(('galaxy', 'all'))) == [1, 2]
@@ -0,0 +1,73 @@
+from datetime import date
+
+from covid.adapters.facet_index import FacetIndex, MovieFilter
+from covid.adapters.query_planner import QueryPlanner
+from covid.adapters.search_index import TextSearchIndex
+from covid.domain.model import Movie, Genre, make_genre_association
+
+
+def make_planner():
+    movies = dict()
+    indexes = [FacetIndex(), TextSearchIndex()]
+    titles = ['Star Wars', 'Star Trek', 'Wall Street', 'Lone Star', 'Starship Troopers', 'Street Kings']
+    for movie_id, title in enumerate(titles, 1):
+        movie = Movie(date(2000 + movie_id, 1, 1), title, '', '', '', '7.0', '', movie_id, 100, '', [])
+        make_genre_association(movie, Genre('Sci-Fi' if movie_id % 2 else 'Drama'))
+        if movie_id == 1:
+            make_genre_association(movie, Genre('Action'))
+        movies[movie_id] = movie
+        for index in indexes:
+            index.add_movie(movie)
+    return QueryPlanner(movies, *indexes)
+
+
+def stage_names(stages):
+    return [stage['stage'] for stage in stages]
+
+
+def test_most_selective_facet_runs_first():
+    planner = make_planner()
+    movie_ids, stages = planner.run(None, MovieFilter(genres=['Sci-Fi'], year_from=2001, year_to=2001))
+
+    assert movie_ids == [1]
+    assert stage_names(stages) == ['years', 'genres']
+    assert [stage['estimate'] for stage in stages] == [1, 3]
+    assert [(stage['rows_in'], stage['rows_out']) for stage in stages] == [(6, 1), (1, 1)]
+
+
+def test_text_search_scores_only_surviving_candidates():
+    planner = make_planner()
+    movie_ids, stages = planner.run('star', MovieFilter(genres=['Action']))
+
+    assert movie_ids == [1]
+    assert stages[-1]['stage'] == 'text'
+    assert stages[-1]['method'] == 'score candidates'
+
+    movie_ids, stages = planner.run('star', MovieFilter())
+    assert sorted(movie_ids) == [1, 2, 4]
+    assert stages[-1]['method'] == 'walk postings'
+
+
+def test_misspelt_search_is_fuzzy_matched():
+    planner = make_planner()
+    movie_ids, stages = planner.run('stret', MovieFilter())
+
+    assert movie_ids == [3, 6]
+    assert stage_names(stages) == ['text', 'fuzzy']
+
+
+def test_fuzzy_matching_runs_last_on_the_candidates_left():
+    planner = make_planner()
+    movie_ids, stages = planner.run('troop', MovieFilter(genres=['Sci-Fi']))
+
+    assert movie_ids == [5]
+    assert stages[-1]['stage'] == 'fuzzy'
+    assert stages[-1]['rows_in'] == 3
+
+
+def test_empty_filter_stops_before_searching():
+    planner = make_planner()
+    movie_ids, stages = planner.run('star', MovieFilter(genres=['Western']))
+
+    assert movie_ids == []
+    assert stage_names(stages) == ['genres']
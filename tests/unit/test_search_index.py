@@ -0,0 +1,75 @@
+from datetime import date
+
+from covid.adapters.search_index import TextSearchIndex, tokenise
+from covid.domain.model import Movie
+
+
+def make_movie(movie_id, title, first_para='', director='', actors=()):
+    return Movie(date(2020, 1, 1), title, first_para, '', '', 7.0, '', movie_id, 100, director, list(actors))
+
+
+def test_tokenise_lowercases_and_splits_on_punctuation():
+    assert tokenise("Guardians of the Galaxy: Vol. 2") == ['guardians', 'of', 'the', 'galaxy', 'vol', '2']
+    assert tokenise(None) == []
+
+
+def test_title_matches_outrank_description_matches():
+    index = TextSearchIndex()
+    index.add_movie(make_movie(1, 'Storm Warning', first_para='A quiet town.'))
+    index.add_movie(make_movie(2, 'Quiet Town', first_para='A storm approaches.'))
+    index.add_movie(make_movie(3, 'Unrelated', first_para='Nothing to see.'))
+
+    assert [movie_id for movie_id, score in index.search('storm')] == [1, 2]
+
+
+def test_rarer_terms_score_higher():
+    index = TextSearchIndex()
+    index.add_movie(make_movie(1, 'The Dark'))
+    index.add_movie(make_movie(2, 'The Knight'))
+    index.add_movie(make_movie(3, 'The End'))
+
+    assert index.search('the knight')[0][0] == 2
+
+
+def test_search_returns_top_k_and_respects_accept():
+    index = TextSearchIndex()
+    for movie_id in range(1, 21):
+        index.add_movie(make_movie(movie_id, 'Galaxy {}'.format(movie_id)))
+
+    assert len(index.search('galaxy', k=5)) == 5
+    assert [movie_id for movie_id, score in index.search('galaxy', k=3, accept=lambda i: i % 2 == 0)] == [2, 4, 6]
+    assert index.search('nebula') == []
+
+
+def test_removing_and_readding_a_movie_updates_the_index():
+    index = TextSearchIndex()
+    movie = make_movie(1, 'Arrival', director='Denis Villeneuve', actors=['Amy Adams'])
+    index.add_movie(movie)
+    assert index.document_frequency('villeneuve') == 1
+
+    movie = make_movie(1, 'Arrival', director='Someone Else', actors=['Amy Adams'])
+    index.add_movie(movie)
+    assert index.document_frequency('villeneuve') == 0
+    assert index.search('adams')[0][0] == 1
+
+    index.remove_movie(movie)
+    assert len(index) == 0
+    assert index.search('arrival') == []
+
+
+def test_fork_is_changed_without_changing_the_index():
+    index = TextSearchIndex()
+    index.add_movie(make_movie(1, 'Storm Warning'))
+    index.add_movie(make_movie(2, 'Storm Front'))
+    before = index.search('storm')
+
+    fork = index.fork()
+    fork.remove_movie(make_movie(1, 'Storm Warning'))
+    fork.add_movie(make_movie(3, 'Perfect Storm'))
+    fork.add_movie(make_movie(2, 'Quiet Front'))
+
+    assert index.search('storm') == before
+    assert [movie_id for movie_id, score in fork.search('storm')] == [3]
+    assert [movie_id for movie_id, score in index.search('front')] == [2]
+    assert [movie_id for movie_id, score in fork.search('quiet')] == [2]
+    assert index.search('quiet') == []
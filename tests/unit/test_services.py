@@ -5,6 +5,7 @@ import pytest
 from covid.authentication.services import AuthenticationException
 from covid.home import services as home_services
 from covid.authentication import services as auth_services
+from covid.people import services as people_services
 from covid.news.services import NonExistentMovieException
 
 
@@ -134,3 +135,61 @@ def test_get_reviews_for_movie_without_reviews(in_memory_repo):
     reviews_as_dict = home_services.get_reviews_for_movie(2, in_memory_repo)
     assert len(reviews_as_dict) == 0
 
+
+
+def test_get_movie_ids_for_genre_normalises_the_search(in_memory_repo):
+    spaced = home_services.get_movie_ids_for_genre('  guardians   of ', 'all', in_memory_repo)
+    plain = home_services.get_movie_ids_for_genre('guardians of', 'all', in_memory_repo)
+    assert list(spaced) == list(plain)
+
+    # A blank search is no search.
+    assert len(home_services.get_movie_ids_for_genre('  ', 'all', in_memory_repo)) == 1000
+
+
+@pytest.mark.parametrize('s, count', [('Prometeus', 3), ('Avengr', 3), ('Galax', 1), ('incep', 18)])
+def test_misspelt_searches_keep_their_fuzzy_matches(in_memory_repo, s, count):
+    movie_ids = home_services.get_movie_ids_for_genre(s, 'all', in_memory_repo)
+
+    assert len(movie_ids) == count
+    assert home_services.get_spelling_suggestion(s, 'all', movie_ids, in_memory_repo) is None
+
+
+def test_spelling_is_suggested_only_for_searches_matching_nothing(in_memory_repo):
+    movie_ids = home_services.get_movie_ids_for_genre('Guardiens Galxy', 'all', in_memory_repo)
+    assert len(movie_ids) == 0
+    assert home_services.get_spelling_suggestion('Guardiens Galxy', 'all', movie_ids, in_memory_repo) == \
+        'guardians galaxy'
+
+    # A correction that finds nothing either is no better than the search as typed.
+    movie_ids = home_services.get_movie_ids_for_genre('Guardiens Galxy', 'Western', in_memory_repo)
+    assert len(movie_ids) == 0
+    assert home_services.get_spelling_suggestion('Guardiens Galxy', 'Western', movie_ids, in_memory_repo) is None
+
+
+def test_get_movie_ids_for_genre_async(in_memory_repo):
+    import asyncio
+
+    movie_ids = asyncio.run(home_services.get_movie_ids_for_genre_async(None, 'Mystery', in_memory_repo))
+    assert list(movie_ids) == list(home_services.get_movie_ids_for_genre(None, 'Mystery', in_memory_repo))
+
+
+def test_can_get_movies_for_person(in_memory_repo):
+    movies, page_count = people_services.get_movies_for_person('actor', 'Chris Pratt', 1, 5, in_memory_repo)
+
+    assert [movie['id'] for movie in movies] == [407, 697]
+    assert page_count == 2
+
+
+def test_cannot_get_unknown_person(in_memory_repo):
+    with pytest.raises(people_services.UnknownPersonException):
+        people_services.get_person('actor', 'Nobody At All', in_memory_repo)
+
+    with pytest.raises(people_services.UnknownPersonException):
+        people_services.get_people_with_prefix('producer', 'J', 10, in_memory_repo)
+
+
+def test_can_get_title_suggestions(in_memory_repo):
+    suggestions = home_services.get_title_suggestions('guardians', 5, in_memory_repo)
+
+    assert suggestions[0]['id'] == 1
+    assert suggestions[0]['title'] == 'Guardians of the Galaxy'
@@ -0,0 +1,65 @@
+import asyncio
+from threading import Event, Thread
+
+import pytest
+
+from covid.utilities.singleflight import SingleFlight, AsyncSingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    started, release = Event(), Event()
+    calls = []
+
+    def search():
+        calls.append(1)
+        started.set()
+        release.wait()
+        return [1, 2, 3]
+
+    results = []
+    leader = Thread(target=lambda: results.append(flight.do('galaxy', search)))
+    leader.start()
+    started.wait()
+
+    followers = [Thread(target=lambda: results.append(flight.do('galaxy', search))) for _ in range(3)]
+    for follower in followers:
+        follower.start()
+    while flight.shared < 3:
+        pass
+    release.set()
+    for thread in [leader] + followers:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [[1, 2, 3]] * 4
+
+    # Once complete, the key is forgotten.
+    flight.do('galaxy', search)
+    assert len(calls) == 2
+
+
+def test_exceptions_are_raised_to_the_caller():
+    flight = SingleFlight()
+
+    def fail():
+        raise ValueError
+
+    with pytest.raises(ValueError):
+        flight.do('galaxy', fail)
+
+
+def test_concurrent_awaits_share_one_task():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def search():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return [1, 2, 3]
+
+    async def main():
+        return await asyncio.gather(*[flight.do('galaxy', search) for _ in range(5)])
+
+    assert asyncio.run(main()) == [[1, 2, 3]] * 5
+    assert len(calls) == 1
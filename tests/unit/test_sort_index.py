@@ -0,0 +1,113 @@
+from datetime import date
+
+from covid.adapters.sort_index import SortIndex
+from covid.domain.model import Movie, Review, User, make_review
+
+
+def make_movie(movie_id, year, title, rating, runtime):
+    return Movie(date(year, 1, 1), title, '', '', '', rating, '', movie_id, runtime, '', [])
+
+
+def make_index():
+    movies = [
+        make_movie(1, 2014, 'Guardians of the Galaxy', '8.1', 121),
+        make_movie(2, 2012, 'prometheus', '7.0', 124),
+        make_movie(3, 2016, 'Split', '7.3', 117),
+    ]
+    index = SortIndex()
+    for movie in movies:
+        index.add_movie(movie)
+    return index, movies
+
+
+def test_static_orders():
+    index, movies = make_index()
+
+    assert list(index.order('date')) == [2, 1, 3]
+    assert list(index.order('rating')) == [1, 3, 2]
+    assert list(index.order('runtime')) == [3, 1, 2]
+    assert list(index.order('title')) == [1, 2, 3]
+    assert index.sort([3, 2], 'rating') == [3, 2]
+
+
+def test_static_orders_follow_the_catalogue():
+    index, movies = make_index()
+    index.order('rating')
+    index.add_movie(make_movie(4, 2010, 'Inception', '8.8', 148))
+    index.remove_movie(movies[0])
+
+    assert list(index.order('rating')) == [4, 3, 2]
+
+
+def test_dynamic_orders_follow_reviews():
+    index, movies = make_index()
+    user = User('thorke', 'cLQ^C#oFXloS')
+    version = index.version('review_count')
+
+    for rating in (6, 10):
+        index.add_review(make_review(user, movies[1], 'Nice', rating))
+    index.add_review(make_review(user, movies[2], 'Great', 9))
+
+    assert index.version('review_count') != version
+    assert list(index.order('review_count')) == [2, 3, 1]
+    assert list(index.order('review_average')) == [3, 2, 1]
+    assert index.order('review_count')[1:] == [3, 1]
+
+
+def test_batches_give_the_same_orders_as_single_changes():
+    user = User('thorke', 'cLQ^C#oFXloS')
+    movies = [make_movie(movie_id, 2000 + movie_id % 7, 'Movie {}'.format(movie_id), '6.5', 100)
+              for movie_id in range(1, 41)]
+    reviews = [Review(user, movies[(i * 7) % 40], 'Fine', i % 10) for i in range(100)]
+    single, batched = SortIndex(), SortIndex()
+    for movie in movies:
+        single.add_movie(movie)
+    for review in reviews:
+        single.add_review(review)
+    batched.add_movies(movies)
+    batched.add_reviews(reviews)
+
+    for order in ('date', 'rating', 'review_count', 'review_average'):
+        assert list(batched.order(order)) == list(single.order(order))
+    # A small batch moves entries rather than rebuilding.
+    review = Review(user, movies[0], 'Again', 10)
+    single.add_review(review)
+    batched.add_reviews([review])
+    assert list(batched.order('review_count')) == list(single.order('review_count'))
+
+
+def test_seek():
+    index, movies = make_index()
+    index.add_movie(make_movie(4, 2010, 'Inception', '8.8', 148))
+
+    # Date order: 4, 2, 1, 3.
+    assert index.seek('date', None, 2) == [4, 2]
+    assert index.seek('date', index.key('date', 2), 2) == [1, 3]
+    assert index.seek('date', index.key('date', 1), 2, reverse=True) == [2, 4]
+    assert index.seek('date', None, 2, reverse=True) == [3, 1]
+    assert index.seek('date', None, 4, accept=lambda movie_id: movie_id % 2) == [1, 3]
+
+    # A key stays a valid position after its movie is gone.
+    key = index.key('rating', 1)
+    index.remove_movie(movies[0])
+    assert index.seek('rating', key, 5) == [3, 2]
+
+    assert index.seek('review_count', index.key('review_count', 2), 5) == [3, 4]
+
+
+def test_fork_is_changed_without_changing_the_index():
+    index, movies = make_index()
+    user = User('Dave', '123456789')
+    index.add_review(make_review(user, movies[2], 'Good', 8))
+    list(index.order('title'))
+
+    fork = index.fork()
+    fork.add_review(make_review(user, movies[1], 'Great', 9))
+    fork.add_review(make_review(user, movies[1], 'Still great', 9))
+    fork.remove_movie(movies[0])
+    fork.add_movie(make_movie(4, 2010, 'Alien', '8.5', 117))
+
+    assert list(index.order('title')) == [1, 2, 3]
+    assert list(index.order('review_count')) == [3, 1, 2]
+    assert list(fork.order('title')) == [4, 2, 3]
+    assert list(fork.order('review_count')) == [2, 3, 4]
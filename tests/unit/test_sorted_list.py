@@ -0,0 +1,54 @@
+import random
+
+import pytest
+
+from covid.adapters.sorted_list import SortedList
+
+
+def test_sorted_list_stays_sorted_across_chunks():
+    values = list(range(100))
+    random.Random(4).shuffle(values)
+    items = SortedList(values[:50], load=4)
+    for value in values[50:]:
+        items.add(value)
+
+    assert list(items) == list(range(100))
+    assert len(items) == 100
+    assert items[0] == 0 and items[-1] == 99
+    assert items[37:45] == list(range(37, 45))
+    assert 63 in items and 100 not in items
+
+
+def test_sorted_list_remove():
+    items = SortedList(range(20), load=2)
+    for value in range(0, 20, 2):
+        items.remove(value)
+
+    assert list(items) == list(range(1, 20, 2))
+    assert items[3:5] == [7, 9]
+    with pytest.raises(ValueError):
+        items.remove(4)
+
+
+def test_sorted_list_bisect_and_islice():
+    items = SortedList(range(0, 40, 2), load=3)
+
+    assert items.bisect_left(10) == 5
+    assert items.bisect_right(10) == 6
+    assert items.bisect_left(11) == items.bisect_right(11) == 6
+    assert items.bisect_right(100) == 20
+    assert list(items.islice(17))[:2] == [34, 36]
+    assert list(items.islice(4, reverse=True)) == [6, 4, 2, 0]
+    assert list(items.islice(20, reverse=True))[:2] == [38, 36]
+
+
+def test_forked_sorted_lists_are_changed_independently():
+    items = SortedList(range(0, 20, 2), load=2)
+    fork = items.fork()
+    fork.add(5)
+    fork.remove(10)
+    items.add(11)
+    items.remove(0)
+
+    assert list(items) == [2, 4, 6, 8, 10, 11, 12, 14, 16, 18]
+    assert list(fork) == [0, 2, 4, 5, 6, 8, 12, 14, 16, 18]
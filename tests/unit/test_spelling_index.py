@@ -0,0 +1,63 @@
+from datetime import date
+
+from covid.adapters.spelling_index import SpellingIndex, edit_distance
+from covid.domain.model import Movie
+
+
+def make_movie(movie_id, title):
+    return Movie(date(2020, 1, 1), title, '', '', '', '7.0', '', movie_id, 100, '', [])
+
+
+def test_edit_distance_counts_transpositions_once():
+    assert edit_distance('galaxy', 'galaxy', 2) == 0
+    assert edit_distance('galaxy', 'glaaxy', 2) == 1
+    assert edit_distance('galaxy', 'galxy', 2) == 1
+    assert edit_distance('galaxy', 'gxlxy', 2) == 2
+    assert edit_distance('galaxy', 'gal', 2) == 3
+
+
+def test_lookup_finds_words_within_distance_nearest_first():
+    index = SpellingIndex()
+    index.add_movie(make_movie(1, 'Guardians of the Galaxy'))
+    index.add_movie(make_movie(2, 'Galaxy Quest'))
+    index.add_movie(make_movie(3, 'The Gardener'))
+
+    assert index.lookup('galxy') == [('galaxy', 1)]
+    assert index.lookup('gardians')[0] == ('guardians', 1)
+    assert index.lookup('qwerty') == []
+
+
+def test_correct_replaces_unknown_words_only():
+    index = SpellingIndex()
+    index.add_movie(make_movie(1, 'Guardians of the Galaxy'))
+
+    assert index.correct('gaurdians of the galxy') == 'guardians of the galaxy'
+    assert index.correct('guardians') is None
+    assert index.correct('zzzzzz') is None
+
+
+def test_removed_titles_are_no_longer_suggested():
+    index = SpellingIndex()
+    index.add_movie(make_movie(1, 'Inception'))
+    index.add_movie(make_movie(2, 'Inception Returns'))
+
+    index.remove_movie(make_movie(1, 'Inception'))
+    assert index.lookup('inceptoin') == [('inception', 1)]
+
+    index.remove_movie(make_movie(2, 'Inception Returns'))
+    assert index.lookup('inceptoin') == []
+    assert len(index) == 0
+
+
+def test_fork_is_changed_without_changing_the_index():
+    index = SpellingIndex()
+    index.add_movie(make_movie(1, 'Guardians of the Galaxy'))
+
+    fork = index.fork()
+    fork.remove_movie(make_movie(1, 'Guardians of the Galaxy'))
+    fork.add_movie(make_movie(2, 'The Gardener'))
+
+    assert index.lookup('galxy') == [('galaxy', 1)]
+    assert index.lookup('gardner') == []
+    assert fork.lookup('galxy') == []
+    assert fork.lookup('gardner') == [('gardener', 1)]
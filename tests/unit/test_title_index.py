@@ -0,0 +1,73 @@
+from datetime import date
+
+from covid.adapters.title_index import TitleIndex, normalise_title
+from covid.domain.model import Movie
+
+
+def make_movie(movie_id, title, rating):
+    return Movie(date(2020, 1, 1), title, '', '', '', rating, '', movie_id, 100, '', [])
+
+
+def test_titles_are_normalised():
+    assert normalise_title('Guardians of the Galaxy Vol. 2') == 'guardians of the galaxy vol 2'
+
+
+def test_suggestions_match_any_word_and_are_ranked_by_rating():
+    index = TitleIndex()
+    index.add_movie(make_movie(1, 'Guardians of the Galaxy', '8.1'))
+    index.add_movie(make_movie(2, 'Galaxy Quest', '7.4'))
+    index.add_movie(make_movie(3, 'Gravity', '7.8'))
+    index.add_movie(make_movie(4, 'The Dark Knight', '9.0'))
+
+    assert index.suggest('ga') == [1, 2]
+    assert index.suggest('G') == [1, 3, 2]
+    assert index.suggest('the ') == [4, 1]
+    assert index.suggest('galaxy q') == [2]
+    assert index.suggest('galaxyq') == []
+    assert index.suggest('') == []
+
+
+def test_suggestions_are_limited_to_the_best():
+    index = TitleIndex(top_n=3)
+    for movie_id in range(1, 11):
+        index.add_movie(make_movie(movie_id, 'Movie {}'.format(movie_id), str(movie_id)))
+
+    assert index.suggest('movie') == [10, 9, 8]
+    assert index.suggest('movie', limit=2) == [10, 9]
+
+
+def test_removing_a_movie_promotes_the_next_best():
+    index = TitleIndex(top_n=2)
+    movies = [make_movie(movie_id, 'Star {}'.format(movie_id), str(movie_id)) for movie_id in range(1, 5)]
+    for movie in movies:
+        index.add_movie(movie)
+
+    index.remove_movie(movies[3])
+    index.remove_movie(movies[2])
+
+    assert index.suggest('star') == [2, 1]
+    assert index.suggest('4') == []
+    assert len(index) == 2
+
+
+def test_fork_is_changed_without_changing_the_index():
+    index = TitleIndex()
+    index.add_movie(make_movie(1, 'Guardians of the Galaxy', '8.1'))
+    index.add_movie(make_movie(2, 'Galaxy Quest', '7.4'))
+
+    fork = index.fork()
+    fork.remove_movie(make_movie(1, 'Guardians of the Galaxy', '8.1'))
+    fork.add_movie(make_movie(3, 'Galaxina', '9.0'))
+    fork.add_movie(make_movie(4, 'Gravity', '7.8'))
+
+    assert index.suggest('ga') == [1, 2]
+    assert index.suggest('gr') == []
+    assert index.suggest('guardians') == [1]
+    assert fork.suggest('ga') == [3, 2]
+    assert fork.suggest('g') == [3, 4, 2]
+    assert fork.suggest('guardians') == []
+
+    # Changing the index after it's forked leaves the fork as it was, too.
+    index.add_movie(make_movie(5, 'Galapagos', '9.5'))
+    assert index.suggest('ga') == [5, 1, 2]
+    assert fork.suggest('ga') == [3, 2]